@@ -0,0 +1,195 @@
+# document_ai_verification/ai/cassette.py
+
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Callable, Dict, Generator, Iterable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CASSETTE_MODES = ("off", "record", "replay")
+REPLAY_LATENCIES = ("original", "zero")
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recording exists for a request fingerprint."""
+    pass
+
+
+def fingerprint_request(namespace: str, payload: Dict[str, Any]) -> str:
+    """
+    Computes a stable SHA-256 fingerprint for a model request.
+
+    The payload must only contain what determines the answer (model, messages,
+    generation parameters, image bytes...). Hosts, API keys and file names are
+    deliberately left out so recordings replay on any machine.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{namespace}\n{canonical}".encode("utf-8")).hexdigest()
+
+
+class CassetteStore:
+    """
+    A local, file-based store of recorded LLM/OCR responses.
+
+    Modes:
+        - 'off':    Every call goes to the live backend (default).
+        - 'record': Calls go to the live backend and each response is saved.
+        - 'replay': Calls are served from the store; a missing recording raises CassetteMissError.
+
+    Recordings are stored as '<path>/<namespace>/<fingerprint>.json'.
+    """
+    def __init__(self, path: str = "cassettes", mode: str = "off", replay_latency: str = "original"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Invalid cassette mode '{mode}'. Expected one of {CASSETTE_MODES}.")
+        if replay_latency not in REPLAY_LATENCIES:
+            raise ValueError(f"Invalid replay latency '{replay_latency}'. Expected one of {REPLAY_LATENCIES}.")
+        self.path = Path(path)
+        self.mode = mode
+        self.replay_latency = replay_latency
+        if self.mode != "off":
+            self.path.mkdir(parents=True, exist_ok=True)
+            logger.info(f"Cassette store active in '{self.mode}' mode at {self.path.resolve()}")
+
+    @classmethod
+    def from_config(cls, cassette_config: Optional[Dict[str, Any]]) -> "CassetteStore":
+        """Builds a store from the 'ai_services.cassette' config section.
+        CASSETTE_MODE / CASSETTE_PATH / CASSETTE_REPLAY_LATENCY environment variables override it."""
+        cassette_config = cassette_config or {}
+        return cls(
+            path=os.getenv("CASSETTE_PATH", cassette_config.get("path", "cassettes")),
+            mode=os.getenv("CASSETTE_MODE", cassette_config.get("mode", "off")),
+            replay_latency=os.getenv("CASSETTE_REPLAY_LATENCY", cassette_config.get("replay_latency", "original")),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    # --- Storage ---
+    def _record_path(self, namespace: str, key: str) -> Path:
+        return self.path / namespace / f"{key}.json"
+
+    def load(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        record_path = self._record_path(namespace, key)
+        if not record_path.is_file():
+            return None
+        with open(record_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self, namespace: str, key: str, record: Dict[str, Any]):
+        record_path = self._record_path(namespace, key)
+        record_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file.
+        tmp_path = record_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(record, f, indent=2)
+        os.replace(tmp_path, record_path)
+        logger.info(f"Recorded cassette {namespace}/{key[:12]}")
+
+    def _load_or_miss(self, namespace: str, key: str) -> Dict[str, Any]:
+        record = self.load(namespace, key)
+        if record is None:
+            msg = f"No cassette recorded for {namespace} request {key[:12]} in {self.path}. Re-run in 'record' mode first."
+            logger.error(msg)
+            raise CassetteMissError(msg)
+        return record
+
+    # --- Call wrappers ---
+    def call(
+        self,
+        namespace: str,
+        request_payload: Dict[str, Any],
+        live_call: Callable[[], T],
+        serialize: Callable[[T], Any],
+        deserialize: Callable[[Any], T],
+    ) -> T:
+        """
+        Runs a single request/response call through the cassette.
+
+        Args:
+            namespace (str): Groups recordings by backend, e.g. 'llm' or 'ocr'.
+            request_payload (Dict[str, Any]): Everything that determines the response.
+            live_call (Callable): Performs the real backend call.
+            serialize (Callable): Converts the live result into JSON-compatible data.
+            deserialize (Callable): Rebuilds the result from recorded data.
+        """
+        if self.mode == "off":
+            return live_call()
+
+        key = fingerprint_request(namespace, request_payload)
+        if self.mode == "replay":
+            record = self._load_or_miss(namespace, key)
+            if self.replay_latency == "original":
+                time.sleep(record.get("latency_seconds", 0.0))
+            return deserialize(record["response"])
+
+        start = time.perf_counter()
+        result = live_call()
+        self.save(namespace, key, {
+            "namespace": namespace,
+            "fingerprint": key,
+            "recorded_at": time.time(),
+            "latency_seconds": time.perf_counter() - start,
+            "response": serialize(result),
+        })
+        return result
+
+    def stream(
+        self,
+        namespace: str,
+        request_payload: Dict[str, Any],
+        live_stream: Callable[[], Iterable[T]],
+        serialize: Callable[[T], Any],
+        deserialize: Callable[[Any], T],
+    ) -> Generator[T, None, None]:
+        """
+        Like `call`, but for streamed responses. Chunk timing is recorded and replayed.
+
+        Only streams read to the end are recorded: one closed early (an aborted request,
+        a consumer that stopped reading) would replay as a truncated response.
+        """
+        if self.mode == "off":
+            yield from live_stream()
+            return
+
+        key = fingerprint_request(namespace, request_payload)
+        if self.mode == "replay":
+            record = self._load_or_miss(namespace, key)
+            for chunk in record["chunks"]:
+                if self.replay_latency == "original":
+                    time.sleep(chunk.get("delay_seconds", 0.0))
+                yield deserialize(chunk["data"])
+            return
+
+        chunks = []
+        start = last = time.perf_counter()
+        live = live_stream()
+        completed = False
+        try:
+            for item in live:
+                now = time.perf_counter()
+                chunks.append({"delay_seconds": now - last, "data": serialize(item)})
+                last = now
+                yield item
+            completed = True
+        finally:
+            # Closing the live stream drops the connection, which stops generation server-side.
+            close = getattr(live, "close", None)
+            if close:
+                close()
+            if not completed:
+                logger.info(f"Not recording cassette {namespace}/{key[:12]}: the stream did not run to its end.")
+            elif chunks:
+                self.save(namespace, key, {
+                    "namespace": namespace,
+                    "fingerprint": key,
+                    "recorded_at": time.time(),
+                    "latency_seconds": last - start,
+                    "chunks": chunks,
+                })
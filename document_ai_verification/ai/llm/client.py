@@ -1,14 +1,21 @@
 import os
 import json
+import contextlib
 import logging
+import io
 import base64
+import mimetypes
 from pathlib import Path
-from dotenv import load_dotenv
-from openai import OpenAI, APIError, BadRequestError
-from typing import Generator, Any, Type, TypeVar, List
-from pydantic import BaseModel, Field
-import cv2
-import numpy as np
+from openai import APIError, BadRequestError
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+from typing import Callable, ContextManager, Generator, Any, Iterable, Type, TypeVar, List, Optional, Tuple
+from pydantic import BaseModel, Field, ValidationError
+
+from ..cassette import CassetteStore
+from .endpoint_pool import EndpointPool, parse_endpoint_urls
+from .json_repair import TruncatedOutputError, repair_json_output
+from .streaming_json import IncrementalJSONObjectParser
+from .usage import DEFAULT_IMAGE_TOKEN_PIXELS, record_call
 
 def build_structured_prompt(prompt: str, response_model: Type[BaseModel]) -> str:
     """
@@ -40,10 +47,6 @@ def build_structured_prompt(prompt: str, response_model: Type[BaseModel]) -> str
     return structured_prompt
 
 
-# Load environment variables from a .env file
-load_dotenv()
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
 # Generic type variable for Pydantic models for clean type hinting.
 PydanticModel = TypeVar("PydanticModel", bound=BaseModel)
 
@@ -51,6 +54,10 @@ class ContextLengthExceededError(Exception):
     """Custom exception for when a prompt exceeds the model's context window."""
     pass
 
+class StructuredOutputError(ValueError):
+    """Raised when a structured response stays invalid after local repair and one targeted retry."""
+    pass
+
 def encode_image_to_base64(image_path: Path, max_height: int = None) -> str:
     """
     Reads an image file, resizes it if it exceeds max_height while maintaining aspect ratio,
@@ -61,6 +68,8 @@ def encode_image_to_base64(image_path: Path, max_height: int = None) -> str:
             with open(image_path, "rb") as image_file:
                 return base64.b64encode(image_file.read()).decode('utf-8')
         
+        import cv2  # Deferred: OpenCV is only needed when images are resized.
+
         # Read image with OpenCV
         img = cv2.imread(str(image_path))
         if img is None:
@@ -84,22 +93,160 @@ def encode_image_to_base64(image_path: Path, max_height: int = None) -> str:
         logging.error(f"Error encoding or resizing image {image_path}: {e}")
         raise
 
+def image_data_url(image_path: Path, max_height: int = None) -> str:
+    """
+    A data URL for a page image. Images already within `max_height` (such as the renders of
+    the 'llm' render profile) are sent as they are, in their own format, without decoding;
+    larger ones are downscaled and re-encoded as PNG by `encode_image_to_base64`.
+    """
+    if max_height:
+        from PIL import Image  # Deferred; only the header is read here.
+
+        with Image.open(image_path) as img:
+            needs_resize = img.height > max_height
+        if needs_resize:
+            return f"data:image/png;base64,{encode_image_to_base64(image_path, max_height=max_height)}"
+    media_type = mimetypes.guess_type(Path(image_path).name)[0] or "image/png"
+    return f"data:{media_type};base64,{encode_image_to_base64(image_path)}"
+
+def encode_image_array_to_base64(image: Any) -> str:
+    """Encodes an in-memory image (a BGR array, e.g. a crop) as base64 PNG, without resizing."""
+    import cv2  # Deferred, as in encode_image_to_base64.
+
+    ok, buffer = cv2.imencode('.png', image)
+    if not ok:
+        raise ValueError("Could not encode image array to PNG.")
+    return base64.b64encode(buffer).decode('utf-8')
+
+def encode_region_crops(regions: List[dict]) -> List[dict]:
+    """
+    Copies of audit crops whose 'nsv' and 'sv' arrays are replaced by their base64 PNG,
+    so the page images they were cut from can be freed before the request is sent.
+    """
+    return [{**region, **{key: encode_image_array_to_base64(region[key]) for key in ("nsv", "sv")}} for region in regions]
+
 class LLMService:
     """
     A synchronous client for OpenAI-compatible APIs using the 'openai' library.
     """
-    def __init__(self,api_key:str ,model: str, base_url: str, max_context_tokens: int, max_img_height: int = None):
+    def __init__(self,api_key:str ,model: str, base_url: str, max_context_tokens: int, max_img_height: int = None, cassette: CassetteStore = None, structured_output_mode: str = "json_schema", generation_defaults: dict = None, concurrency_limiter: Callable[[], ContextManager] = None, endpoint_settings: dict = None, usage_settings: dict = None):
         self.model = model
         self.max_context_tokens = max_context_tokens
         self.max_img_height = max_img_height
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        # `base_url` may name several OpenAI-compatible endpoints, comma-separated; see EndpointPool.
+        self.pool = EndpointPool(parse_endpoint_urls(base_url), api_key, endpoint_settings)
+        # Record/replay store for completions; 'off' unless configured.
+        self.cassette = cassette or CassetteStore(mode="off")
+        # 'json_schema' requests constrained decoding against the Pydantic schema; 'json_object' only asks for JSON.
+        if structured_output_mode not in ("json_schema", "json_object"):
+            raise ValueError(f"Invalid structured_output_mode '{structured_output_mode}'.")
+        self.structured_output_mode = structured_output_mode
+        self._json_schema_unsupported = False
+        # Applied to every request (e.g. temperature, max_tokens); per-call kwargs take precedence.
+        self.generation_defaults = dict(generation_defaults or {})
+        # Returns a context manager held for the duration of each live request (e.g. a
+        # cross-process semaphore slot); replayed cassette responses do not take one.
+        self.concurrency_limiter = concurrency_limiter or contextlib.nullcontext
+        # Token accounting (see usage.py): how image tokens are estimated when the backend does not
+        # report them, and whether streams ask for a final usage chunk.
+        usage_settings = usage_settings or {}
+        self.image_token_pixels = usage_settings.get('image_token_pixels', DEFAULT_IMAGE_TOKEN_PIXELS)
+        self.stream_include_usage = usage_settings.get('stream_include_usage', True)
         
-        print(f"✅ LLMService (Sync) initialized for model '{self.model}' with max_tokens={self.max_context_tokens} and max_img_height={self.max_img_height}.")
+        print(f"✅ LLMService (Sync) initialized for model '{self.model}' on {len(self.pool.endpoints)} endpoint(s) with max_tokens={self.max_context_tokens} and max_img_height={self.max_img_height}.")
+
+    def endpoint_stats(self) -> List[dict]:
+        """Latency, error and circuit statistics of each LLM endpoint."""
+        return self.pool.stats()
+
+    def _limited_call(self, make_request: Callable[[], Any]) -> Any:
+        with self.concurrency_limiter():
+            return make_request()
+
+    def _limited_stream(self, make_stream: Callable[[], Iterable[Any]]) -> Generator[Any, None, None]:
+        """Holds the concurrency slot until the stream is exhausted or closed."""
+        with self.concurrency_limiter():
+            yield from make_stream()
+
+    def _record_usage(self, messages: List[dict], usage: Any, completion_chars: int = 0, streamed_chunks: int = 0):
+        """Reports a completion's token usage to the current request's ledger and the process totals."""
+        from PIL import Image
+
+        prompt_chars, image_pixels = 0, []
+        for message in messages:
+            content = message.get("content")
+            parts = content if isinstance(content, list) else [{"type": "text", "text": content or ""}]
+            for part in parts:
+                if part.get("type") == "text":
+                    prompt_chars += len(part.get("text") or "")
+                elif part.get("type") == "image_url":
+                    url = part["image_url"]["url"]
+                    try:
+                        with Image.open(io.BytesIO(base64.b64decode(url.split(",", 1)[1]))) as image:
+                            image_pixels.append(image.width * image.height)
+                    except Exception:
+                        image_pixels.append(0)
+        record_call(
+            self.model, usage, tuple(image_pixels), prompt_chars=prompt_chars, completion_chars=completion_chars,
+            streamed_chunks=streamed_chunks, image_token_pixels=self.image_token_pixels,
+        )
+
+    def _metered_stream(self, messages: List[dict], stream: Iterable[ChatCompletionChunk]) -> Generator[ChatCompletionChunk, None, None]:
+        """Passes a stream through and records its usage once it ends or is closed."""
+        usage, chunks = None, 0
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks += 1
+                yield chunk
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+            if usage is not None or chunks:
+                self._record_usage(messages, usage, streamed_chunks=chunks)
+
+    def _create_completion(self, messages: List[dict], **kwargs: Any) -> ChatCompletion:
+        """
+        Single entry point for non-streaming chat completions, routed through the cassette store.
+        The fingerprint covers the model, messages (including image data) and all request parameters.
+        """
+        kwargs = {**self.generation_defaults, **kwargs}
+        response = self.cassette.call(
+            namespace="llm",
+            request_payload={"model": self.model, "messages": messages, **kwargs},
+            live_call=lambda: self._limited_call(lambda: self.pool.call(
+                lambda client: client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+            )),
+            serialize=lambda response: response.model_dump(mode="json"),
+            deserialize=ChatCompletion.model_validate,
+        )
+        content = response.choices[0].message.content if response.choices else None
+        self._record_usage(messages, response.usage, completion_chars=len(content or ""))
+        return response
+
+    def _create_stream(self, messages: List[dict], **kwargs: Any) -> Generator[ChatCompletionChunk, None, None]:
+        """Streaming counterpart of `_create_completion`."""
+        kwargs = {**self.generation_defaults, **kwargs}
+        if self.stream_include_usage:
+            # The usage arrives in a final chunk without choices.
+            kwargs.setdefault("stream_options", {"include_usage": True})
+        return self._metered_stream(messages, self.cassette.stream(
+            namespace="llm",
+            request_payload={"model": self.model, "messages": messages, "stream": True, **kwargs},
+            live_stream=lambda: self._limited_stream(lambda: self.pool.stream(
+                lambda client: client.chat.completions.create(model=self.model, messages=messages, stream=True, **kwargs)
+            )),
+            serialize=lambda chunk: chunk.model_dump(mode="json"),
+            deserialize=ChatCompletionChunk.model_validate,
+        ))
 
     def invoke(self, prompt: str, **kwargs: Any) -> str:
         messages = [{"role": "user", "content": prompt}]
         try:
-            response = self.client.chat.completions.create(model=self.model, messages=messages, **kwargs)
+            response = self._create_completion(messages, **kwargs)
             return response.choices[0].message.content or ""
         except BadRequestError as e:
             if "context length" in str(e).lower() or "too large" in str(e).lower():
@@ -115,8 +262,10 @@ class LLMService:
     def stream(self, prompt: str, **kwargs: Any) -> Generator[str, None, None]:
         messages = [{"role": "user", "content": prompt}]
         try:
-            stream = self.client.chat.completions.create(model=self.model, messages=messages, stream=True, **kwargs)
+            stream = self._create_stream(messages, **kwargs)
             for chunk in stream:
+                if not chunk.choices:
+                    continue
                 content_chunk = chunk.choices[0].delta.content
                 if content_chunk:
                     yield content_chunk
@@ -131,31 +280,203 @@ class LLMService:
             logging.error(f"An error occurred during stream: {e}", exc_info=True)
             raise
 
-    def invoke_structured(
-        self, prompt: str, response_model: Type[PydanticModel], **kwargs: Any
+    # --- Structured output helpers ---
+    def _response_format(self, response_model: Type[BaseModel]) -> dict:
+        """
+        The response_format for a structured call: a strict JSON schema derived from the
+        Pydantic model when the backend supports constrained decoding, otherwise plain JSON mode.
+        """
+        if self.structured_output_mode == "json_schema" and not self._json_schema_unsupported:
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": response_model.__name__,
+                    "schema": response_model.model_json_schema(),
+                    "strict": True,
+                },
+            }
+        return {"type": "json_object"}
+
+    def _create_structured_completion(self, messages: List[dict], response_model: Type[BaseModel], **kwargs: Any) -> ChatCompletion:
+        """Requests a completion with the best available response_format, downgrading once
+        to JSON mode if the backend rejects schema-constrained decoding."""
+        response_format = self._response_format(response_model)
+        try:
+            return self._create_completion(messages, response_format=response_format, **kwargs)
+        except BadRequestError as e:
+            error_text = str(e).lower()
+            if response_format["type"] == "json_schema" and ("response_format" in error_text or "json_schema" in error_text):
+                logging.warning(f"Backend rejected json_schema response_format; falling back to json_object. Error: {e}")
+                self._json_schema_unsupported = True
+                return self._create_completion(messages, response_format={"type": "json_object"}, **kwargs)
+            raise
+
+    def _parse_structured(self, content: str, response_model: Type[PydanticModel], finish_reason: Optional[str] = None) -> PydanticModel:
+        """
+        Validates the raw output, applying the local repair step before giving up.
+        Output cut off by the token limit is rejected, never repaired into a shorter answer.
+        """
+        if finish_reason == "length":
+            raise TruncatedOutputError("The response reached the token limit before its JSON object was complete.")
+        if not content:
+            raise ValueError("The model returned an empty response.")
+        try:
+            return response_model.model_validate_json(content)
+        except ValidationError as first_error:
+            try:
+                repaired = response_model.model_validate(repair_json_output(content, response_model))
+                logging.warning(f"Repaired malformed {response_model.__name__} output locally.")
+                return repaired
+            except TruncatedOutputError:
+                raise
+            except (ValueError, ValidationError):
+                raise first_error
+
+    def _retry_structured(
+        self, messages: List[dict], content: str, error: Exception, response_model: Type[PydanticModel], operation: str, **kwargs: Any
     ) -> PydanticModel:
-        # --- MODIFIED: Use the shared utility function ---
-        structured_prompt = build_structured_prompt(prompt, response_model)
-        messages = [{"role": "user", "content": structured_prompt}]
+        """The single targeted retry: shows the model its invalid answer and the exact validation errors."""
+        logging.warning(f"Invalid {response_model.__name__} output during {operation}; retrying once. Error: {error}")
+        retry_messages = messages + [
+            {"role": "assistant", "content": content},
+            {"role": "user", "content": (
+                f"Your previous response was not a valid {response_model.__name__} JSON object. "
+                f"Validation errors:\n{error}\n"
+                "Return ONLY the corrected JSON object, with no other text."
+            )},
+        ]
+        retry_response = self._create_structured_completion(retry_messages, response_model, **kwargs)
+        retry_content = retry_response.choices[0].message.content or ""
+        try:
+            return self._parse_structured(retry_content, response_model, retry_response.choices[0].finish_reason)
+        except (ValueError, ValidationError) as retry_error:
+            raise StructuredOutputError(
+                f"Model output for {response_model.__name__} was invalid after repair and retry: {retry_error}"
+            ) from retry_error
+
+    def _invoke_structured_messages(
+        self, messages: List[dict], response_model: Type[PydanticModel], operation: str, **kwargs: Any
+    ) -> PydanticModel:
+        """
+        Shared implementation of every structured call.
 
+        1. Requests schema-constrained output (or JSON mode, see `_response_format`).
+        2. Validates the output, repairing common defects locally (code fences,
+           trailing commas, enum casing). Truncated output is not repaired.
+        3. If the output is still invalid or truncated, makes ONE targeted retry that shows the model
+           its previous answer and the exact validation errors.
+
+        Raises:
+            ContextLengthExceededError: If the prompt exceeds the model's context window.
+            StructuredOutputError: If the output is still invalid after the retry.
+        """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model, messages=messages, response_format={"type": "json_object"}, **kwargs
-            )
-            json_response_str = response.choices[0].message.content
-            if not json_response_str:
-                raise ValueError("The model returned an empty response.")
-            return response_model.model_validate_json(json_response_str)
+            response = self._create_structured_completion(messages, response_model, **kwargs)
+            content = response.choices[0].message.content or ""
+            try:
+                return self._parse_structured(content, response_model, response.choices[0].finish_reason)
+            except (ValueError, ValidationError) as e:
+                return self._retry_structured(messages, content, e, response_model, operation, **kwargs)
         except BadRequestError as e:
             if "context length" in str(e).lower() or "too large" in str(e).lower():
                 logging.error(f"Prompt exceeded context window for model {self.model}.")
                 raise ContextLengthExceededError(f"Prompt is too long for the model's {self.max_context_tokens} token limit.") from e
             else:
-                logging.error(f"Unhandled BadRequestError during structured invoke: {e}")
+                logging.error(f"Unhandled BadRequestError during {operation}: {e}")
                 raise
         except Exception as e:
-            logging.error(f"An error occurred during structured invoke: {e}", exc_info=True)
+            logging.error(f"An error occurred during {operation}: {e}", exc_info=True)
+            raise
+
+    def _open_structured_stream(self, messages: List[dict], response_model: Type[BaseModel], **kwargs: Any) -> Generator[ChatCompletionChunk, None, None]:
+        """Streaming counterpart of `_create_structured_completion`, with the same json_schema fallback.
+        The request is only sent when the first chunk is pulled, so the fallback is decided there."""
+        response_format = self._response_format(response_model)
+        stream = self._create_stream(messages, response_format=response_format, **kwargs)
+        try:
+            first_chunk = next(stream)
+        except StopIteration:
+            return
+        except BadRequestError as e:
+            error_text = str(e).lower()
+            if response_format["type"] == "json_schema" and ("response_format" in error_text or "json_schema" in error_text):
+                logging.warning(f"Backend rejected json_schema response_format; falling back to json_object. Error: {e}")
+                self._json_schema_unsupported = True
+                fallback = self._create_stream(messages, response_format={"type": "json_object"}, **kwargs)
+                try:
+                    yield from fallback
+                finally:
+                    fallback.close()
+                return
             raise
+        try:
+            yield first_chunk
+            yield from stream
+        finally:
+            stream.close()
+
+    def _stream_structured_messages(
+        self, messages: List[dict], response_model: Type[PydanticModel], operation: str, **kwargs: Any
+    ) -> Generator[Tuple[str, Optional[str], Any], None, None]:
+        """
+        Streams a structured response and reports progress while it is being decoded.
+
+        Yields:
+            ("item", key, data): Each object element of a top-level array (e.g. one audited
+                                 input under 'required_inputs') as soon as it is complete.
+            ("result", None, model): The validated response, always last.
+
+        Generation is stopped as soon as the top-level JSON object closes. Invalid output
+        goes through the same local repair and single targeted retry as `_invoke_structured_messages`.
+        """
+        parser = IncrementalJSONObjectParser()
+        raw_chunks: List[str] = []
+        finish_reason = None
+        try:
+            stream = self._open_structured_stream(messages, response_model, **kwargs)
+            try:
+                for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    content_chunk = chunk.choices[0].delta.content
+                    if not content_chunk:
+                        continue
+                    raw_chunks.append(content_chunk)
+                    for key, data in parser.feed(content_chunk):
+                        yield ("item", key, data)
+                    # While recording, the stream is read to the end so the cassette keeps it whole.
+                    if parser.done and self.cassette.mode != "record":
+                        logging.info(f"Top-level JSON object closed; stopping generation for {operation}.")
+                        break
+            finally:
+                stream.close()
+
+            content = parser.text if parser.done else "".join(raw_chunks)
+            try:
+                # Tokens after the closed object (read while recording) do not make it truncated.
+                result = self._parse_structured(content, response_model, None if parser.done else finish_reason)
+            except (ValueError, ValidationError) as e:
+                result = self._retry_structured(messages, content, e, response_model, operation, **kwargs)
+            yield ("result", None, result)
+        except BadRequestError as e:
+            if "context length" in str(e).lower() or "too large" in str(e).lower():
+                logging.error(f"Prompt exceeded context window for model {self.model}.")
+                raise ContextLengthExceededError(f"Prompt is too long for the model's {self.max_context_tokens} token limit.") from e
+            else:
+                logging.error(f"Unhandled BadRequestError during {operation}: {e}")
+                raise
+        except Exception as e:
+            logging.error(f"An error occurred during {operation}: {e}", exc_info=True)
+            raise
+
+    def invoke_structured(
+        self, prompt: str, response_model: Type[PydanticModel], **kwargs: Any
+    ) -> PydanticModel:
+        # --- MODIFIED: Use the shared utility function ---
+        structured_prompt = build_structured_prompt(prompt, response_model)
+        messages = [{"role": "user", "content": structured_prompt}]
+        return self._invoke_structured_messages(messages, response_model, "structured invoke", **kwargs)
     
 
     def invoke_vision_structured(
@@ -165,7 +486,7 @@ class LLMService:
         Sends a text prompt and an image to the VLLM and parses a structured JSON response.
         """
         logging.info(f"Performing vision call for image: {image_path.name}")
-        base64_image = encode_image_to_base64(image_path, max_height=self.max_img_height)
+        image_url = image_data_url(image_path, max_height=self.max_img_height)
         
         structured_prompt = build_structured_prompt(prompt, response_model)
         
@@ -176,50 +497,22 @@ class LLMService:
                     {"type": "text", "text": structured_prompt},
                     {
                         "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{base64_image}"},
+                        "image_url": {"url": image_url},
                     },
                 ],
             }
         ]
-
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model, messages=messages, response_format={"type": "json_object"}, **kwargs
-            )
-            json_response_str = response.choices[0].message.content
-            if not json_response_str:
-                raise ValueError("The vision model returned an empty response.")
-            return response_model.model_validate_json(json_response_str)
-        except Exception as e:
-            logging.error(f"An error occurred during structured vision invoke: {e}  value: {json_response_str}", exc_info=True)
-            raise
+        return self._invoke_structured_messages(messages, response_model, "structured vision invoke", **kwargs)
     
-    def invoke_image_compare_structured(
-        self, prompt: str, image_path_1: Path, image_path_2: Path, response_model: Type[PydanticModel], **kwargs: Any
-    ) -> PydanticModel:
-        """
-        Sends a text prompt and two images to the VLLM for comparison and parses a structured JSON response.
-
-        Args:
-            prompt (str): The text prompt describing the comparison task.
-            image_path_1 (Path): Path to the first image file.
-            image_path_2 (Path): Path to the second image file.
-            response_model (Type[PydanticModel]): The Pydantic model to structure the response.
-            **kwargs: Additional arguments to pass to the API (e.g., temperature, max_tokens).
-
-        Returns:
-            PydanticModel: The parsed response conforming to the specified model.
-
-        Raises:
-            ValueError: If the model returns an empty response.
-            ContextLengthExceededError: If the prompt exceeds the model's context window.
-            Exception: For other API or processing errors.
-        """
+    def _build_image_compare_messages(
+        self, prompt: str, image_path_1: Path, image_path_2: Path, response_model: Type[BaseModel]
+    ) -> List[dict]:
+        """Builds the chat messages for a two-image comparison call."""
         logging.info(f"Performing vision-based comparison for images: {image_path_1.name} and {image_path_2.name}")
         
         # Encode both images to base64, applying resizing if necessary
-        base64_image_1 = encode_image_to_base64(image_path_1, max_height=self.max_img_height)
-        base64_image_2 = encode_image_to_base64(image_path_2, max_height=self.max_img_height)
+        image_url_1 = image_data_url(image_path_1, max_height=self.max_img_height)
+        image_url_2 = image_data_url(image_path_2, max_height=self.max_img_height)
         
         # Build the structured prompt
         structured_prompt = build_structured_prompt(prompt, response_model)
@@ -232,41 +525,105 @@ class LLMService:
                     {"type": "text", "text": structured_prompt},
                     {
                         "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{base64_image_1}"},
+                        "image_url": {"url": image_url_1},
                     },
                     {
                         "type": "image_url",
-                        "image_url": {"url": f"data:image/png;base64,{base64_image_2}"},
+                        "image_url": {"url": image_url_2},
                     },
                 ],
             }
         ]
+        return messages
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model, 
-                messages=messages, 
-                response_format={"type": "json_object"}, 
-                **kwargs
-            )
-            json_response_str = response.choices[0].message.content
-            if not json_response_str:
-                raise ValueError("The vision model returned an empty response.")
-            return response_model.model_validate_json(json_response_str)
-        except BadRequestError as e:
-            if "context length" in str(e).lower() or "too large" in str(e).lower():
-                logging.error(f"Prompt exceeded context window for model {self.model}.")
-                raise ContextLengthExceededError(
-                    f"Prompt is too long for the model's {self.max_context_tokens} token limit."
-                ) from e
-            else:
-                logging.error(f"Unhandled BadRequestError during structured image comparison invoke: {e}")
-                raise
-        except Exception as e:
-            logging.error(f"An error occurred during structured image comparison invoke: {e}", exc_info=True)
-            raise
+    def invoke_image_compare_structured(
+        self, prompt: str, image_path_1: Path, image_path_2: Path, response_model: Type[PydanticModel], **kwargs: Any
+    ) -> PydanticModel:
+        """
+        Sends a text prompt and two images to the VLLM for comparison and parses a structured JSON response.
+
+        Args:
+            prompt (str): The text prompt describing the comparison task.
+            image_path_1 (Path): Path to the first image file.
+            image_path_2 (Path): Path to the second image file.
+            response_model (Type[PydanticModel]): The Pydantic model to structure the response.
+            **kwargs: Additional arguments to pass to the API (e.g., temperature, max_tokens).
+
+        Returns:
+            PydanticModel: The parsed response conforming to the specified model.
+
+        Raises:
+            ValueError: If the model returns an empty response.
+            ContextLengthExceededError: If the prompt exceeds the model's context window.
+            StructuredOutputError: If the response is still invalid after local repair and one retry.
+            Exception: For other API or processing errors.
+        """
+        messages = self._build_image_compare_messages(prompt, image_path_1, image_path_2, response_model)
+        return self._invoke_structured_messages(messages, response_model, "structured image comparison invoke", **kwargs)
+
+    def stream_image_compare_structured(
+        self, prompt: str, image_path_1: Path, image_path_2: Path, response_model: Type[PydanticModel], **kwargs: Any
+    ) -> Generator[Tuple[str, Optional[str], Any], None, None]:
+        """
+        Streaming variant of `invoke_image_compare_structured`.
+
+        Yields ("item", key, data) for every completed element of a top-level list as it is
+        decoded, then ("result", None, model) with the validated response. Generation stops
+        as soon as the top-level JSON object closes. See `_stream_structured_messages`.
+        """
+        messages = self._build_image_compare_messages(prompt, image_path_1, image_path_2, response_model)
+        yield from self._stream_structured_messages(messages, response_model, "streamed image comparison invoke", **kwargs)
+
+    def _build_region_compare_messages(
+        self, prompt: str, regions: List[dict], response_model: Type[BaseModel]
+    ) -> List[dict]:
+        """
+        Builds the chat messages for a cropped comparison: every region contributes a
+        caption and its NSV and SV crops, sent at native resolution (no `max_img_height`).
+        """
+        logging.info(f"Performing region-based comparison over {len(regions)} crop pair(s).")
+        content = [{"type": "text", "text": build_structured_prompt(prompt, response_model)}]
+        for region in regions:
+            for version, key in (("NSV", "nsv"), ("SV", "sv")):
+                # Crops already encoded by `encode_region_crops` are used as they are.
+                image_data = region[key] if isinstance(region[key], str) else encode_image_array_to_base64(region[key])
+                content.append({"type": "text", "text": f"Region {region['id']} - {version} crop:"})
+                content.append({
+                    "type": "image_url",
+                    "image_url": {"url": f"data:image/png;base64,{image_data}"},
+                })
+        return [{"role": "user", "content": content}]
+
+    def invoke_region_compare_structured(
+        self, prompt: str, regions: List[dict], response_model: Type[PydanticModel], **kwargs: Any
+    ) -> PydanticModel:
+        """
+        Like `invoke_image_compare_structured`, but sends pairs of crops instead of two full pages.
+
+        Args:
+            prompt (str): The text prompt, which should carry the layout map of the crops.
+            regions (List[dict]): Crops with 'id', 'nsv' and 'sv' image arrays (see `image_utils.build_audit_crops`),
+                or their base64 PNG (see `encode_region_crops`).
+            response_model (Type[PydanticModel]): The Pydantic model to structure the response.
+            **kwargs: Additional arguments to pass to the API (e.g., temperature, max_tokens).
+
+        Returns:
+            PydanticModel: The parsed response conforming to the specified model.
+        """
+        messages = self._build_region_compare_messages(prompt, regions, response_model)
+        return self._invoke_structured_messages(messages, response_model, "structured region comparison invoke", **kwargs)
+
+    def stream_region_compare_structured(
+        self, prompt: str, regions: List[dict], response_model: Type[PydanticModel], **kwargs: Any
+    ) -> Generator[Tuple[str, Optional[str], Any], None, None]:
+        """Streaming variant of `invoke_region_compare_structured`; see `stream_image_compare_structured`."""
+        messages = self._build_region_compare_messages(prompt, regions, response_model)
+        yield from self._stream_structured_messages(messages, response_model, "streamed region comparison invoke", **kwargs)
 
 if __name__ == '__main__':
+    from dotenv import load_dotenv
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     # --- Setup and Initialization ---
     project_root = Path(__file__).resolve().parent.parent.parent
     load_dotenv(dotenv_path=project_root / ".env")
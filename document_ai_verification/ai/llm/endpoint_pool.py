@@ -0,0 +1,269 @@
+# document_ai_verification/ai/llm/endpoint_pool.py
+
+"""
+Routing of LLM requests over a pool of OpenAI-compatible endpoints.
+
+`LLM_API_URL` may list several endpoints separated by commas (e.g. one vLLM server
+per GPU node). Every request goes to the endpoint with the fewest requests in
+flight from this process, and:
+  - Each endpoint has a circuit breaker. After `failure_threshold` consecutive
+    failures it is ejected for `circuit_open_seconds`; then a single trial request
+    is let through (half-open) and its outcome closes or re-opens the circuit.
+  - A background probe lists each endpoint's models every
+    `health_check_interval_seconds`; a failed probe counts as a failure and a
+    successful one closes an open circuit early.
+  - Connection errors, timeouts, 429 and 5xx answers are retried on another
+    endpoint with full-jitter exponential backoff. Streams are only retried before
+    their first chunk, so no partial output is ever replayed.
+  - Latency and error counts per endpoint are kept for the /metrics/llm endpoint.
+Client errors (400 and the like) are the request's fault, not the endpoint's, and
+are neither retried nor counted against it.
+"""
+
+import time
+import random
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Sequence, Set
+
+from openai import APIConnectionError, InternalServerError, OpenAI, RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# Errors that say nothing about the request itself, so another endpoint may well succeed.
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def parse_endpoint_urls(base_url: Any) -> List[str]:
+    """The endpoints of `LLM_API_URL`: a single URL, a comma-separated list, or a list."""
+    urls = base_url if isinstance(base_url, (list, tuple)) else str(base_url or "").split(",")
+    urls = [url.strip().rstrip("/") for url in urls if url and url.strip()]
+    if not urls:
+        raise ValueError("No LLM endpoint URL configured.")
+    return urls
+
+
+class Endpoint:
+    """One backend of the pool: its client, circuit state and statistics."""
+    def __init__(self, url: str, client: OpenAI):
+        self.url = url
+        self.client = client
+        self.outstanding = 0
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+        self.requests = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.ewma_latency: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_probe_ok: Optional[bool] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 4) if self.requests else 0.0,
+            "mean_latency_ms": round(1000 * self.total_latency / max(1, self.requests - self.errors), 1),
+            "ewma_latency_ms": round(1000 * self.ewma_latency, 1) if self.ewma_latency is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_probe_ok": self.last_probe_ok,
+        }
+
+
+class EndpointPool:
+    """
+    Least-outstanding-requests routing with circuit breaking, health probes and
+    retries. See the module docstring.
+    """
+    def __init__(self, urls: Sequence[str], api_key: str, settings: Optional[Dict[str, Any]] = None):
+        settings = settings or {}
+        timeout = settings.get('request_timeout_seconds', 600)
+        # The pool does its own retries, on another endpoint where possible.
+        self.endpoints = [Endpoint(url, OpenAI(api_key=api_key, base_url=url, max_retries=0, timeout=timeout)) for url in urls]
+        self.max_attempts = max(1, int(settings.get('max_attempts', 3)))
+        self.backoff_base = settings.get('backoff_base_seconds', 0.5)
+        self.backoff_max = settings.get('backoff_max_seconds', 8.0)
+        self.failure_threshold = max(1, int(settings.get('failure_threshold', 3)))
+        self.circuit_open_seconds = settings.get('circuit_open_seconds', 30)
+        self.health_check_interval = settings.get('health_check_interval_seconds', 15)
+        self.health_check_timeout = settings.get('health_check_timeout_seconds', 5)
+        self._lock = threading.Lock()
+        self._prober: Optional[threading.Thread] = None
+
+    # --- Endpoint selection ---
+    def _available(self, endpoint: Endpoint, now: float) -> bool:
+        if endpoint.state == CLOSED:
+            return True
+        if endpoint.state == OPEN and now - endpoint.opened_at >= self.circuit_open_seconds:
+            # The cool-down is over: let one trial request through.
+            endpoint.state = HALF_OPEN
+        return endpoint.state == HALF_OPEN and not endpoint.trial_in_flight
+
+    def _select(self, excluded: Set[str]) -> Endpoint:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [e for e in self.endpoints if e.url not in excluded and self._available(e, now)]
+            if not candidates:
+                candidates = [e for e in self.endpoints if self._available(e, now)]
+            if not candidates:
+                # Every circuit is open. Refusing all traffic would not help anyone, so the
+                # endpoint that was ejected first gets the request.
+                endpoint = min(self.endpoints, key=lambda e: e.opened_at)
+                logger.warning(f"All {len(self.endpoints)} LLM endpoints are ejected; trying {endpoint.url} anyway.")
+            else:
+                fewest = min(e.outstanding for e in candidates)
+                endpoint = random.choice([e for e in candidates if e.outstanding == fewest])
+            if endpoint.state == HALF_OPEN:
+                # Only one trial at a time; other requests go elsewhere until its outcome is known.
+                endpoint.trial_in_flight = True
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+        return endpoint
+
+    @contextmanager
+    def _lease(self, excluded: Set[str]) -> Iterator[Endpoint]:
+        self._ensure_prober()
+        endpoint = self._select(excluded)
+        try:
+            yield endpoint
+        finally:
+            with self._lock:
+                endpoint.outstanding -= 1
+                endpoint.trial_in_flight = False
+
+    # --- Outcomes ---
+    def _record_success(self, endpoint: Endpoint, latency: float):
+        with self._lock:
+            endpoint.total_latency += latency
+            endpoint.ewma_latency = latency if endpoint.ewma_latency is None else 0.8 * endpoint.ewma_latency + 0.2 * latency
+            endpoint.consecutive_failures = 0
+            if endpoint.state != CLOSED:
+                logger.info(f"LLM endpoint {endpoint.url} recovered; circuit closed.")
+            endpoint.state = CLOSED
+
+    def _record_failure(self, endpoint: Endpoint, error: Exception, count_request: bool = True):
+        with self._lock:
+            if count_request:
+                endpoint.errors += 1
+            endpoint.last_error = f"{type(error).__name__}: {error}"[:300]
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures >= self.failure_threshold or endpoint.state != CLOSED:
+                if endpoint.state == CLOSED:
+                    logger.warning(
+                        f"Ejecting LLM endpoint {endpoint.url} for {self.circuit_open_seconds}s after "
+                        f"{endpoint.consecutive_failures} consecutive failures. Last error: {endpoint.last_error}"
+                    )
+                endpoint.state = OPEN
+                endpoint.opened_at = time.monotonic()
+
+    def _backoff(self, attempt: int):
+        """Full jitter: a uniform wait up to the exponential step, so retries do not arrive in waves."""
+        time.sleep(random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt))))
+
+    # --- Requests ---
+    def call(self, make_request: Callable[[OpenAI], Any], retry: bool = True) -> Any:
+        """
+        Sends a request through the pool.
+
+        Args:
+            make_request (Callable[[OpenAI], Any]): Performs the request with the given endpoint's client.
+            retry (bool): Retry retryable errors on another endpoint. Only for idempotent requests.
+        """
+        excluded: Set[str] = set()
+        attempts = self.max_attempts if retry else 1
+        for attempt in range(attempts):
+            with self._lease(excluded) as endpoint:
+                started = time.perf_counter()
+                try:
+                    response = make_request(endpoint.client)
+                except RETRYABLE_ERRORS as e:
+                    self._record_failure(endpoint, e)
+                    if attempt + 1 >= attempts:
+                        raise
+                    logger.warning(f"LLM request to {endpoint.url} failed ({type(e).__name__}); retrying on another endpoint.")
+                    excluded.add(endpoint.url)
+                else:
+                    self._record_success(endpoint, time.perf_counter() - started)
+                    return response
+            self._backoff(attempt)
+
+    def stream(self, make_stream: Callable[[OpenAI], Iterable[Any]], retry: bool = True) -> Generator[Any, None, None]:
+        """
+        Streaming counterpart of `call`. Failures before the first chunk are retried on
+        another endpoint; once output has been yielded, errors are raised to the caller.
+        """
+        excluded: Set[str] = set()
+        attempts = self.max_attempts if retry else 1
+        for attempt in range(attempts):
+            with self._lease(excluded) as endpoint:
+                started = time.perf_counter()
+                yielded = False
+                try:
+                    stream = make_stream(endpoint.client)
+                    try:
+                        for chunk in stream:
+                            yielded = True
+                            yield chunk
+                    finally:
+                        # Releases the HTTP connection when the caller stops reading early.
+                        close = getattr(stream, "close", None)
+                        if close is not None:
+                            close()
+                except GeneratorExit:
+                    self._record_success(endpoint, time.perf_counter() - started)
+                    raise
+                except RETRYABLE_ERRORS as e:
+                    self._record_failure(endpoint, e)
+                    if yielded or attempt + 1 >= attempts:
+                        raise
+                    logger.warning(f"LLM stream from {endpoint.url} failed before its first chunk ({type(e).__name__}); retrying on another endpoint.")
+                    excluded.add(endpoint.url)
+                else:
+                    self._record_success(endpoint, time.perf_counter() - started)
+                    return
+            self._backoff(attempt)
+
+    # --- Health probes ---
+    def _ensure_prober(self):
+        if self.health_check_interval <= 0 or (self._prober is not None and self._prober.is_alive()):
+            return
+        with self._lock:
+            if self._prober is None or not self._prober.is_alive():
+                self._prober = threading.Thread(target=self._probe_loop, name="llm-endpoint-probe", daemon=True)
+                self._prober.start()
+
+    def _probe_loop(self):
+        while True:
+            time.sleep(self.health_check_interval)
+            for endpoint in self.endpoints:
+                self.probe(endpoint)
+
+    def probe(self, endpoint: Endpoint) -> bool:
+        """Lists the endpoint's models. Failures count toward its circuit; a success closes it."""
+        try:
+            endpoint.client.with_options(timeout=self.health_check_timeout).models.list()
+        except Exception as e:
+            endpoint.last_probe_ok = False
+            self._record_failure(endpoint, e, count_request=False)
+            return False
+        endpoint.last_probe_ok = True
+        with self._lock:
+            endpoint.consecutive_failures = 0
+            if endpoint.state != CLOSED:
+                logger.info(f"LLM endpoint {endpoint.url} passed its health probe; circuit closed.")
+                endpoint.state = CLOSED
+        return True
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-endpoint latency, error and circuit statistics."""
+        with self._lock:
+            return [endpoint.snapshot() for endpoint in self.endpoints]
@@ -0,0 +1,146 @@
+# document_ai_verification/ai/llm/json_repair.py
+
+import re
+import json
+import logging
+from typing import Any, Dict, List, Literal, Optional, Tuple, Type, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+_CODE_FENCE_RE = re.compile(r"^\s*```(?:json|JSON)?\s*\n?(.*?)\n?\s*```\s*$", re.DOTALL)
+
+
+class TruncatedOutputError(ValueError):
+    """Raised for output that stops before its JSON object closes. Dropping what is missing
+    (e.g. trailing 'required_inputs' entries) would silently skip work, so it is not repaired."""
+    pass
+
+
+def strip_code_fences(text: str) -> str:
+    """Removes a surrounding ```json ... ``` block, if present."""
+    match = _CODE_FENCE_RE.match(text)
+    return match.group(1) if match else text
+
+
+def _scan(text: str) -> Tuple[Optional[int], List[int]]:
+    """
+    Tokenizes a JSON document that starts with '{'.
+
+    Returns:
+        (end, trailing_commas): the index of the brace closing the top-level object
+        (None if it never closes), and the positions of commas, outside strings, that
+        are directly followed by '}' or ']'.
+    """
+    depth, in_string, escaped = 0, False, False
+    trailing_commas: List[int] = []
+    last_comma: Optional[int] = None
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char.isspace():
+            continue
+        if char in "}]" and last_comma is not None:
+            trailing_commas.append(last_comma)
+        last_comma = i if char == "," else None
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                return i, trailing_commas
+    return None, trailing_commas
+
+
+def extract_json_object(text: str) -> str:
+    """
+    Returns the substring starting at the first '{' and ending at its matching '}'.
+
+    Raises:
+        ValueError: If there is no JSON object.
+        TruncatedOutputError: If the object never closes (truncated output).
+    """
+    start = text.find("{")
+    if start == -1:
+        raise ValueError("No JSON object found in the model output.")
+    end, _ = _scan(text[start:])
+    if end is None:
+        raise TruncatedOutputError("The output was cut off before its JSON object closed.")
+    return text[start:start + end + 1]
+
+
+def strip_trailing_commas(text: str) -> str:
+    """Drops commas directly before a closing '}' or ']'. Commas inside string values are kept."""
+    _, trailing_commas = _scan(text)
+    for position in reversed(trailing_commas):
+        text = text[:position] + text[position + 1:]
+    return text
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if get_origin(annotation) is Union:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _normalize_value(value: Any, annotation: Any) -> Any:
+    annotation = _unwrap_optional(annotation)
+    origin = get_origin(annotation)
+    if origin is Literal and isinstance(value, str):
+        allowed = {str(option).casefold(): option for option in get_args(annotation)}
+        return allowed.get(value.strip().casefold(), value)
+    if origin in (list, List) and isinstance(value, list):
+        (item_annotation,) = get_args(annotation) or (Any,)
+        return [_normalize_value(item, item_annotation) for item in value]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel) and isinstance(value, dict):
+        return normalize_enum_values(value, annotation)
+    return value
+
+
+def normalize_enum_values(data: Dict[str, Any], response_model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Rewrites Literal-typed fields to their canonical spelling when the model
+    used the wrong casing or stray whitespace (e.g. 'verified' -> 'Verified').
+    Nested models and lists of models are handled recursively.
+    """
+    normalized = dict(data)
+    for name, field_info in response_model.model_fields.items():
+        if name in normalized:
+            normalized[name] = _normalize_value(normalized[name], field_info.annotation)
+    return normalized
+
+
+def repair_json_output(raw_output: str, response_model: Type[BaseModel]) -> Dict[str, Any]:
+    """
+    Applies local fixes for the common defects of LLM JSON output:
+    code fences, leading/trailing prose, trailing commas and enum casing.
+
+    Truncated output is not repaired: it raises TruncatedOutputError, so the caller
+    retries instead of accepting a response with its end missing.
+
+    Returns:
+        Dict[str, Any]: The repaired data, ready for `response_model.model_validate`.
+
+    Raises:
+        ValueError: If no JSON object can be recovered.
+        TruncatedOutputError: If the JSON object never closes.
+    """
+    text = strip_trailing_commas(extract_json_object(strip_code_fences(raw_output.strip())))
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Could not repair the JSON output: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}.")
+    return normalize_enum_values(data, response_model)
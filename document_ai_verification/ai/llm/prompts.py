@@ -259,4 +259,73 @@ def get_multimodal_audit_prompt(
     ---
     **Final Reminder:** Output ONLY the JSON object. No additional content.
     """
-    return prompt
\ No newline at end of file
+    return prompt
+
+def get_region_audit_prompt(
+    content_difference: str,
+    required_inputs_analysis: dict,
+    page_number: int,
+    layout_map: str
+) -> str:
+    """
+    The multimodal audit prompt for a cropped audit: instead of two full page images, the
+    model receives NSV/SV crop pairs of the changed areas and input fields, plus a layout
+    map placing every crop on the page.
+    """
+    audit_prompt = get_multimodal_audit_prompt(
+        content_difference=content_difference,
+        required_inputs_analysis=required_inputs_analysis,
+        page_number=page_number
+    )
+    crop_instructions = f"""
+    **IMPORTANT - Image Evidence Format for this Audit:**
+    - You do NOT receive the full NSV and SV page images. You receive pairs of crops at full resolution, one pair per region: each region's NSV crop followed by its SV crop, captioned with the region id (R1, R2, ...).
+    - Wherever the instructions above refer to the NSV Image or SV Image, use the NSV and SV crops of the relevant region instead.
+    - The regions cover every visual difference between the two pages and the input field of every required input. Anything outside the regions is pixel-identical in both versions, so it is unchanged static content.
+    - Use the layout map below to see where each region sits on the page and which input marker or difference it shows.
+
+    **LAYOUT MAP (Page {page_number}):**
+    {layout_map}
+    """
+    marker = "    ---\n    **INITIAL ANALYSIS (from NSV):**"
+    return audit_prompt.replace(marker, crop_instructions + "\n" + marker, 1)
+
+def get_text_requirement_analysis_prompt(page_text_content: str) -> str:
+    """
+    The requirement analysis prompt for the text-only model of the cascade: the same
+    instructions without the page image, asking the model to rate its confidence.
+    """
+    analysis_prompt = get_ns_document_analysis_prompt_holistic(page_text_content)
+    text_only_instructions = """    **IMPORTANT - Text-Only Analysis:**
+    * You do NOT receive the page image. Wherever the instructions above refer to the image, rely on the text alone.
+    * Treat a field as blank when the text shows only a label, underscores, dots, dashes or an empty checkbox after it, and as pre-filled when the text shows a value.
+    * Handwriting, signatures, stamps and check marks are not part of the text. If the text suggests that the page may already carry any of them (e.g. a party's name and date printed under a signature line, '/s/', 'Signed by', a '☒' or '[X]'), or the text looks incomplete or garbled, set 'confidence' below 0.5.
+    * Set 'confidence' to how certain you are that the required and pre-filled inputs you list are complete and correct.
+
+"""
+    start = analysis_prompt.index("    **Image Analysis:**")
+    end = analysis_prompt.index("    **Final Reminder:**")
+    return analysis_prompt[:start] + text_only_instructions + analysis_prompt[end:]
+
+def get_text_audit_prompt(
+    content_difference: str,
+    required_inputs_analysis: dict,
+    page_number: int
+) -> str:
+    """
+    The audit prompt for the text-only model of the cascade: the model judges the
+    required inputs from the Content Difference JSON alone and rates its confidence.
+    """
+    audit_prompt = get_multimodal_audit_prompt(
+        content_difference=content_difference,
+        required_inputs_analysis=required_inputs_analysis,
+        page_number=page_number
+    )
+    text_only_instructions = """
+    **IMPORTANT - Text-Only Audit:**
+    - You do NOT receive the NSV and SV images. Wherever the instructions above ask you to confirm something in an image, rely on the Content Difference JSON alone; do not mention images in audit_notes.
+    - A required input is fulfilled when the difference shows a value added at its marker (quote it in audit_notes), and missing when it does not.
+    - Set 'confidence' to how certain you are of the whole result. Set it below 0.5 when a decision depends on visual evidence (handwriting, signatures, check marks, stamps), when the difference is ambiguous about which marker a value belongs to, or when it looks garbled.
+    """
+    marker = "    ---\n    **INITIAL ANALYSIS (from NSV):**"
+    return audit_prompt.replace(marker, text_only_instructions + "\n" + marker, 1)
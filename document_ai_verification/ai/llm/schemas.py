@@ -68,4 +68,24 @@ class PageAuditResult(BaseModel):
     page_number: int = Field(..., description="The page number being audited (1-indexed).")
     page_status: PageStatus = Field(..., description="The overall status of the page based on the audit.")
     required_inputs: List[AuditedInput] = Field(default_factory=list)
-    content_differences: List[AuditedContentDifference] = Field(default_factory=list)
\ No newline at end of file
+    content_differences: List[AuditedContentDifference] = Field(default_factory=list)
+
+
+# ===================================================================
+# SECTION 3: Schemas for the Text-Only Cascade Pass
+# ===================================================================
+# The small text model answers the same questions as the vision model, and says how
+# sure it is; below the configured confidence the page goes to the vision model.
+
+CONFIDENCE_DESCRIPTION = (
+    "How certain you are (0.0-1.0) that this answer is complete and correct from the text alone. "
+    "Use a low value whenever the answer depends on something only the page image would show."
+)
+
+class TextPageHolisticAnalysis(PageHolisticAnalysis):
+    """`PageHolisticAnalysis` from the page text only, with the model's confidence."""
+    confidence: float = Field(..., description=CONFIDENCE_DESCRIPTION)
+
+class TextPageAuditResult(PageAuditResult):
+    """`PageAuditResult` from the text difference only, with the model's confidence."""
+    confidence: float = Field(..., description=CONFIDENCE_DESCRIPTION)
\ No newline at end of file
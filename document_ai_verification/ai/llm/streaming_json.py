@@ -0,0 +1,95 @@
+# document_ai_verification/ai/llm/streaming_json.py
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONObjectParser:
+    """
+    Consumes a streamed JSON object chunk by chunk and reports progress early.
+
+    - Every object element of a top-level array (e.g. each entry of 'required_inputs')
+      is returned from `feed` as soon as its closing brace arrives.
+    - `done` becomes True the moment the top-level object closes, so the caller can stop
+      generation instead of waiting for the model to emit trailing tokens.
+
+    Text before the first '{' (code fences, prose) is ignored.
+    """
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._length = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._started = False
+        self._string_start: Optional[int] = None
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._element_start: Optional[int] = None
+        self.done = False
+
+    @property
+    def text(self) -> str:
+        """The JSON text received so far, from the opening brace of the top-level object."""
+        return "".join(self._buffer)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Adds a chunk of model output.
+
+        Returns:
+            List[Tuple[str, Dict[str, Any]]]: (top-level key, parsed element) for each
+            array element completed by this chunk.
+        """
+        completed: List[Tuple[str, Dict[str, Any]]] = []
+        if self.done:
+            return completed
+
+        for char in chunk:
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+
+            position = self._length
+            self._buffer.append(char)
+            self._length += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        # A string directly inside the top-level object is a key or a scalar value.
+                        self._last_string = self.text[self._string_start + 1:position]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char == ":" and len(self._stack) == 1:
+                self._current_key = self._last_string
+            elif char in "{[":
+                if char == "{" and self._stack == ["}", "]"]:
+                    self._element_start = position
+                self._stack.append("}" if char == "{" else "]")
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                if char == "}" and self._stack == ["}", "]"] and self._element_start is not None:
+                    element_text = self.text[self._element_start:position + 1]
+                    self._element_start = None
+                    try:
+                        completed.append((self._current_key, json.loads(element_text)))
+                    except json.JSONDecodeError:
+                        logger.debug(f"Skipping unparsable streamed element under '{self._current_key}'.")
+                if not self._stack:
+                    self.done = True
+                    break
+        return completed
@@ -0,0 +1,200 @@
+# document_ai_verification/ai/llm/usage.py
+
+"""
+Token accounting of LLM calls, per request and per worker process.
+
+`LLMService` reports the usage of every completion here. Calls are attributed to
+the ledger of the current request and to the stage and page being processed
+through context variables, so nothing has to be threaded through the call chain:
+
+    with track_usage(ledger), usage_scope("multimodal_audit", page=3):
+        llm_client.invoke_image_compare_structured(...)
+
+Context variables follow `asyncio.to_thread`, so calls made from worker threads
+are attributed too. Every call is also added to the process-wide `PROCESS_USAGE`
+(without the per-page breakdown), which /metrics reports.
+
+Backends report prompt and completion tokens in `response.usage`; image tokens
+only where the backend breaks them out (`prompt_tokens_details.image_tokens`),
+otherwise they are estimated from the pixels sent. A stream that is stopped before
+its usage chunk (see `LLMService._stream_structured_messages`) is counted from its
+chunks and the prompt size, and marked as estimated.
+"""
+
+import math
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Pixels per image token when the backend does not say (e.g. 28x28 for Qwen2-VL).
+DEFAULT_IMAGE_TOKEN_PIXELS = 28 * 28
+# Rough size of a text token, for prompts whose usage was not reported.
+CHARS_PER_TOKEN = 4
+
+_COUNTERS = ("calls", "prompt_tokens", "completion_tokens", "image_tokens", "images", "estimated_calls")
+
+
+class LLMCall(NamedTuple):
+    """The usage of one completion."""
+    model: str
+    stage: Optional[str]
+    page: Optional[int]
+    prompt_tokens: int
+    completion_tokens: int
+    image_tokens: int
+    images: int
+    estimated: bool
+
+
+class UsageLedger:
+    """Token counters grouped by model, stage and (optionally) page. Thread-safe."""
+    def __init__(self, track_pages: bool = True):
+        self.track_pages = track_pages
+        self._totals: Dict[Tuple[str, Optional[str], Optional[int]], Dict[str, int]] = defaultdict(lambda: dict.fromkeys(_COUNTERS, 0))
+        self._lock = threading.Lock()
+
+    def add(self, call: LLMCall):
+        key = (call.model, call.stage, call.page if self.track_pages else None)
+        with self._lock:
+            counters = self._totals[key]
+            counters["calls"] += 1
+            counters["prompt_tokens"] += call.prompt_tokens
+            counters["completion_tokens"] += call.completion_tokens
+            counters["image_tokens"] += call.image_tokens
+            counters["images"] += call.images
+            counters["estimated_calls"] += int(call.estimated)
+
+    def summary(self, prices: Optional[Dict[str, Dict[str, float]]] = None) -> Dict[str, Any]:
+        """
+        Totals, and the same counters per model, per stage and (if tracked) per page.
+
+        Args:
+            prices: Optional price per 1,000 tokens by model, as {'prompt_per_1k', 'completion_per_1k'}.
+                Groups then carry a 'cost' (models without a price count as 0).
+        """
+        with self._lock:
+            items = [(key, dict(counters)) for key, counters in self._totals.items()]
+
+        def new_group() -> Dict[str, Any]:
+            group: Dict[str, Any] = dict.fromkeys(_COUNTERS, 0)
+            if prices is not None:
+                group["cost"] = 0.0
+            return group
+
+        def add_to(group: Dict[str, Any], model: str, counters: Dict[str, int]):
+            for name in _COUNTERS:
+                group[name] += counters[name]
+            if prices is not None:
+                price = prices.get(model) or {}
+                group["cost"] += (
+                    counters["prompt_tokens"] * price.get("prompt_per_1k", 0.0)
+                    + counters["completion_tokens"] * price.get("completion_per_1k", 0.0)
+                ) / 1000.0
+
+        totals = new_group()
+        by_model: Dict[str, Dict[str, Any]] = defaultdict(new_group)
+        by_stage: Dict[str, Dict[str, Any]] = defaultdict(new_group)
+        by_page: Dict[int, Dict[str, Any]] = defaultdict(new_group)
+        for (model, stage, page), counters in items:
+            add_to(totals, model, counters)
+            add_to(by_model[model], model, counters)
+            add_to(by_stage[stage or "other"], model, counters)
+            if page is not None:
+                add_to(by_page[page], model, counters)
+
+        def finish(group: Dict[str, Any]) -> Dict[str, Any]:
+            group["total_tokens"] = group["prompt_tokens"] + group["completion_tokens"]
+            if "cost" in group:
+                group["cost"] = round(group["cost"], 6)
+            return group
+
+        summary = {
+            **finish(totals),
+            "by_model": {model: finish(group) for model, group in by_model.items()},
+            "by_stage": {stage: finish(group) for stage, group in by_stage.items()},
+        }
+        if self.track_pages:
+            summary["by_page"] = {str(page): finish(by_page[page]) for page in sorted(by_page)}
+        return summary
+
+
+PROCESS_USAGE = UsageLedger(track_pages=False)
+
+_current_ledger: ContextVar[Optional[UsageLedger]] = ContextVar("llm_usage_ledger", default=None)
+_current_scope: ContextVar[Tuple[Optional[str], Optional[int]]] = ContextVar("llm_usage_scope", default=(None, None))
+
+
+@contextmanager
+def _set(var: ContextVar, value: Any) -> Iterator[None]:
+    token = var.set(value)
+    try:
+        yield
+    finally:
+        try:
+            var.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. an abandoned async generator finalized by the loop).
+            pass
+
+
+def track_usage(ledger: UsageLedger):
+    """Attributes the LLM calls made in this context to `ledger` (e.g. one request's)."""
+    return _set(_current_ledger, ledger)
+
+
+def usage_scope(stage: str, page: Optional[int] = None):
+    """Attributes the LLM calls made in this context to a stage and page."""
+    return _set(_current_scope, (stage, page))
+
+
+def estimate_image_tokens(pixels: int, image_token_pixels: int = DEFAULT_IMAGE_TOKEN_PIXELS) -> int:
+    return math.ceil(pixels / float(max(1, image_token_pixels)))
+
+
+def record_call(
+    model: str,
+    usage: Any,
+    image_pixels: Tuple[int, ...] = (),
+    prompt_chars: int = 0,
+    completion_chars: int = 0,
+    streamed_chunks: int = 0,
+    image_token_pixels: int = DEFAULT_IMAGE_TOKEN_PIXELS
+) -> LLMCall:
+    """
+    Records one completion in the current request's ledger (if any) and the process totals.
+
+    Args:
+        model (str): The model that served the call.
+        usage: The response's `usage` (an OpenAI `CompletionUsage`), or None if not reported.
+        image_pixels: Pixel count of every image sent.
+        prompt_chars, completion_chars (int): Text lengths, for estimates when `usage` is None.
+        streamed_chunks (int): Content chunks of a stream (about one token each), likewise.
+    """
+    estimated_image_tokens = sum(estimate_image_tokens(pixels, image_token_pixels) for pixels in image_pixels)
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        reported_image_tokens = getattr(details, "image_tokens", None) if details is not None else None
+        if reported_image_tokens is None and details is not None and getattr(details, "model_extra", None):
+            reported_image_tokens = details.model_extra.get("image_tokens")
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+        image_tokens = reported_image_tokens if reported_image_tokens is not None else estimated_image_tokens
+        estimated = False
+    else:
+        prompt_tokens = prompt_chars // CHARS_PER_TOKEN + estimated_image_tokens
+        completion_tokens = streamed_chunks or completion_chars // CHARS_PER_TOKEN
+        image_tokens = estimated_image_tokens
+        estimated = True
+
+    stage, page = _current_scope.get()
+    call = LLMCall(model, stage, page, prompt_tokens, completion_tokens, image_tokens, len(image_pixels), estimated)
+    ledger = _current_ledger.get()
+    if ledger is not None:
+        ledger.add(call)
+    PROCESS_USAGE.add(call)
+    return call
@@ -1,14 +1,16 @@
 # document_ai_verification/ai/ocr/client.py
 
 import logging
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import os
+from typing import Any, Callable, List, Optional, Sequence, Tuple
 
-import requests
 from pydantic import ValidationError
-from dotenv import load_dotenv
 
-from .schemas import OCRResponse
+from .schemas import OCRDetail, OCRResponse
+from ..cassette import CassetteStore
 
 # Set up a logger for this module. It will be configured in the main block for standalone testing.
 logger = logging.getLogger(__name__)
@@ -19,7 +21,8 @@ class OcrAPIError(Exception):
 
 def extract_text_from_image(
     image_path: Path,
-    api_url: str
+    api_url: str,
+    cassette: Optional[CassetteStore] = None
 ) -> OCRResponse:
     """
     Calls the English OCR API to extract text from an image.
@@ -27,6 +30,8 @@ def extract_text_from_image(
     Args:
         image_path (Path): The local path to the image file to process.
         api_url (str): The full URL of the OCR endpoint.
+        cassette (Optional[CassetteStore]): Record/replay store. Requests are
+            fingerprinted by the image content, so replays work on any host.
 
     Returns:
         OCRResponse: A Pydantic object containing the parsed API response.
@@ -34,29 +39,144 @@ def extract_text_from_image(
     Raises:
         OcrAPIError: If the API call fails, the response is invalid,
                      or a non-200 status code is returned.
+        CassetteMissError: In replay mode, if the image was never recorded.
     """
     if not image_path.is_file():
         msg = f"Image file not found at path: {image_path}"
         logger.error(msg)
         raise OcrAPIError(msg)
 
-    logger.info(f"Sending request to OCR API at {api_url} for image {image_path.name}")
+    if cassette is None or not cassette.enabled:
+        return _post_image_for_ocr(image_path, api_url)
 
+    image_digest = hashlib.sha256(image_path.read_bytes()).hexdigest()
+    return cassette.call(
+        namespace="ocr",
+        request_payload={"image_sha256": image_digest},
+        live_call=lambda: _post_image_for_ocr(image_path, api_url),
+        serialize=lambda response: response.model_dump(mode="json"),
+        deserialize=OCRResponse.model_validate,
+    )
+
+
+def extract_text_from_regions(
+    image: Any,
+    regions: Sequence[Tuple[int, int, int, int]],
+    api_url: str,
+    cassette: Optional[CassetteStore] = None,
+    max_workers: int = 4,
+    crop_loader: Optional[Callable[[Tuple[int, int, int, int]], Any]] = None
+) -> OCRResponse:
+    """
+    OCRs only the given regions of a page image, concurrently, and merges the results
+    as if the page had been OCRed whole.
+
+    Every region is cropped and sent as its own image. The returned polygons are
+    shifted (and scaled, for higher-resolution crops) back into page coordinates,
+    line numbers are renumbered so they stay unique across regions, and `plain_text`
+    holds the regions' text in the order given.
+
+    Args:
+        image (np.ndarray): The page image (BGR), as read by OpenCV.
+        regions (Sequence[Tuple[int, int, int, int]]): Boxes (x1, y1, x2, y2) in page pixels.
+        api_url (str): The full URL of the OCR endpoint.
+        cassette (Optional[CassetteStore]): Record/replay store; each crop is fingerprinted separately.
+        max_workers (int): OCR requests in flight at once.
+        crop_loader (Optional[Callable]): Returns the image of a region, e.g. a high-DPI tile;
+            by default regions are cut from `image`.
+
+    Returns:
+        OCRResponse: The merged response. With no regions, an empty successful response.
+
+    Raises:
+        OcrAPIError: If the OCR of any region fails.
+    """
+    import cv2  # Deferred: only processes that actually call OCR pay for the import.
+
+    height, width = image.shape[:2]
+    crops = []
+    for x1, y1, x2, y2 in regions:
+        x1, y1, x2, y2 = max(0, int(x1)), max(0, int(y1)), min(width, int(x2)), min(height, int(y2))
+        if x2 <= x1 or y2 <= y1:
+            continue
+        crop = crop_loader((x1, y1, x2, y2)) if crop_loader else image[y1:y2, x1:x2]
+        ok, buffer = cv2.imencode(".png", crop)
+        if not ok:
+            raise OcrAPIError(f"Could not encode OCR region {(x1, y1, x2, y2)} as PNG.")
+        crops.append(((x1, y1, crop.shape[1] / float(x2 - x1)), buffer.tobytes()))
+    if not crops:
+        return OCRResponse(status="success", plain_text="", detailed_data=[])
+
+    def ocr_crop(crop: Tuple[Tuple[int, int, float], bytes]) -> OCRResponse:
+        (x1, y1, _), png_bytes = crop
+        filename = f"region_{x1}_{y1}.png"
+        if cassette is None or not cassette.enabled:
+            return _post_image_bytes_for_ocr(png_bytes, filename, api_url)
+        return cassette.call(
+            namespace="ocr",
+            request_payload={"image_sha256": hashlib.sha256(png_bytes).hexdigest()},
+            live_call=lambda: _post_image_bytes_for_ocr(png_bytes, filename, api_url),
+            serialize=lambda response: response.model_dump(mode="json"),
+            deserialize=OCRResponse.model_validate,
+        )
+
+    logger.info(f"OCR of {len(crops)} region(s) with up to {max_workers} concurrent request(s).")
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(crops)))) as executor:
+        responses = list(executor.map(ocr_crop, crops))
+    return _merge_region_responses([origin for origin, _ in crops], responses)
+
+
+def _merge_region_responses(origins: List[Tuple[int, int, float]], responses: List[OCRResponse]) -> OCRResponse:
+    """
+    Combines per-region OCR responses into one, in page coordinates. Origins are
+    (x1, y1, scale), where scale is crop pixels per page pixel. See `extract_text_from_regions`.
+    """
+    details: List[OCRDetail] = []
+    texts: List[str] = []
+    line_offset = 0
+    for (x1, y1, scale), response in zip(origins, responses):
+        for detail in response.detailed_data:
+            details.append(OCRDetail(
+                poly=[int(round(value / scale)) + (x1 if i % 2 == 0 else y1) for i, value in enumerate(detail.poly)],
+                text=detail.text,
+                line_num=detail.line_num + line_offset,
+                word_num=detail.word_num,
+            ))
+        if response.detailed_data:
+            line_offset += max(d.line_num for d in response.detailed_data) + 1
+        if response.plain_text.strip():
+            texts.append(response.plain_text.strip())
+    failed = next((r.status for r in responses if r.status != "success"), None)
+    return OCRResponse(status=failed or "success", plain_text="\n".join(texts), detailed_data=details)
+
+
+def _post_image_for_ocr(image_path: Path, api_url: str) -> OCRResponse:
+    """Performs the live OCR HTTP call for an image file. See `extract_text_from_image`."""
+    with open(image_path, "rb") as image_file:
+        return _post_image_bytes_for_ocr(image_file.read(), image_path.name, api_url)
+
+
+def _post_image_bytes_for_ocr(image_bytes: bytes, filename: str, api_url: str) -> OCRResponse:
+    """Performs the live OCR HTTP call for an encoded PNG image."""
+    import requests  # Deferred: only processes that actually call OCR pay for the import.
+
+    logger.info(f"Sending request to OCR API at {api_url} for image {filename}")
+
+    response = None
     try:
-        with open(image_path, "rb") as image_file:
-            # The 'files' dictionary specifies the form field name ('file') and the file object
-            files = {"file": (image_path.name, image_file, "image/png")}
-            
-            # Set a reasonable timeout as OCR can be a long-running task
-            response = requests.post(api_url, files=files, timeout=90)
-            
-            # Raise an HTTPError for bad responses (4xx or 5xx)
-            response.raise_for_status()
-            
-            response_json = response.json()
-            
-            # Validate and parse the response using the Pydantic model
-            return OCRResponse.model_validate(response_json)
+        # The 'files' dictionary specifies the form field name ('file') and the file content
+        files = {"file": (filename, image_bytes, "image/png")}
+
+        # Set a reasonable timeout as OCR can be a long-running task
+        response = requests.post(api_url, files=files, timeout=90)
+
+        # Raise an HTTPError for bad responses (4xx or 5xx)
+        response.raise_for_status()
+
+        response_json = response.json()
+
+        # Validate and parse the response using the Pydantic model
+        return OCRResponse.model_validate(response_json)
 
     except requests.exceptions.Timeout:
         msg = f"OCR API request timed out after 90 seconds."
@@ -67,7 +187,8 @@ def extract_text_from_image(
         logger.error(msg)
         raise OcrAPIError(msg) from e
     except (ValidationError, KeyError, TypeError) as e:
-        msg = f"Failed to validate or parse OCR API response. Raw response might be: {response.text[:200]}... Error: {e}"
+        raw = response.text[:200] if response is not None else ""
+        msg = f"Failed to validate or parse OCR API response. Raw response might be: {raw}... Error: {e}"
         logger.error(msg)
         raise OcrAPIError(msg) from e
     except Exception as e:
@@ -79,6 +200,8 @@ def extract_text_from_image(
 # Standalone Test Block
 # ===================================================================
 if __name__ == "__main__":
+    from dotenv import load_dotenv
+
     # Configure basic logging to see output in the console
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -0,0 +1,53 @@
+# document_ai_verification/ai/ocr/text_layer.py
+
+"""
+The PDF's own text layer, in the shape of an OCR result.
+
+Digital PDFs already carry every word and its position; reading them with pdfminer
+gives the same `OCRResponse` as the OCR service (word polygons in pixels of a page
+rendered at a given DPI, line and word numbers in reading order) without rendering
+a page or calling a service, and one pass covers the whole document. Scanned pages
+have no text layer and come back with empty `detailed_data`; those still need OCR.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict
+
+from .schemas import OCRDetail, OCRResponse
+from ...utils.layout_utils import iter_text_layer_pages
+
+logger = logging.getLogger(__name__)
+
+
+def extract_text_layer(pdf_path: Path, dpi: int) -> Dict[int, OCRResponse]:
+    """
+    Reads the text layer of every page of a PDF.
+
+    Args:
+        pdf_path (Path): The PDF document.
+        dpi (int): The DPI of the page renders the polygons should match.
+
+    Returns:
+        Dict[int, OCRResponse]: One response per 1-indexed page number. `plain_text` has
+            one line per text line, in reading order.
+    """
+    pages: Dict[int, OCRResponse] = {}
+    for page_num, words in iter_text_layer_pages(pdf_path, dpi):
+        details, lines = [], {}
+        for word in words:
+            x1, y1, x2, y2 = word.bbox
+            details.append(OCRDetail(
+                poly=[x1, y1, x2, y1, x2, y2, x1, y2],
+                text=word.text,
+                line_num=word.line_num,
+                word_num=word.word_num,
+            ))
+            lines.setdefault(word.line_num, []).append(word.text)
+        pages[page_num] = OCRResponse(
+            status="success",
+            plain_text="\n".join(" ".join(line) for line in lines.values()),
+            detailed_data=details,
+        )
+    logger.info(f"Read the text layer of {len(pages)} page(s) of {Path(pdf_path).name}.")
+    return pages
@@ -0,0 +1,164 @@
+# document_ai_verification/api/artifacts.py
+
+"""
+HTTP delivery of the /temp artifacts (page images, diff visuals, debug outputs).
+
+Artifact names are not content-addressed (diff visuals are rendered on demand and
+may be re-rendered under the same name), so clients revalidate every artifact
+instead of caching it blindly, and revalidation is made cheap:
+  - ETags are content hashes, computed once per file version and remembered.
+  - `If-None-Match` is answered with 304 Not Modified.
+  - Everything is served with `Cache-Control: private, no-cache`.
+  - Byte ranges are handled by Starlette's FileResponse.
+  - Text files (JSON, Markdown) are gzipped once into a `.gz` sibling and that file is
+    served to clients that accept gzip.
+  - Recently served images are kept in a small in-memory LRU, so the polling of a
+    report page does not touch the disk.
+"""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+logger = logging.getLogger(__name__)
+
+IMAGE_SUFFIXES = {".png", ".webp", ".jpg", ".jpeg"}
+COMPRESSIBLE_SUFFIXES = {".json", ".md", ".txt", ".html", ".svg"}
+mimetypes.add_type("image/webp", ".webp")
+
+
+class HotArtifactCache:
+    """
+    A thread-safe LRU of small artifacts held in memory, bounded by total bytes.
+    Entries are keyed by path and invalidated when the file's size or mtime changes.
+    """
+    def __init__(self, max_bytes: int, max_item_bytes: int):
+        self.max_bytes = max_bytes
+        self.max_item_bytes = max_item_bytes
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, path: Path, stat_result: os.stat_result) -> Optional[bytes]:
+        key, version = str(path), (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, path: Path, stat_result: os.stat_result, body: bytes):
+        if len(body) > self.max_item_bytes or len(body) > self.max_bytes:
+            return
+        key = str(path)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._entries[key] = ((stat_result.st_mtime_ns, stat_result.st_size), body)
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+
+_hot_cache: Optional[HotArtifactCache] = None
+_hot_cache_lock = threading.Lock()
+
+
+def get_hot_cache(settings: Dict) -> HotArtifactCache:
+    """The process-wide hot cache, created on first use from 'application.temp_http'."""
+    global _hot_cache
+    with _hot_cache_lock:
+        if _hot_cache is None:
+            _hot_cache = HotArtifactCache(
+                max_bytes=int(settings.get('hot_cache_mb', 64) * 1024 * 1024),
+                max_item_bytes=int(settings.get('hot_cache_max_item_kb', 2048) * 1024),
+            )
+        return _hot_cache
+
+
+@lru_cache(maxsize=4096)
+def _content_etag(path: str, mtime_ns: int, size: int) -> str:
+    # mtime and size are part of the cache key, so a rewritten file gets a new hash.
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def content_etag(path: Path, stat_result: os.stat_result) -> str:
+    return _content_etag(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an `If-None-Match` header matches `etag` (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == bare for tag in if_none_match.split(","))
+
+
+def _gzip_sibling(path: Path) -> Path:
+    """The `.gz` twin of a text artifact, compressed on first use."""
+    gz_path = path.with_name(path.name + ".gz")
+    if not gz_path.is_file() or gz_path.stat().st_mtime_ns < path.stat().st_mtime_ns:
+        tmp_path = gz_path.with_name(f".{gz_path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(gzip.compress(path.read_bytes(), compresslevel=6, mtime=0))
+        os.replace(tmp_path, gz_path)
+    return gz_path
+
+
+def serve_artifact(request: Request, path: Path, settings: Dict) -> Response:
+    """
+    Builds the response for one /temp artifact, honouring `If-None-Match`, `Range` and
+    `Accept-Encoding`. See the module docstring.
+
+    Args:
+        request (Request): The incoming request (for its conditional and range headers).
+        path (Path): The resolved artifact path, known to exist.
+        settings (Dict): The 'application.temp_http' config section.
+    """
+    stat_result = path.stat()
+    suffix = path.suffix.lower()
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    # Revalidated on every use; an unchanged file costs a 304.
+    serve_path, headers = path, {"Cache-Control": "private, no-cache"}
+
+    accepts_gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    if suffix in COMPRESSIBLE_SUFFIXES and settings.get('precompress', True):
+        headers["Vary"] = "Accept-Encoding"
+        if accepts_gzip:
+            serve_path = _gzip_sibling(path)
+            headers["Content-Encoding"] = "gzip"
+    serve_stat = serve_path.stat() if serve_path != path else stat_result
+
+    # Each representation (plain or gzip) has its own content hash.
+    headers["ETag"] = content_etag(serve_path, serve_stat)
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    if suffix in IMAGE_SUFFIXES and "range" not in request.headers:
+        hot_cache = get_hot_cache(settings)
+        body = hot_cache.get(serve_path, serve_stat)
+        if body is None:
+            body = serve_path.read_bytes()
+            hot_cache.put(serve_path, serve_stat, body)
+        headers["Accept-Ranges"] = "bytes"
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    return FileResponse(serve_path, media_type=media_type, headers=headers, stat_result=serve_stat)
@@ -4,17 +4,23 @@ import logging
 import json
 import shutil # Import shutil for the background task
 from pathlib import Path
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 import asyncio
+import random
+import re
+from contextlib import ExitStack, asynccontextmanager
 
 # --- Import BackgroundTasks ---
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, BackgroundTasks, Request
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import ValidationError
 
-from ..core.verification_service import run_verification_workflow
+from .artifacts import serve_artifact
+from ..core.verification_service import run_verification_workflow, get_runtime, register_template
 from ..core.exceptions import DocumentVerificationError, PageCountMismatchError
+from ..core.schemas import BatchManifest, BatchStatus, TemplateRecord
+from ..utils.shared_state import SharedStateError
 from ..utils.config_loader import load_settings
 # --- Import the handler class itself ---
 from ..utils.file_utils import TemporaryFileHandler
@@ -23,15 +29,29 @@ from ..utils.file_utils import TemporaryFileHandler
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+def get_app_config() -> dict:
+    """The application config, read on first use (load_settings is cached per process)."""
+    return load_settings()['config']
+
+def get_temp_dir_base() -> Path:
+    return Path(get_app_config()['application']['temp_storage_path'])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs inside each worker after any fork, so clients and shared-state handles are
+    # created per process, and configuration errors surface at boot rather than on the first request.
+    get_runtime()
+    yield
+
+
 app = FastAPI(
     title="Document AI Verification API",
     description="An API to perform a detailed audit and verification of a signed document against its original version.",
-    version="2.4.0" # Version bump for background tasks
+    version="2.4.0", # Version bump for background tasks
+    lifespan=lifespan
 )
 
-CONFIG = load_settings()['config']
-TEMP_DIR_BASE = Path(CONFIG['application']['temp_storage_path'])
-
 
 # --- Background Task Function for Cleanup ---
 async def cleanup_temp_dir(path: Path, delay_seconds: int):
@@ -53,26 +73,44 @@ async def read_root():
     return {"status": "ok", "message": "Document AI Verification API is running."}
 
 
+@app.get("/metrics", tags=["Health Check"], summary="Per-worker operational statistics")
+async def read_metrics():
+    """
+    Statistics of the worker process that serves the request: for each LLM endpoint,
+    its circuit state, requests in flight, request and error counts, and latencies.
+    """
+    return get_runtime().metrics()
+
+
 # --- FIX: Full definition of the /temp endpoint ---
 @app.get("/temp/{request_id}/{file_path:path}", tags=["Utilities"])
-async def get_temp_file(request_id: str, file_path: str):
+async def get_temp_file(request_id: str, file_path: str, request: Request):
     """
     Serves a temporary file generated during the verification process.
     Includes a security check to prevent accessing files outside the temp directory.
+    Responses carry content-hash ETags and cache headers, and honour conditional and
+    range requests (see `api/artifacts.py`).
     """
     try:
-        base_path = TEMP_DIR_BASE.resolve()
+        base_path = get_temp_dir_base().resolve()
         full_path = (base_path / request_id / file_path).resolve()
 
-        if not str(full_path).startswith(str(base_path)):
+        if not full_path.is_relative_to(base_path):
             logger.warning(f"Forbidden access attempt: {full_path}")
             raise HTTPException(status_code=403, detail="Forbidden: Access denied.")
 
         if not full_path.is_file():
-            logger.error(f"Temp file not found: {full_path}")
-            raise HTTPException(status_code=404, detail="File not found.")
+            # Diff visuals are rendered on their first request.
+            from ..utils.image_utils import render_diff_visual
+            rendered = None
+            if full_path.parent.is_dir():
+                rendered = await asyncio.to_thread(render_diff_visual, full_path.parent, full_path.name)
+            if rendered is None:
+                logger.error(f"Temp file not found: {full_path}")
+                raise HTTPException(status_code=404, detail="File not found.")
 
-        return FileResponse(full_path)
+        app_config = get_app_config()['application']
+        return await asyncio.to_thread(serve_artifact, request, full_path, settings=app_config.get('temp_http') or {})
         
     except HTTPException as e:
         raise e
@@ -81,6 +119,19 @@ async def get_temp_file(request_id: str, file_path: str):
         raise HTTPException(status_code=500, detail="Internal server error.")
 
 
+def should_profile(request: Request) -> bool:
+    """
+    Whether a /verify/ request is profiled: it asks for it with an `X-Profile: 1`
+    header (where 'application.profiling.allow_header' permits), or it is drawn at
+    'application.profiling.sample_rate'.
+    """
+    settings = get_app_config()['application'].get('profiling') or {}
+    if settings.get('allow_header', False) and request.headers.get("x-profile", "").strip().lower() in ("1", "true", "yes"):
+        return True
+    sample_rate = settings.get('sample_rate', 0.0)
+    return bool(sample_rate) and random.random() < sample_rate
+
+
 async def stream_formatter(generator: AsyncGenerator[dict, None]) -> AsyncGenerator[str, None]:
     """
     Takes an async generator that yields dictionaries and formats them
@@ -93,28 +144,45 @@ async def stream_formatter(generator: AsyncGenerator[dict, None]) -> AsyncGenera
 
 @app.post("/verify/", tags=["Verification"])
 async def verify_documents_stream(
+    request: Request,
     background_tasks: BackgroundTasks,
-    nsv_file: UploadFile = File(...),
-    sv_file: UploadFile = File(...)
+    nsv_file: Optional[UploadFile] = File(None),
+    sv_file: UploadFile = File(...),
+    template_id: Optional[str] = Form(None),
+    force_reverify: bool = Form(False)
 ):
     """
     Processes documents, streams results, and schedules a background task for cleanup.
+    Send either `nsv_file`, or the `template_id` of a registered NSV template.
+    A pair verified before is answered from the result cache unless `force_reverify` is set.
+    A profiled request (see `should_profile`) returns the URL of its profile in the
+    `X-Profile-URL` header; the file is complete once the stream has ended.
     """
-    logger.info(f"Received stream verification request. NSV: '{nsv_file.filename}', SV: '{sv_file.filename}'")
+    if nsv_file is not None and template_id:
+        raise HTTPException(status_code=400, detail="Provide either nsv_file or template_id, not both.")
+    if nsv_file is None and not template_id:
+        raise HTTPException(status_code=400, detail="Provide nsv_file or template_id.")
+    if template_id and get_runtime().template_registry.get(template_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown template ID: {template_id}")
+    nsv_label = nsv_file.filename if nsv_file else f"template {template_id[:12]}"
+    logger.info(f"Received stream verification request. NSV: '{nsv_label}', SV: '{sv_file.filename}'")
     
-    handler = TemporaryFileHandler(base_path=str(TEMP_DIR_BASE))
+    handler = TemporaryFileHandler(base_path=str(get_temp_dir_base()))
     handler.setup()
 
+    nsv_file_bytes, nsv_filename = None, None
     try:
-        nsv_file_bytes = await nsv_file.read()
+        if nsv_file is not None:
+            nsv_file_bytes = await nsv_file.read()
+            nsv_filename = nsv_file.filename
         sv_file_bytes = await sv_file.read()
-        nsv_filename = nsv_file.filename
         sv_filename = sv_file.filename
     finally:
-        await nsv_file.close()
+        if nsv_file is not None:
+            await nsv_file.close()
         await sv_file.close()
 
-    cleanup_delay = CONFIG['application'].get('temp_storage_cleanup_delay_seconds', 600)
+    cleanup_delay = get_app_config()['application'].get('temp_storage_cleanup_delay_seconds', 600)
     background_tasks.add_task(cleanup_temp_dir, handler.temp_dir, delay_seconds=cleanup_delay)
 
     service_generator = run_verification_workflow(
@@ -123,13 +191,192 @@ async def verify_documents_stream(
         nsv_filename=nsv_filename,
         sv_file_bytes=sv_file_bytes,
         sv_filename=sv_filename,
+        template_id=template_id,
+        use_result_cache=not force_reverify,
     )
+
+    headers = {}
+    if should_profile(request):
+        from ..utils.profiling import PROFILE_DIRNAME, SPEEDSCOPE_FILENAME, profile_events
+
+        interval_ms = (get_app_config()['application'].get('profiling') or {}).get('interval_ms', 5)
+        service_generator = profile_events(
+            service_generator, handler.temp_dir / PROFILE_DIRNAME,
+            name=f"verify {handler.request_id} ({sv_filename})", interval_seconds=interval_ms / 1000.0,
+        )
+        headers["X-Profile-URL"] = f"/temp/{handler.request_id}/{PROFILE_DIRNAME}/{SPEEDSCOPE_FILENAME}"
+        logger.info(f"Profiling request {handler.request_id}.")
     
     return StreamingResponse(
         stream_formatter(service_generator), 
-        media_type="text/event-stream"
+        media_type="text/event-stream",
+        headers=headers
+    )
+
+@app.post("/templates/", tags=["Templates"], response_model=TemplateRecord)
+async def register_nsv_template(nsv_file: UploadFile = File(...)):
+    """
+    Registers an NSV PDF as a template. Its pages are rendered, extracted, fingerprinted
+    and analyzed (Stage 1) once; `/verify/` then accepts the returned `template_id`
+    instead of an NSV upload. Registering the same PDF again returns the existing template.
+    """
+    try:
+        nsv_file_bytes = await nsv_file.read()
+        nsv_filename = nsv_file.filename
+    finally:
+        await nsv_file.close()
+    logger.info(f"Received template registration for '{nsv_filename}'.")
+    try:
+        record, created = await asyncio.to_thread(register_template, nsv_file_bytes, nsv_filename)
+    except Exception as e:
+        logger.exception(f"Template registration failed for '{nsv_filename}'.")
+        raise HTTPException(status_code=500, detail="Template registration failed. Please check system logs.")
+    logger.info(f"Template {record.template_id[:12]} {'registered' if created else 'already registered'}.")
+    return record
+
+
+@app.get("/templates/{template_id}", tags=["Templates"], response_model=TemplateRecord)
+async def get_nsv_template(template_id: str):
+    """Returns a registered template, including its per-page Stage 1 analysis."""
+    record = get_runtime().template_registry.get(template_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Template not found.")
+    return record
+
+
+@app.delete("/templates/{template_id}", tags=["Templates"])
+async def delete_nsv_template(template_id: str):
+    """Removes a registered template."""
+    registry = get_runtime().template_registry
+    if not registry.is_valid_id(template_id) or not registry.delete(template_id):
+        raise HTTPException(status_code=404, detail="Template not found.")
+    return {"status": "deleted", "template_id": template_id}
+
+
+# Batches running in this worker; referenced so they are not garbage-collected mid-run.
+_BATCH_TASKS: set = set()
+_BATCH_ID_PATTERN = re.compile(r"[A-Za-z0-9_.-]{1,128}")
+
+def _batch_settings() -> dict:
+    return get_app_config()['application'].get('batch') or {}
+
+def _batch_output_path(batch_id: str) -> Path:
+    return Path(_batch_settings().get('output_dir', 'batch_outputs')) / f"{batch_id}.jsonl"
+
+def _batch_status_key(batch_id: str) -> str:
+    return f"batch_status:{batch_id}"
+
+def _batch_status(batch_id: str) -> Optional[BatchStatus]:
+    """The batch's status as last recorded, with its progress read from the results file."""
+    from ..core.batch import count_results
+
+    shared_state = get_runtime().shared_state
+    record = shared_state.cache.get(_batch_status_key(batch_id))
+    if record is None:
+        return None
+    status = BatchStatus.model_validate({**record, **count_results(_batch_output_path(batch_id))})
+    if status.status == "running" and not shared_state.lock_held(f"batch:{batch_id}"):
+        # Its worker was stopped (e.g. restarted) without recording an outcome.
+        status.status = "interrupted"
+    return status
+
+def _record_batch_status(status: BatchStatus):
+    record = status.model_dump(mode="json", exclude={"completed", "errored"})
+    get_runtime().shared_state.cache.set(
+        _batch_status_key(status.batch_id), record, ttl_seconds=_batch_settings().get('status_ttl_seconds', 604800)
     )
 
+async def _run_batch_in_background(batch_lease: ExitStack, status: BatchStatus, pairs, output_path: Path, max_workers: int):
+    """Runs a batch to the end and records its outcome; holds the batch's lock until then."""
+    from ..core.batch import run_batch
+
+    try:
+        try:
+            summary = await asyncio.to_thread(run_batch, pairs, output_path, max_workers, batch_id=status.batch_id)
+            status = status.model_copy(update={"status": "completed", "summary": summary.model_copy(update={"results": []})})
+            logger.info(f"Batch {status.batch_id} completed: {summary.succeeded} succeeded, {summary.failed} failed, {summary.errored} errored.")
+        except Exception as e:
+            logger.exception(f"Batch {status.batch_id} failed.")
+            status = status.model_copy(update={"status": "failed", "error": f"{type(e).__name__}: {e}"})
+        await asyncio.to_thread(_record_batch_status, status)
+    finally:
+        # Shared-state calls can block (SQLite lock waits), so none of them run on the event loop.
+        await asyncio.to_thread(batch_lease.close)
+
+
+@app.post("/verify/batch", tags=["Verification"], response_model=BatchStatus, status_code=202)
+async def verify_batch(manifest: BatchManifest):
+    """
+    Starts verifying a manifest of archived NSV/SV pairs (server-side paths) across a process
+    pool, and returns at once with the batch's status and results URLs. Results are written as
+    JSON Lines while the batch runs; re-submitting the same batch_id resumes an interrupted run.
+    """
+    from ..core.batch import default_batch_id
+
+    batch_config = _batch_settings()
+    archive_root = Path(batch_config.get('archive_root', '.')).resolve()
+
+    pair_ids = [pair.pair_id for pair in manifest.pairs]
+    if len(set(pair_ids)) != len(pair_ids):
+        raise HTTPException(status_code=400, detail="Batch pair_ids must be unique.")
+
+    # Only files under the configured archive root may be read.
+    pairs = []
+    for pair in manifest.pairs:
+        resolved = {}
+        for field in ("nsv_path", "sv_path"):
+            full_path = (archive_root / getattr(pair, field)).resolve()
+            if not full_path.is_relative_to(archive_root):
+                raise HTTPException(status_code=403, detail=f"Pair '{pair.pair_id}': {field} is outside the archive root.")
+            if not full_path.is_file():
+                raise HTTPException(status_code=404, detail=f"Pair '{pair.pair_id}': {field} not found.")
+            resolved[field] = str(full_path)
+        pairs.append(pair.model_copy(update=resolved))
+
+    batch_id = manifest.batch_id or default_batch_id(pairs)
+    if not _BATCH_ID_PATTERN.fullmatch(batch_id):
+        raise HTTPException(status_code=400, detail="batch_id may only contain letters, digits, '.', '_' and '-'.")
+    max_workers = manifest.max_workers or batch_config.get('max_workers', 4)
+
+    # Two runs of the same batch would append to the same results file; refuse the second one.
+    batch_lease = ExitStack()
+    try:
+        await asyncio.to_thread(batch_lease.enter_context, get_runtime().shared_state.lock(f"batch:{batch_id}", timeout=0))
+    except SharedStateError:
+        raise HTTPException(status_code=409, detail=f"Batch '{batch_id}' is already running.")
+
+    logger.info(f"Starting batch verification {batch_id} with {len(pairs)} pair(s).")
+    status = BatchStatus(
+        batch_id=batch_id,
+        status="running",
+        total=len(pairs),
+        status_url=f"/verify/batch/{batch_id}",
+        results_url=f"/verify/batch/{batch_id}/results",
+    )
+    await asyncio.to_thread(_record_batch_status, status)
+    task = asyncio.create_task(_run_batch_in_background(batch_lease, status, pairs, _batch_output_path(batch_id), max_workers))
+    _BATCH_TASKS.add(task)
+    task.add_done_callback(_BATCH_TASKS.discard)
+    return await asyncio.to_thread(_batch_status, batch_id) or status
+
+
+@app.get("/verify/batch/{batch_id}", tags=["Verification"], response_model=BatchStatus)
+async def get_batch_status(batch_id: str):
+    """The status and progress of a batch started with POST /verify/batch, from any worker."""
+    status = await asyncio.to_thread(_batch_status, batch_id) if _BATCH_ID_PATTERN.fullmatch(batch_id) else None
+    if status is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return status
+
+
+@app.get("/verify/batch/{batch_id}/results", tags=["Verification"])
+async def get_batch_results(batch_id: str):
+    """The batch's results file (JSON Lines, one `BatchPairResult` per line), as written so far."""
+    output_path = _batch_output_path(batch_id) if _BATCH_ID_PATTERN.fullmatch(batch_id) else None
+    if output_path is None or not output_path.is_file():
+        raise HTTPException(status_code=404, detail="No results for this batch.")
+    return FileResponse(output_path, media_type="application/x-ndjson", filename=f"{batch_id}.jsonl")
+
 # --- Static Files Hosting ---
 frontend_dir = Path(__file__).resolve().parent.parent / "frontend"
 app.mount("/", StaticFiles(directory=str(frontend_dir), html=True), name="static")
\ No newline at end of file
@@ -0,0 +1,237 @@
+# document_ai_verification/benchmarks/load_test/mock_backends.py
+
+"""
+Local stand-ins for the LLM and OCR backends, for load testing without GPUs.
+
+Serves, from a single FastAPI app:
+  - POST /v1/chat/completions : OpenAI-compatible; answers with schema-valid
+                                PageHolisticAnalysis or PageAuditResult JSON.
+  - GET  /v1/models           : Lets OpenAI clients and health probes see a model.
+  - POST /ocr                 : Multipart image upload; answers with an OCRResponse.
+
+Latency and error rates are configurable so GPU saturation can be simulated.
+
+Usage (from the repository root):
+    python -m document_ai_verification.benchmarks.load_test.mock_backends --port 8100 --llm-latency-ms 1500
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request, UploadFile, File
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ...ai.llm.schemas import PageHolisticAnalysis, PageAuditResult
+from ...ai.ocr.schemas import OCRResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MockSettings:
+    """Behaviour knobs for the mock backends."""
+    model_name: str = "mock-vlm"
+    llm_latency_ms: float = 800.0
+    llm_jitter_ms: float = 200.0
+    llm_error_rate: float = 0.0
+    ocr_latency_ms: float = 300.0
+    ocr_jitter_ms: float = 50.0
+    ocr_error_rate: float = 0.0
+    # The page_status every audit returns; anything other than 'Verified' stops the workflow early.
+    audit_status: str = "Verified"
+    seed: int = 0
+
+
+# ===================================================================
+# SECTION 1: Canned, Schema-Valid Responses
+# ===================================================================
+
+def _holistic_response() -> Dict[str, Any]:
+    result = PageHolisticAnalysis(
+        required_inputs=[
+            {"input_type": "signature", "marker_text": "Signature:", "description": "User must sign here."},
+            {"input_type": "date", "marker_text": "Date:", "description": "User must date the document."},
+        ],
+        prefilled_inputs=[],
+        summary="No fields are prefilled; signature and date require input.",
+    )
+    return result.model_dump()
+
+
+def _audit_response(prompt: str, status: str) -> Dict[str, Any]:
+    match = re.search(r"Page Number (\d+)", prompt)
+    page_number = int(match.group(1)) if match else 1
+    fulfilled = status in ("Verified", "Content Mismatch")
+    result = PageAuditResult(
+        page_number=page_number,
+        page_status=status,
+        required_inputs=[
+            {"input_type": "signature", "marker_text": "Signature:", "is_fulfilled": fulfilled,
+             "audit_notes": "Mock audit: signature ink present in SV image." if fulfilled else "Mock audit: no signature."},
+            {"input_type": "date", "marker_text": "Date:", "is_fulfilled": fulfilled,
+             "audit_notes": 'Mock audit: Date "09/16/2024" extracted from diff.' if fulfilled else "Mock audit: date blank."},
+        ],
+        content_differences=[] if "Content Mismatch" not in status else [
+            {"nsv_text": "$1,000", "sv_text": "$91,000", "description": "Mock audit: fee amount altered."}
+        ],
+    )
+    return result.model_dump()
+
+
+def _prompt_text(messages: List[Dict[str, Any]]) -> str:
+    """Flattens the text parts of a chat request into one string."""
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif isinstance(content, list):
+            parts.extend(item.get("text", "") for item in content if item.get("type") == "text")
+    return "\n".join(parts)
+
+
+def _count_images(messages: List[Dict[str, Any]]) -> int:
+    return sum(
+        1 for message in messages if isinstance(message.get("content"), list)
+        for item in message["content"] if item.get("type") == "image_url"
+    )
+
+
+# ===================================================================
+# SECTION 2: Application Factory
+# ===================================================================
+
+def create_app(settings: MockSettings) -> FastAPI:
+    """Builds the mock backend app. Each app keeps its own RNG and request counters."""
+    app = FastAPI(title="Mock LLM/OCR Backends")
+    rng = random.Random(settings.seed)
+    counters = {"llm_requests": 0, "llm_errors": 0, "ocr_requests": 0, "ocr_errors": 0}
+
+    async def simulate(latency_ms: float, jitter_ms: float, error_rate: float) -> bool:
+        """Sleeps for a jittered latency and returns True if this call should fail."""
+        delay = max(0.0, rng.gauss(latency_ms, jitter_ms)) / 1000.0
+        await asyncio.sleep(delay)
+        return rng.random() < error_rate
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": settings.model_name, "object": "model", "owned_by": "mock"}]}
+
+    @app.get("/stats")
+    async def stats():
+        return counters
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counters["llm_requests"] += 1
+        if await simulate(settings.llm_latency_ms, settings.llm_jitter_ms, settings.llm_error_rate):
+            counters["llm_errors"] += 1
+            return JSONResponse(
+                status_code=503,
+                content={"error": {"message": "Mock overload: the GPU is busy.", "type": "server_error", "code": 503}},
+            )
+
+        messages = body.get("messages", [])
+        prompt = _prompt_text(messages)
+        payload = _audit_response(prompt, settings.audit_status) if '"page_status"' in prompt else _holistic_response()
+        content = json.dumps(payload)
+        # Rough token accounting so clients that read `usage` see plausible numbers.
+        prompt_tokens = len(prompt) // 4 + 1200 * _count_images(messages)
+        completion_tokens = len(content) // 4
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if body.get("stream"):
+            async def event_stream():
+                for start in range(0, len(content), 16):
+                    chunk = {
+                        "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": settings.model_name,
+                        "choices": [{"index": 0, "delta": {"content": content[start:start + 16]}, "finish_reason": None}],
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                    await asyncio.sleep(0)
+                final = {
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": settings.model_name,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": settings.model_name,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        }
+
+    @app.post("/ocr")
+    async def ocr(file: UploadFile = File(...)):
+        await file.read()
+        counters["ocr_requests"] += 1
+        if await simulate(settings.ocr_latency_ms, settings.ocr_jitter_ms, settings.ocr_error_rate):
+            counters["ocr_errors"] += 1
+            return JSONResponse(status_code=503, content={"detail": "Mock OCR overload."})
+
+        words = ["SERVICE", "AGREEMENT", "Signature:", "Jordan", "Date:", "09/16/2024"]
+        detailed = [
+            {"poly": [40 + 120 * i, 40, 150 + 120 * i, 40, 150 + 120 * i, 70, 40 + 120 * i, 70],
+             "text": word, "line_num": 1 + i // 2, "word_num": 1 + i % 2}
+            for i, word in enumerate(words)
+        ]
+        response = OCRResponse(
+            status="success",
+            plain_text="\n".join(" ".join(words[i:i + 2]) for i in range(0, len(words), 2)),
+            detailed_data=detailed,
+        )
+        return response.model_dump()
+
+    return app
+
+
+# ===================================================================
+# Standalone Entry Point
+# ===================================================================
+def main(argv=None):
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run mock LLM and OCR backends.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--model-name", default=MockSettings.model_name)
+    parser.add_argument("--llm-latency-ms", type=float, default=MockSettings.llm_latency_ms)
+    parser.add_argument("--llm-jitter-ms", type=float, default=MockSettings.llm_jitter_ms)
+    parser.add_argument("--llm-error-rate", type=float, default=MockSettings.llm_error_rate)
+    parser.add_argument("--ocr-latency-ms", type=float, default=MockSettings.ocr_latency_ms)
+    parser.add_argument("--ocr-jitter-ms", type=float, default=MockSettings.ocr_jitter_ms)
+    parser.add_argument("--ocr-error-rate", type=float, default=MockSettings.ocr_error_rate)
+    parser.add_argument("--audit-status", default=MockSettings.audit_status,
+                        choices=["Verified", "Input Missing", "Content Mismatch", "Input Missing and Content Mismatch"])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    settings = MockSettings(
+        model_name=args.model_name,
+        llm_latency_ms=args.llm_latency_ms, llm_jitter_ms=args.llm_jitter_ms, llm_error_rate=args.llm_error_rate,
+        ocr_latency_ms=args.ocr_latency_ms, ocr_jitter_ms=args.ocr_jitter_ms, ocr_error_rate=args.ocr_error_rate,
+        audit_status=args.audit_status, seed=args.seed,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+# document_ai_verification/benchmarks/load_test/run_load_test.py
+
+"""
+End-to-end load test for the streaming /verify/ endpoint.
+
+By default the harness:
+  1. Starts the mock LLM/OCR backends (see mock_backends.py) in a subprocess.
+  2. Starts the API under uvicorn in a subprocess, pointed at the mocks through
+     LLM_API_URL / OCR_URL environment variables.
+  3. Fires concurrent SSE verification requests built from the synthetic corpus.
+  4. Reports throughput, p50/p95/p99 time-to-first-event and total latency, and
+     event-loop lag (server side via /health probe latency, client side via a
+     sleep-drift monitor), as JSON.
+
+Pass --api-url to target an already running API (steps 1-2 are then skipped).
+The API subprocess needs Poppler installed, exactly like a real deployment.
+
+Usage (from the repository root):
+    python -m document_ai_verification.benchmarks.load_test.run_load_test --requests 40 --concurrency 8
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+import httpx
+
+from ..synthetic_corpus import generate_pair, build_pdf_bytes, build_scanned_pdf_bytes, render_document_images
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+
+
+# ===================================================================
+# SECTION 1: Process Management
+# ===================================================================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise TimeoutError(f"Service at {url} did not become ready within {timeout:.0f}s.")
+
+
+@contextmanager
+def _spawn(args: List[str], ready_url: str, env: Optional[Dict[str, str]] = None):
+    """Starts a Python module in a subprocess and stops it on exit."""
+    process = subprocess.Popen([sys.executable, "-m", *args], cwd=REPO_ROOT, env=env)
+    try:
+        _wait_until_ready(ready_url)
+        yield process
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# ===================================================================
+# SECTION 2: Load Generation
+# ===================================================================
+
+def _summarize(values: List[float]) -> Dict[str, Optional[float]]:
+    if not values:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None, "mean_ms": None}
+    ordered = sorted(values)
+
+    def pct(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))], 2)
+
+    return {
+        "count": len(ordered), "p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+        "max_ms": round(ordered[-1], 2), "mean_ms": round(statistics.fmean(ordered), 2),
+    }
+
+
+async def _verify_once(client: httpx.AsyncClient, api_url: str, nsv_pdf: bytes, sv_pdf: bytes) -> Dict[str, Any]:
+    """Sends one verification request and times the SSE stream."""
+    files = {
+        "nsv_file": ("nsv.pdf", nsv_pdf, "application/pdf"),
+        "sv_file": ("sv.pdf", sv_pdf, "application/pdf"),
+    }
+    start = time.perf_counter()
+    first_event_ms = None
+    last_event: Optional[Dict[str, Any]] = None
+    event_count = 0
+    try:
+        async with client.stream("POST", f"{api_url}/verify/", files=files) as response:
+            if response.status_code != 200:
+                return {"ok": False, "error": f"HTTP {response.status_code}", "total_ms": (time.perf_counter() - start) * 1000}
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                if first_event_ms is None:
+                    first_event_ms = (time.perf_counter() - start) * 1000
+                event_count += 1
+                last_event = json.loads(line[5:].strip())
+    except httpx.HTTPError as e:
+        return {"ok": False, "error": f"{type(e).__name__}: {e}", "total_ms": (time.perf_counter() - start) * 1000}
+
+    final_type = last_event.get("type") if last_event else None
+    return {
+        "ok": final_type in ("workflow_complete", "verification_failed"),
+        "final_event": final_type,
+        "error": last_event.get("message") if final_type == "error" else None,
+        "first_event_ms": first_event_ms,
+        "total_ms": (time.perf_counter() - start) * 1000,
+        "events": event_count,
+    }
+
+
+async def _probe_server_lag(client: httpx.AsyncClient, api_url: str, interval: float, stop: asyncio.Event, samples: List[float]):
+    """/health does no work, so its latency under load approximates the server's event-loop lag."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        try:
+            await client.get(f"{api_url}/health", timeout=30.0)
+            samples.append((time.perf_counter() - start) * 1000)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(interval)
+
+
+async def _monitor_client_lag(interval: float, stop: asyncio.Event, samples: List[float]):
+    """Sleep drift of the driver itself, to confirm the client is not the bottleneck."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.perf_counter() - start - interval) * 1000))
+
+
+async def run_load(api_url: str, documents: List[Dict[str, bytes]], total_requests: int, concurrency: int, probe_interval: float = 0.1) -> Dict[str, Any]:
+    """Drives `total_requests` verifications with at most `concurrency` in flight."""
+    results: List[Dict[str, Any]] = []
+    server_lag: List[float] = []
+    client_lag: List[float] = []
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total_requests):
+        queue.put_nowait(documents[i % len(documents)])
+
+    limits = httpx.Limits(max_connections=concurrency + 2, max_keepalive_connections=concurrency + 2)
+    async with httpx.AsyncClient(timeout=httpx.Timeout(600.0, connect=10.0), limits=limits) as client:
+        async def worker():
+            while True:
+                try:
+                    doc = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results.append(await _verify_once(client, api_url, doc["nsv"], doc["sv"]))
+
+        stop = asyncio.Event()
+        monitors = [
+            asyncio.create_task(_probe_server_lag(client, api_url, probe_interval, stop, server_lag)),
+            asyncio.create_task(_monitor_client_lag(probe_interval, stop, client_lag)),
+        ]
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall_seconds = time.perf_counter() - wall_start
+        stop.set()
+        await asyncio.gather(*monitors)
+
+    completed = [r for r in results if r["ok"]]
+    outcomes: Dict[str, int] = {}
+    for r in results:
+        key = r.get("final_event") or "transport_error"
+        outcomes[key] = outcomes.get(key, 0) + 1
+    return {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(completed) / wall_seconds, 4) if wall_seconds > 0 else None,
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "outcomes": outcomes,
+        "errors": sorted({r["error"] for r in results if r.get("error")})[:10],
+        "time_to_first_event": _summarize([r["first_event_ms"] for r in results if r.get("first_event_ms") is not None]),
+        "total_latency": _summarize([r["total_ms"] for r in completed]),
+        "server_event_loop_lag": _summarize(server_lag),
+        "client_event_loop_lag": _summarize(client_lag),
+    }
+
+
+def build_documents(page_counts: List[int], include_scanned: bool, seed: int) -> List[Dict[str, bytes]]:
+    """Synthetic request payloads: one signed pair per page count, plus scanned variants on request."""
+    documents = []
+    for num_pages in page_counts:
+        pair = generate_pair(num_pages, "signed", seed=seed)
+        documents.append({"nsv": build_pdf_bytes(pair.nsv_pages), "sv": build_pdf_bytes(pair.sv_pages)})
+        if include_scanned:
+            images = render_document_images(pair.sv_pages, dpi=150, scanned=True, seed=seed)
+            documents.append({"nsv": build_pdf_bytes(pair.nsv_pages), "sv": build_scanned_pdf_bytes(images, dpi=150)})
+    return documents
+
+
+# ===================================================================
+# Command-Line Entry Point
+# ===================================================================
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load-test /verify/ against local mock model backends.")
+    parser.add_argument("--api-url", help="Target an already running API instead of spawning one.")
+    parser.add_argument("--api-workers", type=int, default=1, help="uvicorn workers for the spawned API.")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--page-counts", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--include-scanned", action="store_true", help="Also send scanned SVs (exercises the OCR mock).")
+    parser.add_argument("--llm-latency-ms", type=float, default=800.0)
+    parser.add_argument("--llm-jitter-ms", type=float, default=200.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--ocr-latency-ms", type=float, default=300.0)
+    parser.add_argument("--ocr-error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="Where to write the JSON report.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    documents = build_documents(args.page_counts, args.include_scanned, args.seed)
+
+    def execute(api_url: str) -> Dict[str, Any]:
+        return asyncio.run(run_load(api_url, documents, args.requests, args.concurrency))
+
+    if args.api_url:
+        report = execute(args.api_url.rstrip("/"))
+    else:
+        mock_port, api_port = _free_port(), _free_port()
+        mock_url = f"http://127.0.0.1:{mock_port}"
+        mock_args = [
+            "document_ai_verification.benchmarks.load_test.mock_backends", "--port", str(mock_port),
+            "--llm-latency-ms", str(args.llm_latency_ms), "--llm-jitter-ms", str(args.llm_jitter_ms),
+            "--llm-error-rate", str(args.llm_error_rate), "--ocr-latency-ms", str(args.ocr_latency_ms),
+            "--ocr-error-rate", str(args.ocr_error_rate), "--seed", str(args.seed),
+        ]
+        # Process environment takes precedence over any .env file in the project.
+        env = dict(os.environ, LLM_API_URL=f"{mock_url}/v1", LLM_API_KEY="mock",
+                   LLM_MODEL_NAME="mock-vlm", OCR_URL=f"{mock_url}/ocr")
+        api_args = [
+            "uvicorn", "document_ai_verification.api.main:app", "--port", str(api_port),
+            "--workers", str(args.api_workers), "--log-level", "warning",
+        ]
+        with _spawn(mock_args, f"{mock_url}/v1/models"):
+            with _spawn(api_args, f"http://127.0.0.1:{api_port}/health", env=env):
+                report = execute(f"http://127.0.0.1:{api_port}")
+                report["mock_backend_counters"] = httpx.get(f"{mock_url}/stats").json()
+
+    report["parameters"] = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"✅ Load test report written to {args.output}")
+    print(text)
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
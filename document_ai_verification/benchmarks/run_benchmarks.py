@@ -0,0 +1,308 @@
+# document_ai_verification/benchmarks/run_benchmarks.py
+
+"""
+CPU benchmark suite for the non-LLM parts of the verification pipeline.
+
+Measures the hot utility functions over a synthetic NSV/SV corpus across page
+counts and DPIs, and writes a machine-readable JSON report. Two reports can be
+compared to catch regressions between commits.
+
+Usage (from the repository root):
+    python -m document_ai_verification.benchmarks.run_benchmarks --output bench_head.json
+    python -m document_ai_verification.benchmarks.run_benchmarks --compare bench_base.json --output bench_head.json
+"""
+
+import json
+import logging
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional
+
+import cv2
+
+from ..ai.llm.client import encode_image_to_base64
+from ..utils.file_utils import TemporaryFileHandler
+from ..utils.image_utils import analyze_page_meta_from_image, find_difference_bboxes_direct
+from ..utils.text_utils import get_structured_diff_json
+from .synthetic_corpus import (
+    MUTATIONS,
+    generate_pair,
+    render_document_images,
+    build_pdf_bytes,
+    build_scanned_pdf_bytes,
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the set of cases or their inputs change, so old reports are not compared blindly.
+SUITE_VERSION = 1
+
+
+# ===================================================================
+# SECTION 1: Timing Helpers
+# ===================================================================
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def time_callable(fn: Callable[[], Any], repeats: int, warmup: int = 1) -> Dict[str, float]:
+    """Runs `fn` warmup + repeats times and returns summary statistics in milliseconds."""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "repeats": repeats,
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p95_ms": round(_percentile(samples, 95), 4),
+        "stdev_ms": round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+    }
+
+
+def _environment_info() -> Dict[str, Any]:
+    """Captures enough context to tell whether two reports are comparable."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import numpy
+    return {
+        "git_commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "opencv": cv2.__version__,
+        "numpy": numpy.__version__,
+        "poppler_available": shutil.which("pdftoppm") is not None,
+    }
+
+
+# ===================================================================
+# SECTION 2: Benchmark Cases
+# ===================================================================
+
+def bench_image_functions(dpis: List[int], repeats: int, seed: int) -> List[Dict[str, Any]]:
+    """analyze_page_meta_from_image and find_difference_bboxes_direct on single-page pairs."""
+    results = []
+    for dpi in dpis:
+        for mutation in MUTATIONS:
+            pair = generate_pair(1, mutation, seed=seed)
+            nsv_img = render_document_images(pair.nsv_pages, dpi=dpi)[0]
+            sv_img = render_document_images(pair.sv_pages, dpi=dpi, scanned=pair.scanned, seed=seed)[0]
+            params = {"dpi": dpi, "mutation": mutation}
+
+            stats = time_callable(lambda: analyze_page_meta_from_image(nsv_img, sv_img), repeats)
+            meta = analyze_page_meta_from_image(nsv_img, sv_img)
+            results.append({
+                "case": "analyze_page_meta_from_image", "params": params, "stats": stats,
+                "output": {"content_match": meta["content_match"], "bbox_count": len(meta["difference_bboxes"])},
+            })
+
+            stats = time_callable(lambda: find_difference_bboxes_direct(nsv_img, sv_img), repeats)
+            results.append({
+                "case": "find_difference_bboxes_direct", "params": params, "stats": stats,
+                "output": {"bbox_count": len(find_difference_bboxes_direct(nsv_img, sv_img))},
+            })
+    return results
+
+
+def bench_text_diff(page_counts: List[int], repeats: int, seed: int) -> List[Dict[str, Any]]:
+    """get_structured_diff_json over whole-document text of increasing length."""
+    results = []
+    for num_pages in page_counts:
+        for mutation in ("identical", "filled", "altered_clause"):
+            pair = generate_pair(num_pages, mutation, seed=seed)
+            nsv_text = "\n".join(page.plain_text() for page in pair.nsv_pages)
+            sv_text = "\n".join(page.plain_text() for page in pair.sv_pages)
+            stats = time_callable(lambda: get_structured_diff_json(nsv_text, sv_text), repeats)
+            results.append({
+                "case": "get_structured_diff_json",
+                "params": {"pages": num_pages, "mutation": mutation},
+                "stats": stats,
+                "output": {"diff_entries": len(json.loads(get_structured_diff_json(nsv_text, sv_text)))},
+            })
+    return results
+
+
+def bench_encode_image(dpis: List[int], repeats: int, seed: int, work_dir: Path) -> List[Dict[str, Any]]:
+    """encode_image_to_base64 with and without the vision-model height cap."""
+    results = []
+    pair = generate_pair(1, "signed", seed=seed)
+    for dpi in dpis:
+        image_path = work_dir / f"encode_{dpi}.png"
+        cv2.imwrite(str(image_path), render_document_images(pair.sv_pages, dpi=dpi)[0])
+        for max_height in (None, 896):
+            stats = time_callable(lambda: encode_image_to_base64(image_path, max_height=max_height), repeats)
+            results.append({
+                "case": "encode_image_to_base64",
+                "params": {"dpi": dpi, "max_height": max_height},
+                "stats": stats,
+                "output": {"base64_chars": len(encode_image_to_base64(image_path, max_height=max_height))},
+            })
+    return results
+
+
+def bench_extract_content(page_counts: List[int], dpis: List[int], repeats: int, seed: int, work_dir: Path) -> List[Dict[str, Any]]:
+    """TemporaryFileHandler.extract_content_per_page on digital and scanned PDFs (needs Poppler)."""
+    results = []
+    poppler_missing = shutil.which("pdftoppm") is None
+    for num_pages in page_counts:
+        pair = generate_pair(num_pages, "signed", seed=seed)
+        pdfs = {
+            "digital": build_pdf_bytes(pair.sv_pages),
+            "scanned": build_scanned_pdf_bytes(render_document_images(pair.sv_pages, dpi=150, scanned=True, seed=seed), dpi=150),
+        }
+        for dpi in dpis:
+            for variant, pdf_bytes in pdfs.items():
+                params = {"pages": num_pages, "dpi": dpi, "variant": variant}
+                if poppler_missing:
+                    results.append({"case": "extract_content_per_page", "params": params, "skipped": "poppler (pdftoppm) not installed"})
+                    continue
+
+                def run_once():
+                    # A fresh handler per run so cached images on disk never short-circuit the work.
+                    handler = TemporaryFileHandler(base_path=str(work_dir / "extract"))
+                    handler.setup()
+                    try:
+                        pdf_path = handler.save_bytes_as_file(pdf_bytes, f"{variant}.pdf")
+                        return handler.extract_content_per_page(pdf_path, dpi=dpi)
+                    finally:
+                        handler.cleanup()
+
+                stats = time_callable(run_once, repeats)
+                results.append({"case": "extract_content_per_page", "params": params, "stats": stats})
+    return results
+
+
+# ===================================================================
+# SECTION 3: Reports and Comparison
+# ===================================================================
+
+def case_key(result: Dict[str, Any]) -> str:
+    """A stable identifier for a case, used to match results across reports."""
+    params = ",".join(f"{k}={result['params'][k]}" for k in sorted(result["params"]))
+    return f"{result['case']}[{params}]"
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """
+    Compares median timings case by case.
+
+    Args:
+        baseline: A previously written report.
+        current: The report of the current run.
+        threshold: Relative slowdown (e.g. 0.15 for 15%) above which a case is flagged.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per case present in both reports, slowest first.
+    """
+    base_by_key = {case_key(r): r for r in baseline.get("results", []) if "stats" in r}
+    rows = []
+    for result in current.get("results", []):
+        key = case_key(result)
+        if "stats" not in result or key not in base_by_key:
+            continue
+        base_median = base_by_key[key]["stats"]["median_ms"]
+        head_median = result["stats"]["median_ms"]
+        ratio = head_median / base_median if base_median > 0 else float("inf")
+        rows.append({
+            "case": key,
+            "baseline_median_ms": base_median,
+            "current_median_ms": head_median,
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1.0 + threshold,
+        })
+    return sorted(rows, key=lambda row: row["ratio"], reverse=True)
+
+
+def run_suite(page_counts: List[int], dpis: List[int], repeats: int, seed: int, include_extract: bool = True) -> Dict[str, Any]:
+    """Runs every benchmark case and returns the full report as a dictionary."""
+    with tempfile.TemporaryDirectory(prefix="docai_bench_") as tmp:
+        work_dir = Path(tmp)
+        results: List[Dict[str, Any]] = []
+        logger.info("Benchmarking image comparison functions...")
+        results += bench_image_functions(dpis, repeats, seed)
+        logger.info("Benchmarking text diff...")
+        results += bench_text_diff(page_counts, repeats, seed)
+        logger.info("Benchmarking image encoding...")
+        results += bench_encode_image(dpis, repeats, seed, work_dir)
+        if include_extract:
+            logger.info("Benchmarking PDF page extraction...")
+            results += bench_extract_content(page_counts, dpis, repeats, seed, work_dir)
+
+    return {
+        "suite_version": SUITE_VERSION,
+        "environment": _environment_info(),
+        "parameters": {"page_counts": page_counts, "dpis": dpis, "repeats": repeats, "seed": seed},
+        "results": results,
+    }
+
+
+# ===================================================================
+# Command-Line Entry Point
+# ===================================================================
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the CPU benchmark suite over a synthetic NSV/SV corpus.")
+    parser.add_argument("--page-counts", type=int, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--dpis", type=int, nargs="+", default=[150, 300])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-extract", action="store_true", help="Skip the Poppler/MarkItDown extraction cases.")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON report.")
+    parser.add_argument("--compare", type=Path, help="A baseline report to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = run_suite(args.page_counts, args.dpis, args.repeats, args.seed, include_extract=not args.skip_extract)
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✅ Benchmark report written to {args.output}")
+
+    for result in report["results"]:
+        if "stats" in result:
+            print(f"{case_key(result):<80} median {result['stats']['median_ms']:>10.2f} ms")
+        else:
+            print(f"{case_key(result):<80} skipped: {result['skipped']}")
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if baseline.get("suite_version") != SUITE_VERSION:
+            print(f"⚠️ Baseline suite version {baseline.get('suite_version')} differs from {SUITE_VERSION}; comparing matching cases only.")
+        rows = compare_reports(baseline, report, args.threshold)
+        regressions = [row for row in rows if row["regression"]]
+        print(f"\n--- Comparison against {args.compare} ({len(rows)} matching cases) ---")
+        for row in rows:
+            flag = "❌ REGRESSION" if row["regression"] else ""
+            print(f"{row['case']:<80} x{row['ratio']:<6} {flag}")
+        if regressions:
+            print(f"\n❌ {len(regressions)} case(s) slower than the {args.threshold:.0%} threshold.")
+            return 1
+        print("\n✅ No regressions above threshold.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# document_ai_verification/benchmarks/startup_benchmark.py
+
+"""
+Startup benchmark: how long a fresh process takes to import the API and to serve
+its first /health request.
+
+For each repeat, a clean interpreter is started so nothing is cached in-process:
+  - `python -X importtime -c "import <module>"` gives the cumulative import time
+    of every module; the slowest ones are listed in the report.
+  - The same process reports which heavy dependencies (OpenCV, numpy, the openai
+    SDK, the PDF toolchain...) were pulled in. None should be: they are imported
+    on first use.
+  - uvicorn is started on a free port and polled until /health answers
+    (time-to-ready, as seen by an autoscaler's readiness probe).
+
+Results use the same case/params/stats layout as run_benchmarks.py, so reports
+can be compared the same way.
+
+Usage (from the repository root):
+    python -m document_ai_verification.benchmarks.startup_benchmark --output startup_head.json
+    python -m document_ai_verification.benchmarks.startup_benchmark --compare startup_base.json
+"""
+
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .run_benchmarks import _environment_info, _percentile, compare_reports
+from .load_test.run_load_test import REPO_ROOT, _free_port, _wait_until_ready
+
+logger = logging.getLogger(__name__)
+
+SUITE_VERSION = 1
+DEFAULT_MODULE = "document_ai_verification.api.main"
+
+# Dependencies that must not be loaded just by importing the API.
+HEAVY_MODULES = ("cv2", "numpy", "openai", "pdf2image", "pypdf", "markitdown", "requests")
+
+
+# ===================================================================
+# SECTION 1: Measurements
+# ===================================================================
+
+def _stats(samples: List[float]) -> Dict[str, float]:
+    return {
+        "repeats": len(samples),
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p95_ms": round(_percentile(samples, 95), 4),
+        "stdev_ms": round(statistics.stdev(samples), 4) if len(samples) > 1 else 0.0,
+    }
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, float, float, int]]:
+    """Parses `-X importtime` output into (module, self_ms, cumulative_ms, depth) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        rows.append((name.strip(), int(self_us) / 1000.0, int(cumulative_us) / 1000.0, depth))
+    return rows
+
+
+def _startup_env() -> Dict[str, str]:
+    # Placeholders let the app boot without real backends; nothing is called at startup.
+    env = dict(os.environ)
+    env.setdefault("LLM_API_URL", "http://127.0.0.1:9/v1")
+    env.setdefault("LLM_API_KEY", "startup-benchmark")
+    env.setdefault("LLM_MODEL_NAME", "startup-benchmark")
+    env.setdefault("OCR_URL", "http://127.0.0.1:9/ocr")
+    return env
+
+
+def measure_import(module: str) -> Dict[str, Any]:
+    """Imports `module` in a fresh interpreter and returns timings and the heavy modules it loaded."""
+    probe = (
+        f"import sys; import {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=REPO_ROOT, env=_startup_env(), capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000.0
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    rows = parse_importtime(completed.stderr)
+    module_row = next((row for row in rows if row[0] == module), None)
+    return {
+        "wall_ms": wall_ms,
+        "import_ms": module_row[2] if module_row else sum(row[2] for row in rows if row[3] == 0),
+        "rows": rows,
+        "heavy_modules_loaded": [m for m in completed.stdout.strip().split(",") if m],
+    }
+
+
+def measure_time_to_ready(app: str, timeout: float = 60.0) -> float:
+    """Starts uvicorn and returns the milliseconds until /health answers 200."""
+    port = _free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=REPO_ROOT, env=_startup_env(),
+    )
+    try:
+        _wait_until_ready(f"http://127.0.0.1:{port}/health", timeout=timeout)
+        return (time.perf_counter() - start) * 1000.0
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run_suite(module: str, repeats: int, include_server: bool = True, top: int = 15) -> Dict[str, Any]:
+    """Runs every startup measurement and returns the full report as a dictionary."""
+    imports = [measure_import(module) for _ in range(repeats)]
+    results: List[Dict[str, Any]] = [
+        {"case": "import_time", "params": {"module": module}, "stats": _stats([m["import_ms"] for m in imports])},
+        {"case": "process_import_wall", "params": {"module": module}, "stats": _stats([m["wall_ms"] for m in imports])},
+    ]
+    if include_server:
+        app = f"{module}:app"
+        logger.info(f"Measuring time-to-ready of {app}...")
+        results.append({
+            "case": "time_to_ready", "params": {"app": app},
+            "stats": _stats([measure_time_to_ready(app) for _ in range(repeats)]),
+        })
+
+    # Slowest modules of the median run, by cumulative import time.
+    median_run = sorted(imports, key=lambda m: m["import_ms"])[len(imports) // 2]
+    slowest = sorted(median_run["rows"], key=lambda row: row[2], reverse=True)[:top]
+    return {
+        "suite_version": SUITE_VERSION,
+        "environment": _environment_info(),
+        "parameters": {"module": module, "repeats": repeats},
+        "results": results,
+        "heavy_modules_loaded": sorted({m for run in imports for m in run["heavy_modules_loaded"]}),
+        "slowest_imports": [
+            {"module": name, "self_ms": round(self_ms, 3), "cumulative_ms": round(cumulative_ms, 3)}
+            for name, self_ms, cumulative_ms, _ in slowest
+        ],
+    }
+
+
+# ===================================================================
+# Command-Line Entry Point
+# ===================================================================
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure API import time and time-to-ready.")
+    parser.add_argument("--module", default=DEFAULT_MODULE, help="Module to import (its 'app' is served for time-to-ready).")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--skip-server", action="store_true", help="Only measure imports, do not start uvicorn.")
+    parser.add_argument("--top", type=int, default=15, help="How many of the slowest imports to list.")
+    parser.add_argument("--output", type=Path, help="Where to write the JSON report.")
+    parser.add_argument("--compare", type=Path, help="A baseline report to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    report = run_suite(args.module, args.repeats, include_server=not args.skip_server, top=args.top)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(text, encoding="utf-8")
+        print(f"✅ Startup report written to {args.output}")
+    for result in report["results"]:
+        print(f"{result['case']:<22} median {result['stats']['median_ms']:>10.1f} ms")
+    for entry in report["slowest_imports"]:
+        print(f"  {entry['cumulative_ms']:>10.1f} ms  {entry['module']}")
+
+    exit_code = 0
+    if report["heavy_modules_loaded"]:
+        print(f"\n❌ Heavy modules loaded at import: {', '.join(report['heavy_modules_loaded'])}")
+        exit_code = 1
+
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        rows = compare_reports(baseline, report, args.threshold)
+        for row in rows:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{row['ratio']:>7.3f}x  {row['case']}  {flag}")
+        if any(row["regression"] for row in rows):
+            print(f"\n❌ Startup slower than the {args.threshold:.0%} threshold.")
+            exit_code = 1
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,439 @@
+# document_ai_verification/benchmarks/synthetic_corpus.py
+
+"""
+Generates reproducible synthetic NSV/SV document pairs with known mutations.
+
+Every page is described once as a small layout model (text lines and input
+fields, positioned in PDF points) and then rendered two ways from that model:
+  1. As a digital PDF with a real text layer (hand-written, no extra dependencies).
+  2. As a raster page image at any DPI (OpenCV), for the image-level benchmarks.
+
+Because both renderers share the same model, the only differences between an
+NSV and its SV are the mutations that were applied on purpose.
+"""
+
+import io
+import json
+import random
+import logging
+from copy import deepcopy
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Dict, Any
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# US Letter in PDF points (1/72 inch).
+PAGE_WIDTH_PT = 612
+PAGE_HEIGHT_PT = 792
+
+# The mutations that can be applied to a signed version, from least to most invasive.
+MUTATIONS = ("identical", "filled", "signed", "altered_clause", "scanned")
+
+_CLAUSE_TEMPLATES = [
+    "The Client agrees to pay a fee of ${amount} within {days} days of the invoice date.",
+    "Either party may terminate this Agreement with {days} days written notice.",
+    "The Contractor shall maintain insurance coverage of at least ${amount} per claim.",
+    "All confidential information shall remain protected for {days} days after termination.",
+    "Late payments accrue interest at {percent} percent per month on the unpaid balance.",
+    "This Agreement is governed by the laws of the State in which services are performed.",
+    "No amendment to this Agreement is valid unless made in writing and signed by both parties.",
+    "The Contractor warrants that all work will be performed in a professional manner.",
+]
+_AMOUNTS = ["1,000", "2,500", "5,000", "10,000", "25,000"]
+_DAYS = ["10", "15", "30", "45", "60", "90"]
+_PERCENTS = ["1", "1.5", "2"]
+
+
+# ===================================================================
+# SECTION 1: Page Layout Model
+# ===================================================================
+
+@dataclass
+class TextLine:
+    """A single line of static text, positioned by its baseline."""
+    x_pt: float
+    y_pt: float  # Measured from the top of the page.
+    text: str
+    size: float = 10.0
+
+
+@dataclass
+class InputField:
+    """An input field: a label followed by a blank line (or a checkbox before the label)."""
+    input_type: str  # 'full_name', 'date', 'signature', 'initials' or 'checkbox'
+    label: str
+    x_pt: float
+    y_pt: float
+    size: float = 10.0
+    value: Optional[str] = None  # Typed value for text fields.
+    signed: bool = False  # Handwritten ink for signature/initials fields.
+    checked: bool = False  # Mark inside the box for checkbox fields.
+    seed: int = 0  # Drives the shape of the signature stroke.
+
+    @property
+    def label_width_pt(self) -> float:
+        # Helvetica averages roughly half an em per character; both renderers share this estimate.
+        return len(self.label) * self.size * 0.5
+
+    @property
+    def blank_start_pt(self) -> float:
+        return self.x_pt + self.label_width_pt + 6
+
+    @property
+    def blank_width_pt(self) -> float:
+        return 60 if self.input_type == "initials" else 180
+
+
+@dataclass
+class SyntheticPage:
+    """The layout model of one page."""
+    lines: List[TextLine] = field(default_factory=list)
+    fields: List[InputField] = field(default_factory=list)
+
+    def plain_text(self) -> str:
+        """The text-layer content of the page, in reading order, as a Markdown-like string."""
+        rows = [(line.y_pt, line.text) for line in self.lines]
+        for f in self.fields:
+            text = f"[{'X' if f.checked else ' '}] {f.label}" if f.input_type == "checkbox" else f"{f.label} ________________"
+            if f.value:
+                text = f"{f.label} {f.value}"
+            rows.append((f.y_pt, text))
+        return "\n".join(text for _, text in sorted(rows, key=lambda r: r[0]))
+
+
+@dataclass
+class SyntheticPair:
+    """An NSV/SV pair together with the ground-truth list of applied mutations."""
+    name: str
+    nsv_pages: List[SyntheticPage]
+    sv_pages: List[SyntheticPage]
+    mutation: str
+    scanned: bool = False
+    changes: List[Dict[str, Any]] = field(default_factory=list)
+
+
+# ===================================================================
+# SECTION 2: Corpus Generation
+# ===================================================================
+
+def build_nsv_document(num_pages: int, seed: int = 0) -> List[SyntheticPage]:
+    """Builds an unsigned contract-like document: clauses on every page, initials on
+    every page, and a signature block on the last page."""
+    rng = random.Random(seed)
+    pages = []
+    for page_index in range(num_pages):
+        page = SyntheticPage()
+        page.lines.append(TextLine(72, 72, f"SERVICE AGREEMENT - PAGE {page_index + 1}", size=14))
+        y = 110.0
+        for clause_index in range(18):
+            template = rng.choice(_CLAUSE_TEMPLATES)
+            text = template.format(amount=rng.choice(_AMOUNTS), days=rng.choice(_DAYS), percent=rng.choice(_PERCENTS))
+            page.lines.append(TextLine(72, y, f"{page_index + 1}.{clause_index + 1} {text}"))
+            y += 24
+        page.fields.append(InputField("initials", "Initials:", 430, 720, seed=seed + page_index))
+        if page_index == num_pages - 1:
+            page.fields.extend([
+                InputField("checkbox", "I agree to the terms above", 72, 560),
+                InputField("full_name", "Full Name:", 72, 600),
+                InputField("date", "Date:", 72, 640),
+                InputField("signature", "Signature:", 72, 680, seed=seed + 1000),
+            ])
+        pages.append(page)
+    return pages
+
+
+def apply_mutation(nsv_pages: List[SyntheticPage], mutation: str, seed: int = 0) -> SyntheticPair:
+    """Derives a signed version from an NSV by applying one named mutation.
+    Mutations are cumulative: 'signed' includes 'filled', 'altered_clause' and 'scanned' include 'signed'."""
+    if mutation not in MUTATIONS:
+        raise ValueError(f"Unknown mutation '{mutation}'. Expected one of {MUTATIONS}.")
+
+    rng = random.Random(seed)
+    sv_pages = deepcopy(nsv_pages)
+    changes: List[Dict[str, Any]] = []
+    # A scan is a signed copy that went through a scanner; it carries no clause alteration.
+    level = MUTATIONS.index("signed") if mutation == "scanned" else MUTATIONS.index(mutation)
+
+    if level >= MUTATIONS.index("filled"):
+        for page_num, page in enumerate(sv_pages, start=1):
+            for f in page.fields:
+                if f.input_type == "full_name":
+                    f.value = "Jordan A. Example"
+                elif f.input_type == "date":
+                    f.value = "09/16/2024"
+                elif f.input_type == "checkbox":
+                    f.checked = True
+                else:
+                    continue
+                changes.append({"page": page_num, "kind": "filled", "input_type": f.input_type, "marker_text": f.label})
+
+    if level >= MUTATIONS.index("signed"):
+        for page_num, page in enumerate(sv_pages, start=1):
+            for f in page.fields:
+                if f.input_type in ("signature", "initials"):
+                    f.signed = True
+                    changes.append({"page": page_num, "kind": "signed", "input_type": f.input_type, "marker_text": f.label})
+
+    if level >= MUTATIONS.index("altered_clause"):
+        page_num = rng.randrange(len(sv_pages)) + 1
+        line = rng.choice(sv_pages[page_num - 1].lines[1:])
+        original = line.text
+        altered = original
+        for token in _AMOUNTS + _DAYS:
+            if token in original:
+                altered = original.replace(token, "9" + token, 1)
+                break
+        if altered == original:
+            altered = original.replace("shall", "may", 1) if "shall" in original else original + " Fees are waived."
+        line.text = altered
+        changes.append({"page": page_num, "kind": "altered_clause", "nsv_text": original, "sv_text": altered})
+
+    return SyntheticPair(
+        name=f"{len(nsv_pages)}p_{mutation}_s{seed}",
+        nsv_pages=nsv_pages,
+        sv_pages=sv_pages,
+        mutation=mutation,
+        scanned=(mutation == "scanned"),
+        changes=changes,
+    )
+
+
+def generate_pair(num_pages: int, mutation: str, seed: int = 0) -> SyntheticPair:
+    """Convenience wrapper: builds an NSV and derives its SV in one call."""
+    return apply_mutation(build_nsv_document(num_pages, seed=seed), mutation, seed=seed)
+
+
+# ===================================================================
+# SECTION 3: Raster Rendering (OpenCV)
+# ===================================================================
+
+def _signature_points(f: InputField, width: float) -> List[tuple]:
+    """A deterministic squiggle sitting on the blank line, in page points."""
+    rng = random.Random(f.seed)
+    x0, y0 = f.blank_start_pt + 6, f.y_pt - 2
+    points = []
+    steps = 40
+    for i in range(steps + 1):
+        t = i / steps
+        x = x0 + t * (width - 12)
+        y = y0 - 6 - 7 * np.sin(t * np.pi * rng.uniform(3, 6)) * (1 - 0.5 * t)
+        points.append((x, y))
+    return points
+
+
+def render_page_image(page: SyntheticPage, dpi: int = 300) -> np.ndarray:
+    """Rasterizes a page model to a BGR image at the requested DPI."""
+    scale = dpi / 72.0
+    width, height = int(round(PAGE_WIDTH_PT * scale)), int(round(PAGE_HEIGHT_PT * scale))
+    img = np.full((height, width, 3), 255, dtype=np.uint8)
+    black = (0, 0, 0)
+    ink = (140, 40, 20)  # Dark blue, like a ballpoint pen.
+
+    def px(value: float) -> int:
+        return int(round(value * scale))
+
+    def put_text(x_pt: float, y_pt: float, text: str, size: float, color=black):
+        # Hershey cap height is ~22px at fontScale=1; target ~0.7 em.
+        font_scale = (size * 0.7 * scale) / 22.0
+        thickness = max(1, int(round(font_scale * 1.6)))
+        cv2.putText(img, text, (px(x_pt), px(y_pt)), cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness, cv2.LINE_AA)
+
+    for line in page.lines:
+        put_text(line.x_pt, line.y_pt, line.text, line.size)
+
+    line_thickness = max(1, px(0.75))
+    for f in page.fields:
+        if f.input_type == "checkbox":
+            box = f.size
+            x1, y1 = f.x_pt, f.y_pt - box
+            cv2.rectangle(img, (px(x1), px(y1)), (px(x1 + box), px(f.y_pt)), black, line_thickness)
+            if f.checked:
+                cv2.line(img, (px(x1 + 2), px(y1 + 2)), (px(x1 + box - 2), px(f.y_pt - 2)), ink, line_thickness + 1)
+                cv2.line(img, (px(x1 + box - 2), px(y1 + 2)), (px(x1 + 2), px(f.y_pt - 2)), ink, line_thickness + 1)
+            put_text(f.x_pt + box + 6, f.y_pt, f.label, f.size)
+            continue
+
+        put_text(f.x_pt, f.y_pt, f.label, f.size)
+        x_start, x_end = f.blank_start_pt, f.blank_start_pt + f.blank_width_pt
+        cv2.line(img, (px(x_start), px(f.y_pt + 2)), (px(x_end), px(f.y_pt + 2)), black, line_thickness)
+        if f.value:
+            put_text(x_start + 4, f.y_pt - 1, f.value, f.size, color=ink)
+        if f.signed:
+            points = np.array([(px(x), px(y)) for x, y in _signature_points(f, f.blank_width_pt)], dtype=np.int32)
+            cv2.polylines(img, [points], False, ink, line_thickness + 1, cv2.LINE_AA)
+    return img
+
+
+def degrade_as_scan(img: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Simulates a scanner: slight skew, sensor noise, blur and JPEG artifacts."""
+    rng = np.random.default_rng(seed)
+    h, w = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), float(rng.uniform(-0.4, 0.4)), 1.0)
+    scanned = cv2.warpAffine(img, matrix, (w, h), borderValue=(255, 255, 255))
+    noise = rng.normal(0, 6, scanned.shape)
+    scanned = np.clip(scanned.astype(np.float32) + noise, 0, 255).astype(np.uint8)
+    scanned = cv2.GaussianBlur(scanned, (3, 3), 0)
+    _, buffer = cv2.imencode(".jpg", scanned, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+
+
+def render_document_images(pages: List[SyntheticPage], dpi: int = 300, scanned: bool = False, seed: int = 0) -> List[np.ndarray]:
+    """Renders every page of a document, optionally degrading them as scans."""
+    images = [render_page_image(page, dpi) for page in pages]
+    if scanned:
+        images = [degrade_as_scan(img, seed=seed + i) for i, img in enumerate(images)]
+    return images
+
+
+# ===================================================================
+# SECTION 4: PDF Rendering
+# ===================================================================
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _page_content_stream(page: SyntheticPage) -> bytes:
+    """Builds the PDF content stream (text + vector strokes) for one page."""
+    def y(value: float) -> float:
+        return PAGE_HEIGHT_PT - value
+
+    ops = []
+
+    def text(x_pt: float, y_pt: float, value: str, size: float):
+        ops.append(f"BT /F1 {size:g} Tf {x_pt:.2f} {y(y_pt):.2f} Td ({_pdf_escape(value)}) Tj ET")
+
+    for line in page.lines:
+        text(line.x_pt, line.y_pt, line.text, line.size)
+
+    ops.append("0.75 w 0 0 0 RG")
+    for f in page.fields:
+        if f.input_type == "checkbox":
+            ops.append(f"{f.x_pt:.2f} {y(f.y_pt):.2f} {f.size:.2f} {f.size:.2f} re S")
+            if f.checked:
+                x1, y1, x2, y2 = f.x_pt + 2, y(f.y_pt) + 2, f.x_pt + f.size - 2, y(f.y_pt) + f.size - 2
+                ops.append(f"{x1:.2f} {y1:.2f} m {x2:.2f} {y2:.2f} l S {x2:.2f} {y1:.2f} m {x1:.2f} {y2:.2f} l S")
+                text(f.x_pt + f.size + 6, f.y_pt, f"X {f.label}", f.size)
+            else:
+                text(f.x_pt + f.size + 6, f.y_pt, f.label, f.size)
+            continue
+
+        text(f.x_pt, f.y_pt, f.label, f.size)
+        x_start, x_end = f.blank_start_pt, f.blank_start_pt + f.blank_width_pt
+        ops.append(f"{x_start:.2f} {y(f.y_pt + 2):.2f} m {x_end:.2f} {y(f.y_pt + 2):.2f} l S")
+        if f.value:
+            text(x_start + 4, f.y_pt - 1, f.value, f.size)
+        if f.signed:
+            points = _signature_points(f, f.blank_width_pt)
+            path = [f"{points[0][0]:.2f} {y(points[0][1]):.2f} m"]
+            path += [f"{px:.2f} {y(py):.2f} l" for px, py in points[1:]]
+            ops.append("0.08 0.16 0.55 RG 1.2 w " + " ".join(path) + " S 0 0 0 RG 0.75 w")
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_pdf_bytes(pages: List[SyntheticPage]) -> bytes:
+    """Serializes page models into a minimal, valid PDF 1.4 file with a Helvetica text layer."""
+    objects: List[bytes] = []
+    page_ids, content_ids = [], []
+    # Object numbering: 1 catalog, 2 pages tree, 3 font, then (page, content) per page.
+    for i in range(len(pages)):
+        page_ids.append(4 + 2 * i)
+        content_ids.append(5 + 2 * i)
+
+    kids = " ".join(f"{pid} 0 R" for pid in page_ids)
+    objects.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objects.append(f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode())
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    for page, content_id in zip(pages, content_ids):
+        stream = _page_content_stream(page)
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH_PT} {PAGE_HEIGHT_PT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>".encode()
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n".encode() + stream + b"\nendstream")
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n".encode() + body + b"\nendobj\n")
+    xref_offset = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+def build_scanned_pdf_bytes(images: List[np.ndarray], dpi: int = 300) -> bytes:
+    """Wraps raster page images into an image-only PDF (no text layer), like a scanner would."""
+    pil_pages = [Image.fromarray(cv2.cvtColor(img, cv2.COLOR_BGR2RGB)) for img in images]
+    out = io.BytesIO()
+    pil_pages[0].save(out, format="PDF", resolution=float(dpi), save_all=True, append_images=pil_pages[1:])
+    return out.getvalue()
+
+
+# ===================================================================
+# SECTION 5: Writing a Corpus to Disk
+# ===================================================================
+
+def write_pair(pair: SyntheticPair, output_dir: Path, scan_dpi: int = 200) -> Path:
+    """
+    Writes one pair as '<output_dir>/<pair.name>/{nsv.pdf, sv.pdf, manifest.json}'.
+
+    Returns:
+        Path: The directory containing the pair.
+    """
+    pair_dir = output_dir / pair.name
+    pair_dir.mkdir(parents=True, exist_ok=True)
+    (pair_dir / "nsv.pdf").write_bytes(build_pdf_bytes(pair.nsv_pages))
+    if pair.scanned:
+        images = render_document_images(pair.sv_pages, dpi=scan_dpi, scanned=True)
+        (pair_dir / "sv.pdf").write_bytes(build_scanned_pdf_bytes(images, dpi=scan_dpi))
+    else:
+        (pair_dir / "sv.pdf").write_bytes(build_pdf_bytes(pair.sv_pages))
+
+    manifest = {
+        "name": pair.name,
+        "page_count": len(pair.nsv_pages),
+        "mutation": pair.mutation,
+        "scanned": pair.scanned,
+        "changes": pair.changes,
+    }
+    (pair_dir / "manifest.json").write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    return pair_dir
+
+
+def write_corpus(output_dir: Path, page_counts: List[int], mutations: List[str] = list(MUTATIONS), seed: int = 0) -> List[Path]:
+    """Writes the full cross product of page counts and mutations to disk."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    pair_dirs = []
+    for num_pages in page_counts:
+        for mutation in mutations:
+            pair_dirs.append(write_pair(generate_pair(num_pages, mutation, seed=seed), output_dir))
+    logger.info(f"Wrote {len(pair_dirs)} synthetic pairs to {output_dir}")
+    return pair_dirs
+
+
+# ===================================================================
+# Standalone Block: write a corpus for manual inspection
+# ===================================================================
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Write a synthetic NSV/SV corpus to disk.")
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--page-counts", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--mutations", nargs="+", default=list(MUTATIONS), choices=MUTATIONS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for path in write_corpus(args.output_dir, args.page_counts, args.mutations, seed=args.seed):
+        print(f"✅ {path}")
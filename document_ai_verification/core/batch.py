@@ -0,0 +1,361 @@
+# document_ai_verification/core/batch.py
+
+"""
+Batch verification of archived NSV/SV pairs.
+
+Each pair runs the regular `run_verification_workflow` in a worker process. Workers
+build their own runtime (see `verification_service.get_runtime`), so the LLM
+concurrency limit in the shared-state backend is what keeps N workers from
+overloading the GPU service.
+
+Results are appended to a JSON Lines file, one `BatchPairResult` per pair, as soon
+as each pair finishes. That file doubles as the checkpoint: a re-run with the same
+output path skips every pair that already has a report, and retries those that
+errored.
+
+Usage (from the repository root), over a directory of '<pair_id>/nsv.pdf' + '<pair_id>/sv.pdf':
+    python -m document_ai_verification.core.batch archive/ --output results.jsonl --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from ..ai.llm.schemas import AuditedContentDifference, PageAuditResult
+from ..utils.config_loader import load_settings
+from ..utils.file_utils import TemporaryFileHandler
+from .schemas import BatchPair, BatchPairResult, BatchSummary, VerificationReport
+
+logger = logging.getLogger(__name__)
+
+
+# ===================================================================
+# SECTION 1: Pair Discovery and Checkpoints
+# ===================================================================
+
+def discover_pairs(root: Path, nsv_name: str = "nsv.pdf", sv_name: str = "sv.pdf") -> List[BatchPair]:
+    """
+    Finds every '<root>/<pair_id>/' directory that contains both documents.
+
+    Args:
+        root (Path): The archive directory.
+        nsv_name (str): File name of the non-signed version inside each pair directory.
+        sv_name (str): File name of the signed version inside each pair directory.
+
+    Returns:
+        List[BatchPair]: The pairs, sorted by pair_id.
+    """
+    root = Path(root)
+    if not root.is_dir():
+        raise FileNotFoundError(f"Batch input directory not found: {root}")
+    pairs = []
+    for pair_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+        nsv_path, sv_path = pair_dir / nsv_name, pair_dir / sv_name
+        if nsv_path.is_file() and sv_path.is_file():
+            pairs.append(BatchPair(pair_id=pair_dir.name, nsv_path=str(nsv_path), sv_path=str(sv_path)))
+        else:
+            logger.warning(f"Skipping '{pair_dir}': expected both '{nsv_name}' and '{sv_name}'.")
+    return pairs
+
+
+def default_batch_id(pairs: Iterable[BatchPair]) -> str:
+    """A stable id derived from the pairs, so re-submitting the same manifest resumes it."""
+    digest = hashlib.sha256()
+    for pair in pairs:
+        digest.update(f"{pair.pair_id}\0{pair.nsv_path}\0{pair.sv_path}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def load_completed_pair_ids(output_path: Path) -> Set[str]:
+    """
+    Reads a results file and returns the pairs that already have a report.
+    Unparsable lines (e.g. the last line of an interrupted run) are ignored.
+    """
+    completed: Set[str] = set()
+    if not output_path.is_file():
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("report") is not None:
+                completed.add(record["pair_id"])
+    return completed
+
+
+def count_results(output_path: Path) -> Dict[str, int]:
+    """
+    Progress of a results file: pairs whose latest record has a report ('completed')
+    and pairs whose latest record is an error ('errored').
+    """
+    latest: Dict[str, bool] = {}
+    if output_path.is_file():
+        with open(output_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                latest[record["pair_id"]] = record.get("report") is not None
+    completed = sum(latest.values())
+    return {"completed": completed, "errored": len(latest) - completed}
+
+
+def _ensure_trailing_newline(output_path: Path):
+    """An interrupted write can leave a partial last line; start the next record on a fresh line."""
+    if output_path.is_file() and output_path.stat().st_size > 0:
+        with open(output_path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+# ===================================================================
+# SECTION 2: Per-Pair Verification (runs in worker processes)
+# ===================================================================
+
+def build_report_from_events(events: List[Dict[str, Any]], nsv_filename: str, sv_filename: str) -> VerificationReport:
+    """
+    Folds the event stream of `run_verification_workflow` into a `VerificationReport`.
+
+    Stage 3 audits are used as-is. Pages settled in Stage 2 (static pages) are
+    converted to an equivalent `PageAuditResult`. Pages without a counterpart in the
+    other document are listed as removed or inserted.
+    """
+    pages: Dict[int, PageAuditResult] = {}
+    page_count = 0
+    overall_status = "Failure"
+    unmatched: Dict[str, List[int]] = {"removed_pages": [], "inserted_pages": []}
+    llm_usage = None
+    for event in events:
+        if event["type"] == "process_step_result":
+            stage_id, result = event["data"]["stage_id"], event["data"]["result"]
+            if stage_id == "page_alignment":
+                unmatched = {key: result[key] for key in unmatched}
+                continue
+            page_number = result["page_number"]
+            if stage_id == "requirement_analysis":
+                page_count = max(page_count, page_number)
+            elif stage_id == "multimodal_audit":
+                pages[page_number] = PageAuditResult.model_validate(result)
+            elif stage_id == "content_verification":
+                differences = []
+                if result.get("verification_status") != "Verified":
+                    differences.append(AuditedContentDifference(nsv_text="", sv_text="", description=result.get("summary", "")))
+                pages[page_number] = PageAuditResult(
+                    page_number=page_number,
+                    page_status="Verified" if not differences else "Content Mismatch",
+                    content_differences=differences,
+                )
+        elif event["type"] == "workflow_complete":
+            overall_status = "Success"
+        if event["type"] in ("workflow_complete", "verification_failed", "error"):
+            llm_usage = (event.get("data") or {}).get("llm_usage", llm_usage)
+
+    return VerificationReport(
+        overall_status=overall_status,
+        nsv_filename=nsv_filename,
+        sv_filename=sv_filename,
+        page_count=page_count,
+        page_results=[pages[n] for n in sorted(pages)],
+        llm_usage=llm_usage,
+        **unmatched,
+    )
+
+
+async def _collect_events(generator) -> List[Dict[str, Any]]:
+    return [event async for event in generator]
+
+
+def _init_worker():
+    # Spawned workers start with no logging configuration.
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+
+
+def verify_pair(pair: Dict[str, Any], temp_base: str, keep_artifacts: bool = False) -> Dict[str, Any]:
+    """
+    Verifies one pair and returns a `BatchPairResult` as a JSON-compatible dict.
+    Never raises: any failure is reported in the result's 'error' field.
+    """
+    from .verification_service import run_verification_workflow
+
+    start = time.perf_counter()
+    batch_pair = BatchPair.model_validate(pair)
+    result = BatchPairResult(pair_id=batch_pair.pair_id)
+    try:
+        nsv_path, sv_path = Path(batch_pair.nsv_path), Path(batch_pair.sv_path)
+        handler = TemporaryFileHandler(base_path=temp_base)
+        handler.setup()
+        try:
+            events = asyncio.run(_collect_events(run_verification_workflow(
+                handler=handler,
+                nsv_file_bytes=nsv_path.read_bytes(),
+                nsv_filename=nsv_path.name,
+                sv_file_bytes=sv_path.read_bytes(),
+                sv_filename=sv_path.name,
+            )))
+        finally:
+            if not keep_artifacts:
+                handler.cleanup()
+
+        errors = [event["message"] for event in events if event["type"] == "error"]
+        if errors:
+            result.error = errors[-1]
+        else:
+            result.report = build_report_from_events(events, nsv_path.name, sv_path.name)
+    except Exception as e:
+        logger.exception(f"Batch pair '{batch_pair.pair_id}' could not be processed.")
+        result.error = f"{type(e).__name__}: {e}"
+    result.elapsed_seconds = round(time.perf_counter() - start, 3)
+    return result.model_dump(mode="json")
+
+
+# ===================================================================
+# SECTION 3: Batch Runner
+# ===================================================================
+
+def _warn_if_limit_is_per_process(max_workers: int):
+    shared_state_config = load_settings()['config']['application'].get('shared_state') or {}
+    backend = os.getenv("SHARED_STATE_BACKEND", shared_state_config.get("backend", "sqlite"))
+    if backend == "memory" and max_workers > 1:
+        logger.warning(
+            "The 'memory' shared-state backend is per process: each of the "
+            f"{max_workers} workers will apply its own LLM concurrency limit."
+        )
+
+
+def run_batch(
+    pairs: List[BatchPair],
+    output_path: Path,
+    max_workers: int,
+    batch_id: Optional[str] = None,
+    temp_base: Optional[str] = None,
+    keep_artifacts: bool = False,
+    resume: bool = True,
+) -> BatchSummary:
+    """
+    Verifies `pairs` across a process pool and appends each result to `output_path`.
+
+    Args:
+        pairs (List[BatchPair]): The pairs to verify. pair_ids must be unique.
+        output_path (Path): The JSON Lines results file, which is also the checkpoint.
+        max_workers (int): Number of worker processes.
+        batch_id (Optional[str]): Reported in the summary; defaults to a hash of the pairs.
+        temp_base (Optional[str]): Where workers render pages; defaults to application.temp_storage_path.
+        keep_artifacts (bool): Keep each pair's rendered pages and debug outputs.
+        resume (bool): Skip pairs that already have a report in `output_path`.
+            If False, the file is overwritten.
+
+    Returns:
+        BatchSummary: Totals and the results of this run.
+    """
+    pair_ids = [pair.pair_id for pair in pairs]
+    if len(set(pair_ids)) != len(pair_ids):
+        raise ValueError("Batch pair_ids must be unique.")
+
+    config = load_settings()['config']
+    temp_base = temp_base or config['application']['temp_storage_path']
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if resume:
+        completed = load_completed_pair_ids(output_path)
+        _ensure_trailing_newline(output_path)
+    else:
+        completed = set()
+        output_path.write_text("", encoding="utf-8")
+    pending = [pair for pair in pairs if pair.pair_id not in completed]
+
+    summary = BatchSummary(
+        batch_id=batch_id or default_batch_id(pairs),
+        output_path=str(output_path),
+        total=len(pairs),
+        skipped=len(pairs) - len(pending),
+    )
+    logger.info(f"Batch {summary.batch_id}: {len(pending)} pair(s) to verify, {summary.skipped} already done, {max_workers} worker(s).")
+    if not pending:
+        return summary
+    _warn_if_limit_is_per_process(max_workers)
+
+    start = time.perf_counter()
+    # 'spawn' gives every worker a clean interpreter: no inherited locks, sockets or SQLite handles.
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker) as pool:
+        futures = {pool.submit(verify_pair, pair.model_dump(), temp_base, keep_artifacts): pair for pair in pending}
+        with open(output_path, "a", encoding="utf-8") as out:
+            for done, future in enumerate(as_completed(futures), start=1):
+                pair = futures[future]
+                try:
+                    result = BatchPairResult.model_validate(future.result())
+                except Exception as e:
+                    # E.g. a worker died (BrokenProcessPool); the pair is retried on resume.
+                    result = BatchPairResult(pair_id=pair.pair_id, error=f"{type(e).__name__}: {e}")
+                out.write(result.model_dump_json() + "\n")
+                out.flush()
+                os.fsync(out.fileno())
+
+                if result.error:
+                    summary.errored += 1
+                elif result.report.overall_status == "Success":
+                    summary.succeeded += 1
+                else:
+                    summary.failed += 1
+                summary.results.append(result)
+                status = "error" if result.error else result.report.overall_status
+                logger.info(f"[{done}/{len(pending)}] {pair.pair_id}: {status} ({result.elapsed_seconds:.1f}s)")
+
+    summary.elapsed_seconds = round(time.perf_counter() - start, 3)
+    return summary
+
+
+# ===================================================================
+# Command-Line Entry Point
+# ===================================================================
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Verify a directory (or manifest) of archived NSV/SV pairs.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("input_dir", nargs="?", type=Path, help="Directory of '<pair_id>/' folders holding both PDFs.")
+    source.add_argument("--manifest", type=Path, help="A JSON file with the same shape as the batch API request body.")
+    parser.add_argument("--output", type=Path, help="Results file (JSON Lines). Defaults to '<application.batch.output_dir>/<batch_id>.jsonl'.")
+    parser.add_argument("--workers", type=int, help="Worker processes. Defaults to application.batch.max_workers.")
+    parser.add_argument("--nsv-name", default="nsv.pdf")
+    parser.add_argument("--sv-name", default="sv.pdf")
+    parser.add_argument("--no-resume", action="store_true", help="Start over instead of skipping pairs already in the results file.")
+    parser.add_argument("--keep-artifacts", action="store_true", help="Keep rendered pages and debug outputs of every pair.")
+    args = parser.parse_args(argv)
+
+    _init_worker()
+    from .schemas import BatchManifest
+
+    batch_config = load_settings()['config']['application'].get('batch') or {}
+    if args.manifest:
+        manifest = BatchManifest.model_validate_json(args.manifest.read_text(encoding="utf-8"))
+        pairs, batch_id, workers = manifest.pairs, manifest.batch_id, manifest.max_workers
+    else:
+        pairs, batch_id, workers = discover_pairs(args.input_dir, args.nsv_name, args.sv_name), None, None
+    batch_id = batch_id or default_batch_id(pairs)
+    workers = args.workers or workers or batch_config.get('max_workers', 4)
+    output_path = args.output or Path(batch_config.get('output_dir', 'batch_outputs')) / f"{batch_id}.jsonl"
+
+    summary = run_batch(
+        pairs, output_path, max_workers=workers, batch_id=batch_id,
+        keep_artifacts=args.keep_artifacts, resume=not args.no_resume,
+    )
+    print(summary.model_dump_json(indent=2, exclude={"results"}))
+    return 0 if summary.errored == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
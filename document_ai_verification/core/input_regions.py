@@ -0,0 +1,232 @@
+# document_ai_verification/core/input_regions.py
+
+"""
+Deterministic verification of dynamic pages through input-region masking.
+
+Each required input's marker (e.g. 'Signature:') is located on the original page and
+turned into an allowed-change region. If every pixel and text-layer difference falls
+inside those regions, and every region received new ink, the page is verified
+without a multimodal LLM audit. Anything else is left to the LLM.
+
+When the page as a whole cannot be verified, signature, initials and checkbox
+inputs are still scored one by one from the ink added near their markers. Inputs
+that are clearly filled are decided locally; all others, including those that look
+empty (the marker may have been located in the wrong place), go to the vision model.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..ai.llm.schemas import AuditedInput, PageAuditResult, PageHolisticAnalysis, RequiredInput
+from ..utils.image_utils import count_new_ink_pixels, find_difference_bboxes_outside_regions, score_input_fill
+from ..utils.layout_utils import WordBox, build_input_region, is_leader, locate_marker, text_changes_outside_regions
+
+logger = logging.getLogger(__name__)
+
+
+def _not_verified(reason: str, regions: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    return {"verified": False, "reason": reason, "regions": regions or [], "audit_result": None}
+
+
+def locate_input_regions(
+    requirements: PageHolisticAnalysis,
+    nsv_words: Sequence[WordBox],
+    image_shape: tuple,
+    settings: Optional[Dict[str, Any]] = None,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Builds one allowed-change region per required input.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: Entries with 'input' (the RequiredInput), 'marker_bbox',
+        'marker_indices' and 'region', or None if any marker cannot be found on the page.
+    """
+    settings = settings or {}
+    used_indices: List[int] = []
+    regions = []
+    for required in requirements.required_inputs:
+        located = locate_marker(
+            required.marker_text, nsv_words,
+            min_similarity=settings.get('marker_min_similarity', 0.85),
+            skip_indices=used_indices,
+        )
+        if located is None:
+            logger.info(f"Marker '{required.marker_text}' not found in the page text.")
+            return None
+        marker_bbox, marker_indices = located
+        used_indices.extend(marker_indices)
+        regions.append({
+            "input": required,
+            "marker_bbox": marker_bbox,
+            "marker_indices": marker_indices,
+            "region": build_input_region(
+                marker_bbox, marker_indices, nsv_words, image_shape,
+                left_marker_heights=settings.get('left_marker_heights', 2.5),
+                above_marker_heights=settings.get('above_marker_heights', 2.5),
+                below_marker_heights=settings.get('below_marker_heights', 1.5),
+                max_right_page_ratio=settings.get('max_right_page_ratio', 0.45),
+            ),
+        })
+    return regions
+
+
+def verify_page_by_input_regions(
+    page_number: int,
+    nsv_img: np.ndarray,
+    sv_img: np.ndarray,
+    nsv_words: Sequence[WordBox],
+    sv_words: Sequence[WordBox],
+    requirements: PageHolisticAnalysis,
+    settings: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Tries to verify a dynamic page without the LLM.
+
+    Args:
+        page_number (int): 1-indexed page number, for the audit result.
+        nsv_img, sv_img (np.ndarray): The page renders (grayscale or BGR, same DPI).
+        nsv_words, sv_words (Sequence[WordBox]): Text-layer words of each page.
+        requirements (PageHolisticAnalysis): The Stage 1 analysis of the original page.
+        settings (Optional[Dict]): The 'application.input_regions' config section.
+
+    Returns:
+        Dict[str, Any]: 'verified' (bool), 'reason' (str), 'regions' (list of region
+        dicts) and 'audit_result' (a Verified PageAuditResult, or None).
+    """
+    settings = settings or {}
+    if nsv_img is None or sv_img is None or nsv_img.shape != sv_img.shape:
+        return _not_verified("page renders differ in size")
+    if not nsv_words or not sv_words:
+        return _not_verified("no text layer to locate input markers")
+    if not requirements.required_inputs:
+        return _not_verified("no required inputs on the page")
+
+    regions = locate_input_regions(requirements, nsv_words, nsv_img.shape, settings)
+    if regions is None:
+        return _not_verified("an input marker could not be located")
+    allowed = [r["region"] for r in regions]
+
+    # Original words (other than the markers themselves) stay protected even inside a region.
+    marker_indices = {i for r in regions for i in r["marker_indices"]}
+    protected = [w.bbox for i, w in enumerate(nsv_words) if i not in marker_indices and not is_leader(w)]
+    outside = find_difference_bboxes_outside_regions(nsv_img, sv_img, allowed, protected)
+    if outside:
+        return _not_verified(f"{len(outside)} visual change(s) outside the input areas", regions)
+
+    text_changes = text_changes_outside_regions(nsv_words, sv_words, allowed)
+    if text_changes:
+        return _not_verified(f"text changed outside the input areas: {text_changes[0]}", regions)
+
+    min_ink_pixels = settings.get('min_ink_pixels', 30)
+    audited_inputs = []
+    for entry in regions:
+        ink_pixels = count_new_ink_pixels(nsv_img, sv_img, entry["region"])
+        entry["ink_pixels"] = ink_pixels
+        if ink_pixels < min_ink_pixels:
+            return _not_verified(f"no ink found in the input area of '{entry['input'].marker_text}'", regions)
+        audited_inputs.append(AuditedInput(
+            input_type=entry["input"].input_type,
+            marker_text=entry["input"].marker_text,
+            is_fulfilled=True,
+            audit_notes=(
+                f"Verified by input-region check: new ink ({ink_pixels} px) in the input area next to "
+                f"'{entry['input'].marker_text}', and no changes elsewhere on the page."
+            ),
+        ))
+
+    return {
+        "verified": True,
+        "reason": "all changes are inside input areas and every input area has ink",
+        "regions": regions,
+        "audit_result": PageAuditResult(
+            page_number=page_number,
+            page_status="Verified",
+            required_inputs=audited_inputs,
+            content_differences=[],
+        ),
+    }
+
+
+def pre_answer_inputs(
+    nsv_img: np.ndarray,
+    sv_img: np.ndarray,
+    requirements: PageHolisticAnalysis,
+    regions: Optional[List[Dict[str, Any]]],
+    settings: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[AuditedInput], List[RequiredInput], List[Dict[str, Any]]]:
+    """
+    Decides the inputs that the pixels alone show to be filled. An input that looks empty
+    is left to the LLM: its area comes from fuzzy marker matching and may be misplaced.
+
+    Args:
+        nsv_img, sv_img (np.ndarray): The page renders (grayscale or BGR, same DPI).
+        requirements (PageHolisticAnalysis): The Stage 1 analysis of the original page.
+        regions (Optional[List[Dict]]): The located input regions (see `locate_input_regions`),
+            or None if the markers could not be located; then every input stays undecided.
+        settings (Optional[Dict]): The 'application.input_regions.fill_detection' config section.
+
+    Returns:
+        Tuple: The AuditedInputs decided locally, the RequiredInputs left for the LLM,
+        and the per-input scores (for the debug output).
+    """
+    settings = settings or {}
+    if not settings.get('enabled', True) or regions is None or nsv_img is None or sv_img is None or nsv_img.shape != sv_img.shape:
+        return [], list(requirements.required_inputs), []
+
+    input_types = {t.lower() for t in settings.get('input_types', ["signature", "initials", "checkbox"])}
+    filled_at = settings.get('filled_score', 0.9)
+    answered, undecided, scores = [], [], []
+    for entry in regions:
+        required = entry["input"]
+        if required.input_type.strip().lower() not in input_types:
+            undecided.append(required)
+            continue
+        fill = score_input_fill(nsv_img, sv_img, entry["region"], entry["marker_bbox"], required.input_type)
+        scores.append({"marker_text": required.marker_text, "input_type": required.input_type, **fill})
+        if fill["score"] < filled_at:
+            undecided.append(required)
+            continue
+        where = "inside the box" if fill["method"] == "checkbox_interior" else "in the input area"
+        answered.append(AuditedInput(
+            input_type=required.input_type,
+            marker_text=required.marker_text,
+            is_fulfilled=True,
+            audit_notes=(
+                f"Decided by local ink detection: {fill['ink_pixels']} px of new ink {where} next to "
+                f"'{required.marker_text}' (fill score {fill['score']:.2f}), so the input is filled."
+            ),
+        ))
+    return answered, undecided, scores
+
+
+def page_status_for(input_missing: bool, content_mismatch: bool) -> str:
+    """The PageStatus for a page with missing inputs and/or content differences."""
+    if input_missing and content_mismatch:
+        return "Input Missing and Content Mismatch"
+    if input_missing:
+        return "Input Missing"
+    if content_mismatch:
+        return "Content Mismatch"
+    return "Verified"
+
+
+def merge_pre_answered(audit_result: PageAuditResult, answered: Sequence[AuditedInput]) -> PageAuditResult:
+    """
+    Adds the locally decided inputs to an LLM audit of the remaining ones, replacing any
+    entry the model wrote for the same marker.
+
+    The model's page status is kept and can only get worse: a missing input adds
+    'Input Missing', content differences add 'Content Mismatch'. A page the model did
+    not verify is never turned into a verified one.
+    """
+    decided = {a.marker_text for a in answered}
+    required_inputs = list(answered) + [a for a in audit_result.required_inputs if a.marker_text not in decided]
+    model_status = audit_result.page_status
+    input_missing = "Input Missing" in model_status or any(not a.is_fulfilled for a in required_inputs)
+    content_mismatch = "Content Mismatch" in model_status or bool(audit_result.content_differences)
+    return audit_result.model_copy(update={
+        "required_inputs": required_inputs,
+        "page_status": page_status_for(input_missing, content_mismatch),
+    })
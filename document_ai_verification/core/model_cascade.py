@@ -0,0 +1,130 @@
+# document_ai_verification/core/model_cascade.py
+
+"""
+Model cascade: a small text-only model tries each LLM stage before the vision model.
+
+The Markdown (or text layer) of a digital page usually tells whether an input was
+filled, so Stage 1 (requirement analysis) and Stage 3 (audit) first ask a cheap
+text model through `invoke_structured`. It answers in the vision model's schema
+plus a confidence; the answer is used when the confidence reaches `min_confidence`,
+and the page goes to the vision model otherwise. Scanned pages (no text) always go
+to the vision model, and so do:
+    - audits of inputs only an image can show (signatures, checkboxes, ...), which
+      the ink detection could not settle,
+    - text audits that do not answer every input they were asked about,
+    - failing text audits, unless `accept_failures` is set: a failure ends the
+      verification, so the vision model confirms it.
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Optional, Type, TypeVar, TYPE_CHECKING
+
+from pydantic import BaseModel
+
+from ..ai.llm.prompts import get_text_audit_prompt, get_text_requirement_analysis_prompt
+from ..ai.llm.schemas import PageAuditResult, PageHolisticAnalysis, TextPageAuditResult, TextPageHolisticAnalysis
+
+if TYPE_CHECKING:
+    from ..ai.llm.client import LLMService
+
+logger = logging.getLogger(__name__)
+
+CASCADE_STAGES = ("requirement_analysis", "multimodal_audit")
+DEFAULT_VISUAL_INPUT_TYPES = ("signature", "initials", "checkbox", "stamp", "seal")
+
+TextAnswer = TypeVar("TextAnswer", bound=BaseModel)
+
+
+class ModelCascade:
+    """
+    The text-only first pass of the LLM stages.
+
+    Args:
+        client (LLMService): The small text model.
+        settings (dict): The `ai_services.llm.cascade` section of config.yml.
+    """
+    def __init__(self, client: "LLMService", settings: Optional[Dict[str, Any]] = None):
+        settings = settings or {}
+        self.client = client
+        self.min_confidence = settings.get('min_confidence', 0.85)
+        self.stages = set(settings.get('stages') or CASCADE_STAGES)
+        self.accept_failures = settings.get('accept_failures', False)
+        self.visual_input_types = {t.lower() for t in settings.get('visual_input_types') or DEFAULT_VISUAL_INPUT_TYPES}
+        # Per stage: answers used, pages sent on to the vision model, and text calls that failed.
+        self._outcomes: Dict[str, Dict[str, int]] = defaultdict(lambda: {"accepted": 0, "escalated": 0, "failed": 0})
+        self._lock = threading.Lock()
+
+    def covers(self, stage: str) -> bool:
+        return stage in self.stages
+
+    def _count(self, stage: str, outcome: str):
+        with self._lock:
+            self._outcomes[stage][outcome] += 1
+
+    def _ask(self, stage: str, prompt: str, response_model: Type[TextAnswer]) -> Optional[TextAnswer]:
+        """The text model's answer if it is confident enough, else None (counted as escalated)."""
+        try:
+            answer = self.client.invoke_structured(prompt=prompt, response_model=response_model)
+        except Exception as e:
+            # The vision model answers instead; a broken text model must not fail the request.
+            logger.warning(f"Cascade model failed during {stage}; using the vision model: {e}")
+            self._count(stage, "failed")
+            return None
+        if answer.confidence < self.min_confidence:
+            logger.info(f"Cascade model not confident enough for {stage} ({answer.confidence:.2f} < {self.min_confidence}); using the vision model.")
+            self._count(stage, "escalated")
+            return None
+        return answer
+
+    def analyze_requirements(self, page_text: str) -> Optional[PageHolisticAnalysis]:
+        """Stage 1 from the page text, or None when the vision model has to answer."""
+        if not page_text or not page_text.strip():
+            return None
+        answer = self._ask("requirement_analysis", get_text_requirement_analysis_prompt(page_text), TextPageHolisticAnalysis)
+        if answer is None:
+            return None
+        self._count("requirement_analysis", "accepted")
+        return PageHolisticAnalysis.model_validate(answer.model_dump(exclude={"confidence"}))
+
+    def audit(self, content_difference: str, requirements: PageHolisticAnalysis, page_number: int) -> Optional[PageAuditResult]:
+        """Stage 3 from the text difference, or None when the vision model has to answer."""
+        visual = _visual_inputs(requirements.required_inputs, self.visual_input_types)
+        if visual:
+            logger.info(f"Page {page_number}: {', '.join(visual)} can only be audited on the image; using the vision model.")
+            self._count("multimodal_audit", "escalated")
+            return None
+        answer = self._ask(
+            "multimodal_audit",
+            get_text_audit_prompt(content_difference, requirements.model_dump(), page_number),
+            TextPageAuditResult,
+        )
+        if answer is None:
+            return None
+        result = PageAuditResult.model_validate(answer.model_dump(exclude={"confidence"}))
+        answered = {audited.marker_text for audited in result.required_inputs}
+        unanswered = [required.marker_text for required in requirements.required_inputs if required.marker_text not in answered]
+        if unanswered:
+            logger.info(f"Page {page_number}: the cascade model left {len(unanswered)} input(s) unaudited; using the vision model.")
+            self._count("multimodal_audit", "escalated")
+            return None
+        if result.page_status != "Verified" and not self.accept_failures:
+            logger.info(f"Page {page_number}: the cascade model found '{result.page_status}'; confirming with the vision model.")
+            self._count("multimodal_audit", "escalated")
+            return None
+        self._count("multimodal_audit", "accepted")
+        return result.model_copy(update={"page_number": page_number})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "model": self.client.model,
+                "min_confidence": self.min_confidence,
+                "stages": {stage: dict(outcomes) for stage, outcomes in self._outcomes.items()},
+            }
+
+
+def _visual_inputs(required_inputs: Iterable[Any], visual_input_types: set) -> list:
+    """Markers of the inputs whose fill only shows on the image."""
+    return [required.marker_text for required in required_inputs if required.input_type.lower() in visual_input_types]
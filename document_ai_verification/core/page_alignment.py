@@ -0,0 +1,156 @@
+# document_ai_verification/core/page_alignment.py
+
+"""
+Pairs the pages of the original (NSV) and signed (SV) documents before verification.
+
+Page N of one document is not always page N of the other: a cover page may have
+been inserted, or a page dropped. Each page is fingerprinted by its text
+(normalized tokens and their hash) and a perceptual hash of its render, and the two
+page sequences are aligned by dynamic programming (a global alignment in which
+pages keep their order). Pages without a counterpart are reported as inserted
+(only in the SV) or removed (only in the NSV); only the aligned pairs go through
+the regular verification.
+
+Documents with the same page count whose pages match one to one with a high
+similarity skip the full alignment, which is the common case. The bar for that
+shortcut is well above `min_similarity`: different pages of one contract share
+much of their wording, so a shifted page can still look fairly similar.
+"""
+
+import difflib
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from ..utils.text_utils import text_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# 256-bit hashes: 8x8 hashes of two text pages with similar layouts are too often alike.
+DHASH_SIZE = 16
+
+
+class PageFingerprint(NamedTuple):
+    """What a page is recognized by."""
+    page_num: int
+    text_sha256: str
+    tokens: Tuple[str, ...]
+    image_dhash: Optional[str]
+
+
+class PageAlignment(NamedTuple):
+    """The outcome of aligning two documents. Page numbers are 1-indexed."""
+    pairs: List[Tuple[int, int, float]]  # (NSV page, SV page, similarity)
+    removed: List[int]                    # NSV pages missing from the SV
+    inserted: List[int]                   # SV pages that are not in the NSV
+
+    @property
+    def is_identity(self) -> bool:
+        return not self.removed and not self.inserted and all(nsv == sv for nsv, sv, _ in self.pairs)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pairs": [{"nsv_page": nsv, "sv_page": sv, "similarity": round(similarity, 3)} for nsv, sv, similarity in self.pairs],
+            "removed_pages": self.removed,
+            "inserted_pages": self.inserted,
+        }
+
+
+def fingerprint_pages(page_bundles: Sequence[Dict[str, Any]]) -> List[PageFingerprint]:
+    """Fingerprints page bundles (see `TemporaryFileHandler.extract_content_per_page`)."""
+    import cv2
+    from ..utils.image_utils import compute_dhash
+
+    fingerprints = []
+    for bundle in page_bundles:
+        text = bundle.get('markdown_text') or ""
+        # A dHash only needs a few hundred pixels: decode at a quarter of the size.
+        image = cv2.imread(str(bundle['image_path']), cv2.IMREAD_REDUCED_GRAYSCALE_4)
+        fingerprints.append(PageFingerprint(
+            page_num=bundle['page_num'],
+            text_sha256=text_fingerprint(text),
+            tokens=tuple(text.casefold().split()),
+            image_dhash=compute_dhash(image, hash_size=DHASH_SIZE) if image is not None else None,
+        ))
+    return fingerprints
+
+
+def _image_similarity(a: Optional[str], b: Optional[str]) -> Optional[float]:
+    """dHash agreement, rescaled so that unrelated pages (about half the bits equal) score 0."""
+    if not a or not b or len(a) != len(b):
+        return None
+    bits = len(a) * 4
+    distance = bin(int(a, 16) ^ int(b, 16)).count("1")
+    return max(0.0, 1.0 - 2.0 * distance / bits)
+
+
+def page_similarity(a: PageFingerprint, b: PageFingerprint, text_weight: float = 0.7) -> float:
+    """
+    How likely two pages are the same page, in [0, 1]. Text decides when both pages have
+    a text layer (filled-in values change it only slightly); the render's perceptual hash
+    covers scanned pages.
+    """
+    image = _image_similarity(a.image_dhash, b.image_dhash)
+    if a.tokens and b.tokens:
+        if a.text_sha256 == b.text_sha256:
+            text = 1.0
+        else:
+            # Bag-of-tokens overlap: cheap, and insensitive to the reflow a filled field causes.
+            text = difflib.SequenceMatcher(None, a.tokens, b.tokens, autojunk=False).quick_ratio()
+        return text if image is None else text_weight * text + (1.0 - text_weight) * image
+    return image if image is not None else 0.0
+
+
+def align_pages(
+    nsv_pages: Sequence[PageFingerprint],
+    sv_pages: Sequence[PageFingerprint],
+    min_similarity: float = 0.5,
+    text_weight: float = 0.7,
+    identity_similarity: float = 0.9
+) -> PageAlignment:
+    """
+    Aligns two documents page by page.
+
+    Pairs below `min_similarity` are never matched. Among order-preserving alignments,
+    the one with the largest total margin above `min_similarity` wins, so a page is left
+    unmatched rather than paired with a page it merely resembles. Documents of equal
+    length whose pages all reach `identity_similarity` against the same page number are
+    paired page by page without the full comparison.
+    """
+    n, m = len(nsv_pages), len(sv_pages)
+    if n == m:
+        diagonal = [page_similarity(a, b, text_weight) for a, b in zip(nsv_pages, sv_pages)]
+        if all(similarity >= identity_similarity for similarity in diagonal):
+            return PageAlignment(
+                pairs=[(a.page_num, b.page_num, s) for a, b, s in zip(nsv_pages, sv_pages, diagonal)],
+                removed=[], inserted=[],
+            )
+
+    similarity = [[page_similarity(a, b, text_weight) for b in sv_pages] for a in nsv_pages]
+    # score[i][j]: best alignment of the first i NSV pages with the first j SV pages.
+    score = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            best = max(score[i - 1][j], score[i][j - 1])
+            s = similarity[i - 1][j - 1]
+            if s >= min_similarity:
+                best = max(best, score[i - 1][j - 1] + (s - min_similarity) + 1e-6)
+            score[i][j] = best
+
+    pairs, removed, inserted = [], [], []
+    i, j = n, m
+    while i > 0 and j > 0:
+        s = similarity[i - 1][j - 1]
+        if s >= min_similarity and abs(score[i][j] - (score[i - 1][j - 1] + (s - min_similarity) + 1e-6)) < 1e-9:
+            pairs.append((nsv_pages[i - 1].page_num, sv_pages[j - 1].page_num, s))
+            i, j = i - 1, j - 1
+        elif score[i][j] == score[i - 1][j]:
+            removed.append(nsv_pages[i - 1].page_num)
+            i -= 1
+        else:
+            inserted.append(sv_pages[j - 1].page_num)
+            j -= 1
+    removed.extend(page.page_num for page in nsv_pages[:i])
+    inserted.extend(page.page_num for page in sv_pages[:j])
+    alignment = PageAlignment(pairs=pairs[::-1], removed=sorted(removed), inserted=sorted(inserted))
+    logger.info(f"Aligned {n} NSV and {m} SV pages: {len(pairs)} pair(s), removed {alignment.removed}, inserted {alignment.inserted}.")
+    return alignment
@@ -0,0 +1,105 @@
+# document_ai_verification/core/result_cache.py
+
+"""
+Cache of whole verification results, so a resubmitted NSV/SV pair (a refresh, a
+double click, a downstream re-check) is answered by replaying the stored events.
+
+Entries live in the shared cache (see `utils.shared_state`) under a key derived
+from both documents' SHA-256, the pipeline version, a fingerprint of the
+configuration, the model and the render DPI. Only runs that reached a verdict
+(`workflow_complete` or `verification_failed`) are stored; runs that ended with an
+`error` event are not.
+
+Events can carry /temp URLs of diff visuals, which point into the original
+request's temp directory and stop working once it is cleaned up. The entry
+therefore also records what those visuals show (page and difference boxes), and a
+replay writes fresh diff specs into the new request's directory and rewrites the
+URLs to it; the visuals are then rendered on first request, as usual.
+"""
+
+import json
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+
+from ..utils.file_utils import TemporaryFileHandler
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change to the pipeline can change its verdicts or events.
+PIPELINE_VERSION = "2026.10.2"
+
+# Progress messages are not replayed; everything else is.
+_NOT_RECORDED = {"status_update"}
+_VERDICT_EVENTS = {"workflow_complete", "verification_failed"}
+
+
+def result_cache_key(nsv_sha256: str, sv_sha256: str, config: Dict[str, Any], model: str, dpi: int) -> str:
+    """The cache key of a verification run. Any configuration change invalidates earlier results."""
+    config_fingerprint = hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    digest = hashlib.sha256(json.dumps({
+        "nsv": nsv_sha256,
+        "sv": sv_sha256,
+        "pipeline": PIPELINE_VERSION,
+        "config": config_fingerprint,
+        "model": model,
+        "dpi": dpi,
+    }, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"verification_result:{digest}"
+
+
+class ResultRecorder:
+    """Collects the replayable events of a live run and builds the cache entry from them."""
+    def __init__(self, handler: TemporaryFileHandler):
+        self.handler = handler
+        self.events: List[Dict[str, Any]] = []
+
+    def record(self, event: Dict[str, Any]):
+        if event.get("type") not in _NOT_RECORDED:
+            self.events.append(event)
+
+    def entry(self) -> Optional[Dict[str, Any]]:
+        """The cache entry, or None if the run did not reach a verdict."""
+        if not self.events or self.events[-1].get("type") not in _VERDICT_EVENTS:
+            return None
+        return {
+            "request_id": self.handler.request_id,
+            "events": self.events,
+            "diff_pages": self._diff_pages(),
+        }
+
+    def _diff_pages(self) -> List[Dict[str, Any]]:
+        """Page numbers (original and signed), directory and boxes of every diff visual referenced by the events."""
+        from ..utils.image_utils import DIFF_SPEC_FILENAME
+
+        prefix = f"/temp/{self.handler.request_id}/"
+        pages = []
+        for event in self.events:
+            result = (event.get("data") or {}).get("result") or {}
+            url = result.get("original_diff_url") if isinstance(result, dict) else None
+            if not url or not url.startswith(prefix):
+                continue
+            diff_dir = url[len(prefix):].rsplit("/", 1)[0]
+            spec_path = self.handler.temp_dir / diff_dir / DIFF_SPEC_FILENAME
+            try:
+                bboxes = json.loads(spec_path.read_text(encoding="utf-8"))["bboxes"]
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Diff spec of {diff_dir} unreadable ({e}); its visuals will not survive a replay.")
+                continue
+            pages.append({
+                "page_number": result["page_number"],
+                "signed_page_number": result.get("signed_page_number", result["page_number"]),
+                "dir": diff_dir,
+                "bboxes": bboxes,
+            })
+        return pages
+
+
+def replay_events(entry: Dict[str, Any], handler: TemporaryFileHandler) -> List[Dict[str, Any]]:
+    """The stored events, with /temp URLs moved to the new request's directory."""
+    text = json.dumps(entry["events"])
+    text = text.replace(f"/temp/{entry['request_id']}/", f"/temp/{handler.request_id}/")
+    events = json.loads(text)
+    if events and events[-1].get("type") in _VERDICT_EVENTS:
+        events[-1].setdefault("data", {})["replayed_from_cache"] = True
+    return events
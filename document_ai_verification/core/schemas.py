@@ -1,12 +1,12 @@
 # document_ai_verification/core/schemas.py
 
-from typing import List, Literal
+from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, Field
 
 # Import the definitive PageAuditResult model from the LLM schemas.
 # This avoids duplication and ensures consistency between the AI's output
 # and the final API report.
-from ..ai.llm.schemas import PageAuditResult
+from ..ai.llm.schemas import PageAuditResult, PageHolisticAnalysis
 
 # --- Top-Level API Report Schemas ---
 
@@ -38,4 +38,90 @@ class VerificationReport(BaseModel):
     page_results: List[PageAuditResult] = Field(
         ..., 
         description="A list containing the detailed audit results for each page."
-    )
\ No newline at end of file
+    )
+    removed_pages: List[int] = Field(
+        default_factory=list,
+        description="Pages of the original document that have no counterpart in the signed document."
+    )
+    inserted_pages: List[int] = Field(
+        default_factory=list,
+        description="Pages of the signed document that have no counterpart in the original document."
+    )
+    llm_usage: Optional[Dict[str, Any]] = Field(
+        None,
+        description="LLM tokens used by the verification, per model, stage and page."
+    )
+
+# --- Batch Verification Schemas ---
+
+class BatchPair(BaseModel):
+    """One archived NSV/SV pair to verify. Paths are read on the server."""
+    pair_id: str = Field(..., description="A unique identifier for the pair; used to checkpoint and resume.")
+    nsv_path: str = Field(..., description="Path to the non-signed version PDF.")
+    sv_path: str = Field(..., description="Path to the signed version PDF.")
+
+class BatchManifest(BaseModel):
+    """The request body of the batch verification endpoint."""
+    pairs: List[BatchPair] = Field(..., description="The pairs to verify.")
+    batch_id: Optional[str] = Field(
+        None,
+        description="Names the results file. Re-submitting the same batch_id resumes it; defaults to a hash of the pairs."
+    )
+    max_workers: Optional[int] = Field(None, ge=1, description="Worker processes; defaults to application.batch.max_workers.")
+
+class BatchPairResult(BaseModel):
+    """One line of a batch results file (JSON Lines)."""
+    pair_id: str
+    report: Optional[VerificationReport] = Field(
+        None, description="The verification report, or None if the pair could not be processed."
+    )
+    error: Optional[str] = Field(None, description="Why the pair could not be processed. Such pairs are retried on resume.")
+    elapsed_seconds: float = 0.0
+
+class BatchSummary(BaseModel):
+    """Totals for a batch run."""
+    batch_id: str
+    output_path: str
+    total: int = Field(..., description="Pairs in the manifest.")
+    skipped: int = Field(..., description="Pairs already completed by an earlier run of the same batch.")
+    succeeded: int = 0
+    failed: int = Field(0, description="Pairs whose verification ran and reported a Failure.")
+    errored: int = Field(0, description="Pairs that could not be processed.")
+    elapsed_seconds: float = 0.0
+    results: List[BatchPairResult] = Field(default_factory=list, description="Results of this run, in completion order.")
+
+class BatchStatus(BaseModel):
+    """The state of a batch started through the API (POST /verify/batch)."""
+    batch_id: str
+    status: Literal["running", "completed", "failed", "interrupted"] = Field(
+        ..., description="'interrupted': the worker running the batch stopped before it finished; re-submit it to resume."
+    )
+    total: int = Field(..., description="Pairs in the manifest.")
+    completed: int = Field(0, description="Pairs with a report in the results file so far (including earlier runs).")
+    errored: int = Field(0, description="Pairs whose latest attempt could not be processed.")
+    status_url: str
+    results_url: str = Field(..., description="The results file (JSON Lines), readable while the batch runs.")
+    summary: Optional[BatchSummary] = Field(None, description="Totals of the run once it has completed, without the per-pair results.")
+    error: Optional[str] = Field(None, description="Why the batch failed.")
+
+
+# --- Template Registry Schemas ---
+
+class TemplatePage(BaseModel):
+    """Everything precomputed for one page of a registered NSV template."""
+    page_num: int
+    image_file: str = Field(..., description="The page render, relative to the template directory.")
+    markdown_text: str = Field("", description="The page's extracted Markdown (empty for scanned pages).")
+    text_sha256: str = Field(..., description="Whitespace-normalized text fingerprint.")
+    image_dhash: str = Field(..., description="Perceptual difference hash of the render.")
+    requirements: PageHolisticAnalysis = Field(..., description="The Stage 1 analysis of the page.")
+
+class TemplateRecord(BaseModel):
+    """A registered NSV template, stored under its template_id (the SHA-256 of the PDF)."""
+    template_id: str
+    nsv_filename: str
+    dpi: int = Field(..., description="The DPI of the stored renders; signed copies are rendered at the same DPI.")
+    model: str = Field(..., description="The LLM that produced the Stage 1 analyses.")
+    created_at: float
+    pages: List[TemplatePage]
+
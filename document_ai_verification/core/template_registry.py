@@ -0,0 +1,101 @@
+# document_ai_verification/core/template_registry.py
+
+import re
+import shutil
+import hashlib
+import logging
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .schemas import TemplateRecord
+
+logger = logging.getLogger(__name__)
+
+_TEMPLATE_ID_RE = re.compile(r"^[0-9a-f]{64}$")
+RECORD_FILENAME = "template.json"
+
+
+class TemplateRegistry:
+    """
+    File-based store of pre-registered NSV templates.
+
+    Layout:
+        <root>/<template_id>/nsv.pdf           The original PDF.
+        <root>/<template_id>/pages/*.png       Page renders at the registered DPI.
+        <root>/<template_id>/template.json     The TemplateRecord (Markdown, fingerprints, Stage 1).
+
+    A template directory only appears once it is complete: it is assembled in a
+    staging directory and renamed into place, so readers in other worker
+    processes never see a half-written template.
+    """
+    def __init__(self, root: str = "template_store"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def template_id_for(pdf_bytes: bytes) -> str:
+        """Templates are content-addressed: registering the same PDF twice yields the same id."""
+        return hashlib.sha256(pdf_bytes).hexdigest()
+
+    @staticmethod
+    def is_valid_id(template_id: str) -> bool:
+        return bool(template_id and _TEMPLATE_ID_RE.match(template_id))
+
+    def template_dir(self, template_id: str) -> Path:
+        if not self.is_valid_id(template_id):
+            raise ValueError(f"Invalid template id: '{template_id}'")
+        return self.root / template_id
+
+    def get(self, template_id: str) -> Optional[TemplateRecord]:
+        """Returns the registered template, or None if the id is unknown or malformed."""
+        if not self.is_valid_id(template_id):
+            return None
+        record_path = self.root / template_id / RECORD_FILENAME
+        if not record_path.is_file():
+            return None
+        return TemplateRecord.model_validate_json(record_path.read_text(encoding="utf-8"))
+
+    def page_bundles(self, record: TemplateRecord) -> List[Dict[str, Any]]:
+        """The template's pages in the same shape as `TemporaryFileHandler.extract_content_per_page`."""
+        template_dir = self.template_dir(record.template_id)
+        return [
+            {"page_num": page.page_num, "markdown_text": page.markdown_text, "image_path": template_dir / page.image_file}
+            for page in record.pages
+        ]
+
+    def save(self, record: TemplateRecord, page_images: Dict[int, Path], pdf_bytes: bytes) -> TemplateRecord:
+        """
+        Stores a template. `page_images` maps page numbers to renders, which are copied
+        to each page's `image_file`. If another process registered the same template
+        first, its copy is kept and returned.
+        """
+        target_dir = self.template_dir(record.template_id)
+        staging_dir = self.root / f".staging-{uuid.uuid4().hex}"
+        try:
+            (staging_dir / "pages").mkdir(parents=True)
+            (staging_dir / "nsv.pdf").write_bytes(pdf_bytes)
+            for page in record.pages:
+                shutil.copyfile(page_images[page.page_num], staging_dir / page.image_file)
+            (staging_dir / RECORD_FILENAME).write_text(record.model_dump_json(indent=2), encoding="utf-8")
+            try:
+                staging_dir.rename(target_dir)
+            except OSError:
+                if (target_dir / RECORD_FILENAME).is_file():
+                    logger.info(f"Template {record.template_id[:12]} was registered concurrently; keeping the existing copy.")
+                    return self.get(record.template_id)
+                raise
+        finally:
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
+        logger.info(f"Registered template {record.template_id[:12]} ({len(record.pages)} pages) at {target_dir}")
+        return record
+
+    def delete(self, template_id: str) -> bool:
+        """Removes a template. Returns False if it was not registered."""
+        target_dir = self.template_dir(template_id)
+        if not target_dir.exists():
+            return False
+        shutil.rmtree(target_dir)
+        logger.info(f"Deleted template {template_id[:12]}")
+        return True
@@ -1,44 +1,368 @@
+import os
+import time
 import asyncio
+import hashlib
 import logging
+import threading
+from collections import deque
 from pathlib import Path
 import json
-from typing import Dict, Any, List, Tuple, AsyncGenerator
+from typing import Dict, Any, List, Optional, Tuple, AsyncGenerator, Callable, Iterator, TYPE_CHECKING
 
-# --- Import your new image utils ---
-from ..utils.image_utils import analyze_page_meta_from_image, generate_difference_images
-from ..utils.text_utils import get_structured_diff_json
-import cv2
+from ..utils.text_utils import get_structured_diff_json, text_fingerprint
 
 # Import all other custom modules
 from ..utils.config_loader import load_settings
 from ..utils.file_utils import TemporaryFileHandler
-from ..ai.llm.client import LLMService
+from ..utils.render_utils import PageRenderer, RenderProfile, load_render_profiles
+from ..utils.shared_state import SharedState
+from ..utils.memory_utils import MemoryBudget, RssTracker, current_rss_bytes, decoded_image_bytes, peak_rss_bytes
+from ..ai.llm.usage import PROCESS_USAGE, UsageLedger, track_usage, usage_scope
+from .model_cascade import ModelCascade
 from ..ai.llm.prompts import (
     get_ns_document_analysis_prompt_holistic,
-    get_multimodal_audit_prompt
+    get_multimodal_audit_prompt,
+    get_region_audit_prompt
 )
 from ..ai.llm.schemas import (
     PageHolisticAnalysis,
     PageAuditResult,
     AuditedInput
 )
-from ..ai.ocr.client import extract_text_from_image, OcrAPIError
+from ..ai.ocr.client import extract_text_from_image, extract_text_from_regions, OcrAPIError
+from ..ai.cassette import CassetteStore
 from .exceptions import PageCountMismatchError, ContentMismatchError, DocumentVerificationError
-from .schemas import VerificationReport
+from .schemas import VerificationReport, TemplatePage, TemplateRecord
+from .template_registry import TemplateRegistry
+from .result_cache import ResultRecorder, replay_events, result_cache_key
+from .page_alignment import PageAlignment, align_pages, fingerprint_pages
+
+# OpenCV, numpy and the openai SDK are imported on first use, not at startup.
+if TYPE_CHECKING:
+    from ..ai.llm.client import LLMService
 
 
 # --- Setup ---
 logger = logging.getLogger(__name__)
-APP_SETTINGS = load_settings()
-SECRETS = APP_SETTINGS['secrets']
-CONFIG = APP_SETTINGS['config']
-LLM_CLIENT = LLMService(
-    api_key=SECRETS['llm_api_key'],
-    model=SECRETS['llm_model_name'],
-    base_url=SECRETS['llm_api_url'],
-    max_context_tokens=CONFIG['ai_services']['llm'].get('max_context_tokens', 64000),
-    max_img_height=CONFIG['ai_services']['llm'].get('max_img_height')
-)
+
+
+class _ServiceRuntime:
+    """
+    Settings, clients and shared state for one worker process.
+
+    Nothing here is built at import time: under gunicorn/uvicorn multi-worker
+    deployments the app may be imported in a parent process and then forked, and
+    HTTP connection pools or SQLite handles must not be shared across that fork.
+    """
+    def __init__(self):
+        app_settings = load_settings()
+        self.secrets = app_settings['secrets']
+        self.config = app_settings['config']
+        self.llm_settings = self.config['ai_services']['llm']
+        self.cassette = CassetteStore.from_config(self.config['ai_services'].get('cassette'))
+        shared_state_config = self.config['application'].get('shared_state') or {}
+        self.shared_state = SharedState(shared_state_config)
+        self.cache_ttl_seconds = shared_state_config.get('cache_ttl_seconds', 86400)
+        templates_config = self.config['application'].get('templates') or {}
+        self.template_registry = TemplateRegistry(templates_config.get('storage_path', 'template_store'))
+        memory_config = self.config['application'].get('memory') or {}
+        self.memory_budget = MemoryBudget(int(memory_config.get('page_budget_mb', 1024) * 2**20))
+        self.request_memory = deque(maxlen=memory_config.get('recent_requests', 50))
+        self.usage_settings = self.llm_settings.get('usage') or {}
+        self.cascade_settings = self.llm_settings.get('cascade') or {}
+        self._llm_client: Optional["LLMService"] = None
+        self._llm_client_lock = threading.Lock()
+        self._cascade: Optional[ModelCascade] = None
+
+    @property
+    def llm_client(self) -> "LLMService":
+        """Built on first use, so a worker only loads the openai SDK once it has work to do."""
+        if self._llm_client is None:
+            with self._llm_client_lock:
+                if self._llm_client is None:
+                    from ..ai.llm.client import LLMService
+
+                    # One limit for the whole deployment, however many workers share the GPU backend.
+                    llm_semaphore = self.shared_state.semaphore(
+                        "llm_requests", self.llm_settings.get('max_concurrent_requests', 8)
+                    )
+                    self._llm_client = LLMService(
+                        api_key=self.secrets['llm_api_key'],
+                        model=self.secrets['llm_model_name'],
+                        base_url=self.secrets['llm_api_url'],
+                        max_context_tokens=self.llm_settings.get('max_context_tokens', 64000),
+                        max_img_height=self.llm_settings.get('max_img_height'),
+                        cassette=self.cassette,
+                        structured_output_mode=self.llm_settings.get('structured_output_mode', 'json_schema'),
+                        generation_defaults={
+                            "temperature": self.llm_settings.get('temperature', 0.0),
+                            "max_tokens": self.llm_settings.get('max_new_tokens', 2048),
+                        },
+                        concurrency_limiter=llm_semaphore.acquire,
+                        endpoint_settings=self.llm_settings.get('endpoints'),
+                        usage_settings=self.usage_settings,
+                    )
+        return self._llm_client
+
+    @property
+    def cascade_model(self) -> Optional[str]:
+        """The text model tried before the vision model, or None when the cascade is off."""
+        if not self.cascade_settings.get('enabled', True):
+            return None
+        return self.secrets.get('cascade_llm_model_name')
+
+    @property
+    def cascade(self) -> Optional[ModelCascade]:
+        """The text-only first pass of the LLM stages (see model_cascade.py), built on first use."""
+        if self.cascade_model is None:
+            return None
+        if self._cascade is None:
+            with self._llm_client_lock:
+                if self._cascade is None:
+                    from ..ai.llm.client import LLMService
+
+                    # A separate limit: the small model is usually served apart from the vision model.
+                    cascade_semaphore = self.shared_state.semaphore(
+                        "cascade_llm_requests", self.cascade_settings.get('max_concurrent_requests', 16)
+                    )
+                    client = LLMService(
+                        api_key=self.secrets['cascade_llm_api_key'],
+                        model=self.cascade_model,
+                        base_url=self.secrets['cascade_llm_api_url'],
+                        max_context_tokens=self.cascade_settings.get('max_context_tokens', 32000),
+                        cassette=self.cassette,
+                        structured_output_mode=self.cascade_settings.get('structured_output_mode', self.llm_settings.get('structured_output_mode', 'json_schema')),
+                        generation_defaults={
+                            "temperature": self.llm_settings.get('temperature', 0.0),
+                            "max_tokens": self.cascade_settings.get('max_new_tokens', 2048),
+                        },
+                        concurrency_limiter=cascade_semaphore.acquire,
+                        endpoint_settings=self.llm_settings.get('endpoints'),
+                        usage_settings=self.usage_settings,
+                    )
+                    self._cascade = ModelCascade(client, self.cascade_settings)
+        return self._cascade
+
+    @property
+    def llm_prices(self) -> Optional[Dict[str, Dict[str, float]]]:
+        """Prices per 1,000 tokens by model, or None when no costs are configured."""
+        return self.usage_settings.get('prices') or None
+
+    def metrics(self) -> Dict[str, Any]:
+        """Operational statistics of this worker process, for the /metrics endpoint."""
+        # The LLM client is not built just to report on it.
+        return {
+            "pid": os.getpid(),
+            "llm_endpoints": self._llm_client.endpoint_stats() if self._llm_client is not None else [],
+            "model_cascade": self._cascade.stats() if self._cascade is not None else None,
+            "memory": {
+                "rss_mb": round(current_rss_bytes() / 2**20, 1),
+                "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+                "page_budget": self.memory_budget.stats(),
+                # Peak worker RSS while each recent request ran, most recent last.
+                "recent_requests": list(self.request_memory),
+            },
+            # Tokens used by this worker since it started.
+            "llm_usage": PROCESS_USAGE.summary(self.llm_prices),
+        }
+
+
+_RUNTIME: Optional[_ServiceRuntime] = None
+_RUNTIME_PID: Optional[int] = None
+_RUNTIME_LOCK = threading.Lock()
+
+def get_runtime() -> _ServiceRuntime:
+    """Returns this process's runtime, building it on first use (and again after a fork)."""
+    global _RUNTIME, _RUNTIME_PID
+    if _RUNTIME is None or _RUNTIME_PID != os.getpid():
+        with _RUNTIME_LOCK:
+            if _RUNTIME is None or _RUNTIME_PID != os.getpid():
+                _RUNTIME = _ServiceRuntime()
+                _RUNTIME_PID = os.getpid()
+                logger.info(f"Verification service initialized in process {_RUNTIME_PID}.")
+    return _RUNTIME
+
+def _generation_budget(stage_id: str) -> Dict[str, Any]:
+    """The max_tokens budget for a pipeline stage, falling back to the global max_new_tokens."""
+    llm_settings = get_runtime().llm_settings
+    budgets = llm_settings.get('generation_budgets') or {}
+    return {"max_tokens": budgets.get(stage_id, llm_settings.get('max_new_tokens', 2048))}
+
+def _requirement_cache_key(image_path: Path, prompt: str, model: str) -> str:
+    """Stage 1 depends only on the page render, the prompt (which embeds the page text) and the model."""
+    digest = hashlib.sha256()
+    digest.update(Path(image_path).read_bytes())
+    digest.update(prompt.encode("utf-8"))
+    digest.update(model.encode("utf-8"))
+    return f"requirement_analysis:{digest.hexdigest()}"
+
+async def _iterate_in_thread(make_iterator: Callable[[], Iterator[Any]]) -> AsyncGenerator[Any, None]:
+    """
+    Drives a blocking iterator (e.g. a streamed LLM response) in a worker thread and
+    re-yields its items on the event loop as they arrive, so the SSE stream stays live.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    end_of_stream = object()
+
+    def worker():
+        try:
+            for item in make_iterator():
+                loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, (end_of_stream, e))
+            return
+        loop.call_soon_threadsafe(queue.put_nowait, (end_of_stream, None))
+
+    worker_task = asyncio.ensure_future(asyncio.to_thread(worker))
+    while True:
+        item, error = await queue.get()
+        if item is end_of_stream:
+            await worker_task
+            if error:
+                raise error
+            return
+        yield item
+
+def _analyze_template_page(runtime: _ServiceRuntime, page_bundle: Dict[str, Any], page_num: int) -> PageHolisticAnalysis:
+    with usage_scope("requirement_analysis", page_num):
+        return _analyze_page_requirements(runtime, page_bundle)
+
+def _analyze_page_requirements(runtime: _ServiceRuntime, page_bundle: Dict[str, Any]) -> PageHolisticAnalysis:
+    """Stage 1 for one NSV page, served from the shared cache when the page was seen before."""
+    prompt = get_ns_document_analysis_prompt_holistic(page_bundle['markdown_text'])
+    cascade = runtime.cascade
+    if cascade is not None and not cascade.covers("requirement_analysis"):
+        cascade = None
+    # Shared across workers: the same template page is only analyzed once.
+    models = runtime.llm_client.model if cascade is None else f"{runtime.llm_client.model}+{cascade.client.model}@{cascade.min_confidence}"
+    cache_key = _requirement_cache_key(page_bundle['image_path'], prompt, models)
+    cached = runtime.shared_state.cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Reusing cached requirement analysis for page {page_bundle['page_num']}.")
+        return PageHolisticAnalysis.model_validate(cached)
+    # Pages with text are tried on the text model first; scanned pages have none.
+    page_req_result = cascade.analyze_requirements(page_bundle['markdown_text']) if cascade is not None else None
+    if page_req_result is None:
+        page_req_result = runtime.llm_client.invoke_vision_structured(
+            prompt=prompt, image_path=page_bundle['image_path'], response_model=PageHolisticAnalysis,
+            **_generation_budget("requirement_analysis")
+        )
+    else:
+        logger.info(f"Requirements of page {page_bundle['page_num']} analyzed by the cascade model.")
+    runtime.shared_state.cache.set(cache_key, page_req_result.model_dump(), ttl_seconds=runtime.cache_ttl_seconds)
+    return page_req_result
+
+def register_template(nsv_file_bytes: bytes, nsv_filename: str) -> Tuple[TemplateRecord, bool]:
+    """
+    Registers an NSV PDF as a template: renders and extracts every page, fingerprints it
+    and runs Stage 1, then stores the result under the PDF's SHA-256.
+
+    Returns:
+        Tuple[TemplateRecord, bool]: The template, and whether it was newly created
+        (False if the same PDF was already registered).
+    """
+    from ..utils.image_utils import compute_dhash, load_page_image
+
+    runtime = get_runtime()
+    registry = runtime.template_registry
+    template_id = registry.template_id_for(nsv_file_bytes)
+    # Concurrent registrations of the same PDF (from any worker) wait for the first one.
+    with runtime.shared_state.lock(f"template:{template_id}"):
+        existing = registry.get(template_id)
+        if existing is not None:
+            return existing, False
+
+        dpi = _page_render_dpi(runtime.config)
+        profiles = _render_profiles(runtime.config)
+        with TemporaryFileHandler(base_path=runtime.config['application']['temp_storage_path']) as handler:
+            pdf_path = handler.save_bytes_as_file(nsv_file_bytes, "template_nsv.pdf")
+            page_bundles = handler.extract_content_per_page(
+                pdf_path, dpi=dpi, grayscale=bool(profiles and profiles["diff"].gray),
+                text_extractor=_text_extractor(runtime.config)
+            )
+            renderer = PageRenderer(pdf_path, dpi, handler.temp_dir / "profile_renders")
+            pages = []
+            for page_bundle in page_bundles:
+                page_num = page_bundle['page_num']
+                logger.info(f"Template {template_id[:12]}: analyzing page {page_num}/{len(page_bundles)}")
+                pages.append(TemplatePage(
+                    page_num=page_num,
+                    image_file=f"pages/page_{page_num:03d}.png",
+                    markdown_text=page_bundle['markdown_text'],
+                    text_sha256=text_fingerprint(page_bundle['markdown_text']),
+                    image_dhash=compute_dhash(load_page_image(page_bundle['image_path'])),
+                    requirements=_analyze_template_page(runtime, _llm_page_bundle(page_bundle, renderer, profiles), page_num),
+                ))
+            record = TemplateRecord(
+                template_id=template_id,
+                nsv_filename=nsv_filename,
+                dpi=dpi,
+                model=runtime.llm_client.model,
+                created_at=time.time(),
+                pages=pages,
+            )
+            return registry.save(record, {b['page_num']: b['image_path'] for b in page_bundles}, nsv_file_bytes), True
+
+def _render_profiles(config: Dict[str, Any]) -> Optional[Dict[str, RenderProfile]]:
+    """The render profile of each image consumer in progressive rendering; None in 'full' rendering."""
+    render_settings = config['application'].get('rendering') or {}
+    if render_settings.get('mode', 'full') != 'progressive':
+        return None
+    return load_render_profiles(config)
+
+def _screen_profile(config: Dict[str, Any], profiles: Optional[Dict[str, RenderProfile]]) -> Optional[RenderProfile]:
+    """The low-DPI profile pages are first extracted with when screening is on (progressive rendering only)."""
+    if profiles is None or not (config['application'].get('rendering') or {}).get('screening', False):
+        return None
+    return profiles["screen"]
+
+def _page_render_dpi(config: Dict[str, Any]) -> int:
+    """DPI of the page renders the workflow compares; the 'diff' profile's DPI in progressive rendering."""
+    profiles = _render_profiles(config)
+    if profiles is not None:
+        return profiles["diff"].dpi
+    return config['application']['pdf_to_image_dpi']
+
+def _text_extractor(config: Dict[str, Any]) -> str:
+    """How page text is read from digital PDFs: 'markitdown' (Markdown) or 'text_layer' (words with positions)."""
+    return config['application'].get('text_extraction') or 'markitdown'
+
+def _llm_page_bundle(page_bundle: Dict[str, Any], renderer: PageRenderer, profiles: Optional[Dict[str, RenderProfile]]) -> Dict[str, Any]:
+    """The page bundle with the page rendered for the vision model, when it has its own profile."""
+    if profiles is None:
+        return page_bundle
+    return {**page_bundle, 'image_path': renderer.page(page_bundle['page_num'], profiles["llm"])}
+
+
+def _changed_regions(
+    nsv_img: Any,
+    sv_img: Any,
+    extra_regions: List[Tuple[int, int, int, int]],
+    padding: int,
+    max_area_ratio: float
+) -> Optional[List[Tuple[int, int, int, int]]]:
+    """
+    The areas of a page worth OCRing: every visual difference between the two renders,
+    plus `extra_regions` (input fields), padded and merged.
+
+    Returns None when the page should be OCRed whole: the renders differ in size (e.g. a
+    rescanned page) or the areas cover more than `max_area_ratio` of it.
+    """
+    from ..utils.image_utils import find_difference_bboxes_direct, merge_labeled_boxes
+
+    if nsv_img is None or sv_img is None or nsv_img.shape != sv_img.shape:
+        return None
+    areas = [("difference", bbox) for bbox in find_difference_bboxes_direct(nsv_img, sv_img)]
+    areas += [("input", bbox) for bbox in extra_regions]
+    boxes = [bbox for bbox, _ in merge_labeled_boxes(areas, padding, nsv_img.shape)]
+    height, width = nsv_img.shape[:2]
+    covered = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in boxes)
+    if covered > max_area_ratio * width * height:
+        logger.info(f"Changes cover {covered / float(width * height):.0%} of the page; OCRing the full page.")
+        return None
+    return boxes
+
 
 def _save_debug_json(data: Any, filename: str, output_path: Path):
     """Saves data to a JSON file, handling Pydantic models correctly."""
@@ -55,19 +379,159 @@ def _save_debug_json(data: Any, filename: str, output_path: Path):
         logger.error(f"Could not save debug file {filepath}. Error: {e}")
 
 
-# --- MODIFIED: Function now accepts the handler and has no try/finally block ---
+def _verification_cache_key(
+    runtime: _ServiceRuntime,
+    nsv_file_bytes: Optional[bytes],
+    sv_file_bytes: bytes,
+    template: Optional[TemplateRecord]
+) -> Tuple[str, int]:
+    """The result-cache key of a run, and the DPI its pages are compared at."""
+    if template is not None:
+        # Template ids are the SHA-256 of the NSV PDF, so both ways of submitting a pair share entries.
+        nsv_sha256, dpi = template.template_id, template.dpi
+    else:
+        nsv_sha256, dpi = hashlib.sha256(nsv_file_bytes).hexdigest(), _page_render_dpi(runtime.config)
+    key = result_cache_key(
+        nsv_sha256, hashlib.sha256(sv_file_bytes).hexdigest(),
+        runtime.config, "+".join(filter(None, (runtime.secrets['llm_model_name'], runtime.cascade_model))), dpi,
+    )
+    return key, dpi
+
+def _restore_diff_visuals(
+    runtime: _ServiceRuntime,
+    entry: Dict[str, Any],
+    handler: TemporaryFileHandler,
+    nsv_file_bytes: Optional[bytes],
+    sv_file_bytes: bytes,
+    template: Optional[TemplateRecord],
+    dpi: int
+):
+    """
+    Writes the diff specs of a replayed result into the new request's directory, from
+    fresh renders of the pages concerned, so its /temp URLs work again.
+    """
+    from ..utils.image_utils import write_diff_spec
+
+    if not entry.get("diff_pages"):
+        return
+    profiles = _render_profiles(runtime.config)
+    profile = RenderProfile(dpi=dpi, gray=bool(profiles and profiles["diff"].gray))
+    render_dir = handler.temp_dir / "profile_renders"
+    sv_renderer = PageRenderer(handler.save_bytes_as_file(sv_file_bytes, "replay_sv.pdf"), dpi, render_dir / "sv")
+    nsv_renderer = None
+    if template is None:
+        nsv_renderer = PageRenderer(handler.save_bytes_as_file(nsv_file_bytes, "replay_nsv.pdf"), dpi, render_dir / "nsv")
+    for diff_page in entry["diff_pages"]:
+        page_num = diff_page["page_number"]
+        if nsv_renderer is not None:
+            nsv_image_path = nsv_renderer.page(page_num, profile)
+        else:
+            nsv_image_path = runtime.template_registry.page_bundles(template)[page_num - 1]['image_path']
+        write_diff_spec(
+            handler.temp_dir / diff_page["dir"], nsv_image_path, sv_renderer.page(diff_page["signed_page_number"], profile),
+            diff_page["bboxes"], settings=runtime.config['application'].get('diff_visuals'),
+        )
+
+# Events that end a run; they carry the request's LLM usage.
+_FINAL_EVENTS = ("workflow_complete", "verification_failed", "error")
+
+def _with_llm_usage(event: Dict[str, Any], ledger: UsageLedger, prices: Optional[Dict[str, Dict[str, float]]]) -> Dict[str, Any]:
+    """A copy of a final event with the request's token usage under data['llm_usage']."""
+    if event.get("type") not in _FINAL_EVENTS:
+        return event
+    return {**event, "data": {**event.get("data", {}), "llm_usage": ledger.summary(prices)}}
+
 async def run_verification_workflow(
+    handler: TemporaryFileHandler,
+    nsv_file_bytes: Optional[bytes],
+    nsv_filename: Optional[str],
+    sv_file_bytes: bytes,
+    sv_filename: str,
+    template_id: Optional[str] = None,
+    use_result_cache: bool = True
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Verifies a document pair, answering from the result cache when the same pair was
+    verified before with the same pipeline, configuration and model.
+
+    A cached result is replayed as the events of the original run (without its progress
+    messages), its verdict event marked with 'replayed_from_cache'. Otherwise the pipeline
+    runs, and its events are stored once it reaches a verdict. `use_result_cache=False`
+    forces a fresh verification (and refreshes the stored result).
+
+    The final event reports the LLM tokens the request used (none for a replay),
+    per model, stage and page.
+    """
+    runtime = get_runtime()
+    ledger = UsageLedger()
+    cache_settings = runtime.config['application'].get('result_cache') or {}
+    cache_key = None
+    if cache_settings.get('enabled', True):
+        template = runtime.template_registry.get(template_id) if template_id else None
+        # Hashing the PDFs and the shared cache (SQLite waits for its write lock) stay off the event loop.
+        if template is not None or not template_id:
+            cache_key, dpi = await asyncio.to_thread(_verification_cache_key, runtime, nsv_file_bytes, sv_file_bytes, template)
+        entry = await asyncio.to_thread(runtime.shared_state.cache.get, cache_key) if cache_key and use_result_cache else None
+        if entry is not None:
+            logger.info(f"Replaying cached verification result for request {handler.request_id}.")
+            try:
+                await asyncio.to_thread(_restore_diff_visuals, runtime, entry, handler, nsv_file_bytes, sv_file_bytes, template, dpi)
+            except Exception as e:
+                logger.warning(f"Could not restore the diff visuals of a cached result; their links will not resolve: {e}")
+            yield {"type": "status_update", "message": "This document pair was verified before; replaying the stored result."}
+            for event in replay_events(entry, handler):
+                yield _with_llm_usage(event, ledger, runtime.llm_prices)
+                await asyncio.sleep(0)
+            return
+
+    recorder = ResultRecorder(handler)
+    rss = RssTracker()
+    try:
+        with track_usage(ledger):
+            async for event in _run_verification_pipeline(handler, nsv_file_bytes, nsv_filename, sv_file_bytes, sv_filename, template_id):
+                # Stored without the usage: a replay costs nothing.
+                recorder.record(event)
+                rss.sample()
+                yield _with_llm_usage(event, ledger, runtime.llm_prices)
+    finally:
+        rss.sample()
+        runtime.request_memory.append(rss.summary(handler.request_id))
+        logger.info(f"Request {handler.request_id}: peak worker RSS {rss.peak_bytes / 2**20:.0f} MB.")
+        usage = ledger.summary(runtime.llm_prices)
+        logger.info(f"Request {handler.request_id}: {usage['calls']} LLM calls, {usage['prompt_tokens']} prompt and {usage['completion_tokens']} completion tokens.")
+    entry = recorder.entry() if cache_key else None
+    if entry is not None:
+        await asyncio.to_thread(runtime.shared_state.cache.set, cache_key, entry, ttl_seconds=cache_settings.get('ttl_seconds', 86400))
+
+
+# --- MODIFIED: Function now accepts the handler and has no try/finally block ---
+async def _run_verification_pipeline(
     handler: TemporaryFileHandler, # <-- Accepts the handler object
-    nsv_file_bytes: bytes, 
-    nsv_filename: str, 
+    nsv_file_bytes: Optional[bytes], 
+    nsv_filename: Optional[str], 
     sv_file_bytes: bytes, 
-    sv_filename: str
+    sv_filename: str,
+    template_id: Optional[str] = None
 ) -> AsyncGenerator[Dict[str, Any], None]:
     """
     Orchestrates the verification workflow using a pre-existing temp file handler.
     Cleanup is managed by the calling API endpoint's background task.
+
+    With a `template_id`, the NSV pages and their Stage 1 analyses come from the
+    template registry: only the signed document is ingested, and no Stage 1 LLM
+    call is made.
     """
+    page_reservation = None
     try:
+        from ..utils.image_utils import load_page_image, analyze_page_meta_from_image, write_diff_spec, find_difference_bboxes_direct, build_audit_crops
+        from ..utils.layout_utils import word_boxes_from_ocr, describe_audit_layout, text_layer_diff
+        from ..ai.ocr.text_layer import extract_text_layer
+        from .input_regions import locate_input_regions, verify_page_by_input_regions, pre_answer_inputs, merge_pre_answered
+
+        runtime = get_runtime()
+        config, secrets, llm_settings = runtime.config, runtime.secrets, runtime.llm_settings
+        llm_client, cassette = runtime.llm_client, runtime.cassette
+
         # The handler is already set up, so we can use it immediately.
         yield {"type": "status_update", "message": f"Processing with Request ID: {handler.request_id}"}
         await asyncio.sleep(0.01)
@@ -75,27 +539,101 @@ async def run_verification_workflow(
         debug_output_path = Path(handler.temp_dir) / "debug_outputs"
         debug_output_path.mkdir(exist_ok=True)
 
-        yield {"type": "status_update", "message": f"Saving original document: {nsv_filename}"}
-        await asyncio.sleep(0.01)
-        nsv_path = handler.save_bytes_as_file(nsv_file_bytes, nsv_filename)
+        template = None
+        dpi = _page_render_dpi(config)
+        if template_id:
+            template = runtime.template_registry.get(template_id)
+            if template is None:
+                yield {"type": "error", "message": f"Unknown template ID: {template_id}"}
+                return
+            # The signed copy must be rendered like the stored template pages for pixel comparisons.
+            dpi = template.dpi
+            nsv_filename = template.nsv_filename
+            nsv_path = runtime.template_registry.template_dir(template_id) / "nsv.pdf"
+            yield {"type": "status_update", "message": f"Using registered template {template_id[:12]} ({nsv_filename}, {len(template.pages)} pages)."}
+            await asyncio.sleep(0.01)
+        else:
+            yield {"type": "status_update", "message": f"Saving original document: {nsv_filename}"}
+            await asyncio.sleep(0.01)
+            nsv_path = handler.save_bytes_as_file(nsv_file_bytes, nsv_filename)
 
         yield {"type": "status_update", "message": f"Saving signed document: {sv_filename}"}
         await asyncio.sleep(0.01)
         sv_path = handler.save_bytes_as_file(sv_file_bytes, sv_filename)
 
-        yield {"type": "status_update", "message": "Extracting pages from original document..."}
-        await asyncio.sleep(0.01)
-        nsv_page_bundles = handler.extract_content_per_page(nsv_path, dpi=CONFIG['application']['pdf_to_image_dpi'])
+        # Progressive rendering: pages are compared with the 'diff' profile, and every other consumer
+        # gets its own render profile (the vision model, OCR, audit crops), rendered on demand.
+        profiles = _render_profiles(config)
+        diff_gray = bool(profiles and profiles["diff"].gray)
+        text_extractor = _text_extractor(config)
+        # With screening, pages are extracted at the low 'screen' DPI, and only pages whose pixels
+        # are compared are rendered again at `dpi` (see the page loop). Word positions stay at `dpi`.
+        screen = _screen_profile(config, profiles)
+        extract_dpi, extract_gray = (screen.dpi, screen.gray) if screen is not None else (dpi, diff_gray)
+        screened = {"nsv": screen is not None and template is None, "sv": screen is not None}
+        compare_profile = RenderProfile(dpi=dpi, gray=diff_gray)
+        renderers = {
+            "nsv": PageRenderer(nsv_path, dpi, handler.temp_dir / "profile_renders" / "nsv"),
+            "sv": PageRenderer(sv_path, dpi, handler.temp_dir / "profile_renders" / "sv"),
+        }
+        def detail_loader(document: str, page_number: int, consumer: str) -> Optional[Callable[[Tuple[int, int, int, int]], Any]]:
+            """Tiles for `consumer`, or None when cutting from the compared renders gives the same pixels."""
+            if profiles is None:
+                return None
+            profile = profiles[consumer]
+            if profile.dpi <= dpi and (profile.gray or not diff_gray):
+                return None
+            return lambda bbox: renderers[document].tile(page_number, bbox, profile)
+        def consumer_page(document: str, page_number: int, consumer: str, default: Path) -> Path:
+            """The full page rendered for `consumer`, or the compared render in 'full' rendering."""
+            if profiles is None:
+                return default
+            return renderers[document].page(page_number, profiles[consumer])
+
+        if template is not None:
+            nsv_page_bundles = runtime.template_registry.page_bundles(template)
+        else:
+            yield {"type": "status_update", "message": "Extracting pages from original document..."}
+            await asyncio.sleep(0.01)
+            nsv_page_bundles = handler.extract_content_per_page(
+                nsv_path, dpi=extract_dpi, grayscale=extract_gray, text_extractor=text_extractor, text_layer_dpi=dpi
+            )
 
         yield {"type": "status_update", "message": "Extracting pages from signed document..."}
         await asyncio.sleep(0.01)
-        sv_page_bundles = handler.extract_content_per_page(sv_path, dpi=CONFIG['application']['pdf_to_image_dpi'])
+        sv_page_bundles = handler.extract_content_per_page(
+            sv_path, dpi=extract_dpi, grayscale=extract_gray, text_extractor=text_extractor, text_layer_dpi=dpi
+        )
         
         _save_debug_json(nsv_page_bundles, "step_1_nsv_page_bundles.json", debug_output_path)
         _save_debug_json(sv_page_bundles, "step_1_sv_page_bundles.json", debug_output_path)
 
-        # MODIFIED: Instead of raising an error, yield a failure message and stop.
-        if len(nsv_page_bundles) != len(sv_page_bundles):
+        # Pair the pages of both documents, so an inserted or removed page does not shift every page after it.
+        alignment_settings = config['application'].get('page_alignment') or {}
+        if alignment_settings.get('enabled', True):
+            nsv_fingerprints = await asyncio.to_thread(fingerprint_pages, nsv_page_bundles)
+            sv_fingerprints = await asyncio.to_thread(fingerprint_pages, sv_page_bundles)
+            alignment = align_pages(
+                nsv_fingerprints, sv_fingerprints,
+                min_similarity=alignment_settings.get('min_similarity', 0.5),
+                text_weight=alignment_settings.get('text_weight', 0.7),
+                identity_similarity=alignment_settings.get('identity_similarity', 0.9),
+            )
+            _save_debug_json(alignment.to_dict(), "step_1_page_alignment.json", debug_output_path)
+            if not alignment.is_identity:
+                yield {
+                    "type": "process_step_result",
+                    "data": {"stage_id": "page_alignment", "stage_title": "Page Alignment", "result": alignment.to_dict()}
+                }
+                await asyncio.sleep(0.01)
+            if not alignment.pairs:
+                yield {
+                    "type": "verification_failed",
+                    "data": {"final_status": "Failure", "message": "No page of the signed document matches a page of the original document."}
+                }
+                return
+        elif len(nsv_page_bundles) != len(sv_page_bundles):
+            # MODIFIED: Instead of raising an error, yield a failure message and stop.
             error_message = f"Page count mismatch: Original document has {len(nsv_page_bundles)} pages, while the signed document has {len(sv_page_bundles)} pages."
             logger.error(error_message)
             yield {
@@ -103,25 +641,39 @@ async def run_verification_workflow(
                 "data": { "final_status": "Failure", "message": error_message }
             }
             return # Stop the generator
+        else:
+            alignment = PageAlignment(pairs=[(n, n, 1.0) for n in range(1, len(nsv_page_bundles) + 1)], removed=[], inserted=[])
+        aligned_nsv_pages = {nsv_page for nsv_page, _, _ in alignment.pairs}
 
-        yield {"type": "status_update", "message": f"Found {len(nsv_page_bundles)} pages. Starting Stage 1: Requirement Analysis..."}
+        yield {"type": "status_update", "message": f"Found {len(alignment.pairs)} matching pages. Starting Stage 1: Requirement Analysis..."}
         await asyncio.sleep(0.01)
         
         requirements_map: Dict[int, PageHolisticAnalysis] = {}
+        template_requirements = {page.page_num: page.requirements for page in template.pages} if template else {}
         for page_bundle in nsv_page_bundles:
             page_num = page_bundle['page_num']
-            page_img = page_bundle["image_path"]
-            
-            yield {"type": "status_update", "message": f"Analyzing requirements for Page {page_num}..."}
-            await asyncio.sleep(0.01)
-            try:
-                prompt = get_ns_document_analysis_prompt_holistic(page_bundle['markdown_text'])
-                page_req_result = LLM_CLIENT.invoke_vision_structured(prompt=prompt, image_path=page_img, response_model=PageHolisticAnalysis)
+            if page_num not in aligned_nsv_pages:
+                # Removed from the signed copy: there is nothing to audit against.
+                continue
+
+            if template is not None:
+                # Precomputed at registration time.
+                page_req_result = template_requirements[page_num]
                 requirements_map[page_num] = page_req_result
-            except Exception as e:    
-                logger.error(f"Error analyzing page {page_num}: {e}", exc_info=True)
-                yield {"type": "error", "message": "Server Critical Error during requirement analysis. Please Try Again Later. (GPU Overload)"}
-                return # Stop the generator
+            else:
+                yield {"type": "status_update", "message": f"Analyzing requirements for Page {page_num}..."}
+                await asyncio.sleep(0.01)
+                try:
+                    # In a worker thread: waiting for an LLM slot must not stall the other streams of this worker.
+                    with usage_scope("requirement_analysis", page_num):
+                        page_req_result = await asyncio.to_thread(
+                            _analyze_page_requirements, runtime, _llm_page_bundle(page_bundle, renderers["nsv"], profiles)
+                        )
+                    requirements_map[page_num] = page_req_result
+                except Exception as e:    
+                    logger.error(f"Error analyzing page {page_num}: {e}", exc_info=True)
+                    yield {"type": "error", "message": "Server Critical Error during requirement analysis. Please Try Again Later. (GPU Overload)"}
+                    return # Stop the generator
             
             result_payload = page_req_result.model_dump()
             result_payload['page_number'] = page_num
@@ -133,30 +685,84 @@ async def run_verification_workflow(
         yield {"type": "status_update", "message": "Stage 1 analysis complete."}
         await asyncio.sleep(0.01)
 
+        # Text layers (words with positions), taken from the page bundles when the text was
+        # extracted from them, otherwise read on first use (e.g. by the input-region check).
+        region_settings = config['application'].get('input_regions') or {}
+        ocr_settings = config['ai_services'].get('ocr') or {}
+        text_layers: Dict[str, Dict[int, Any]] = {}
+        for document, bundles in (("nsv", nsv_page_bundles), ("sv", sv_page_bundles)):
+            if bundles and all('text_layer' in b for b in bundles):
+                text_layers[document] = {b['page_num']: b['text_layer'] for b in bundles}
+        def page_text_layer(document: str, page_number: int) -> Optional[Any]:
+            if document not in text_layers:
+                try:
+                    text_layers[document] = extract_text_layer(nsv_path if document == "nsv" else sv_path, dpi)
+                except Exception as e:
+                    logger.warning(f"Could not read word positions from the {document.upper()} text layer: {e}")
+                    text_layers[document] = {}
+            return text_layers[document].get(page_number)
+        word_boxes: Dict[Tuple[str, int], List[Any]] = {}
+        def page_words(document: str, page_number: int) -> List[Any]:
+            if (document, page_number) not in word_boxes:
+                layer = page_text_layer(document, page_number)
+                word_boxes[document, page_number] = word_boxes_from_ocr(layer.detailed_data) if layer is not None else []
+            return word_boxes[document, page_number]
+
         # --- Stage 2: Page-by-Page Content Verification ---
         yield {"type": "status_update", "message": "Starting Stage 2: Content Verification..."}
         await asyncio.sleep(0.01)
 
-        for page_num in range(1, len(nsv_page_bundles) + 1):
+        # Page renders are decoded on first use, in grayscale unless their colors are shown to the
+        # model, and dropped when the next page starts. Each page first reserves its working set
+        # from the worker's memory budget, so concurrent requests queue instead of exhausting memory.
+        decoded: Dict[Tuple[str, bool], Any] = {}
+        page_paths: Dict[str, Path] = {}
+        def page_image(document: str, color: bool = False) -> Any:
+            key = (document, color and not diff_gray)
+            if key not in decoded:
+                decoded[key] = load_page_image(page_paths[document], color=key[1])
+            return decoded[key]
+        def color_crop_loader(document: str) -> Optional[Callable[[Tuple[int, int, int, int]], Any]]:
+            """Audit crops cut from the color render, when the renders have color to show."""
+            if diff_gray:
+                return None
+            return lambda bbox: page_image(document, color=True)[max(0, bbox[1]):bbox[3], max(0, bbox[0]):bbox[2]]
+        working_set_factor = (config['application'].get('memory') or {}).get('page_working_set_factor', 3)
+
+        # Pages are numbered as in the original document; `sv_page_num` is the signed page paired with it.
+        for page_num, sv_page_num, _ in alignment.pairs:
             yield {"type": "status_update", "message": f"Verifying content for Page {page_num}..."}
             await asyncio.sleep(0.01)
             content_type=None
+            page_of = {"nsv": page_num, "sv": sv_page_num}
 
             page_requirements = requirements_map.get(page_num)
             nsv_bundle = nsv_page_bundles[page_num - 1]
-            sv_bundle = sv_page_bundles[page_num - 1]
+            sv_bundle = sv_page_bundles[sv_page_num - 1]
 
             nsv_image_path = nsv_bundle['image_path']
             sv_image_path = sv_bundle['image_path']
             sv_markdown = sv_bundle['markdown_text']
             nsv_markdown = nsv_bundle['markdown_text']
-                
-            nsv_img = cv2.imread(str(nsv_image_path))
-            sv_img = cv2.imread(str(sv_image_path))
 
+            # Pixels are only compared on pages whose text changed or that are scanned; the
+            # screened pages among them are rendered at the compared DPI now.
+            if screen is not None and (not sv_markdown.strip() or nsv_markdown != sv_markdown):
+                if screened["nsv"]:
+                    nsv_image_path = await asyncio.to_thread(renderers["nsv"].page, page_num, compare_profile)
+                if screened["sv"]:
+                    sv_image_path = await asyncio.to_thread(renderers["sv"].page, sv_page_num, compare_profile)
+                
+            decoded.clear()
+            if page_reservation is not None:
+                page_reservation.release()
+            page_paths.update(nsv=nsv_image_path, sv=sv_image_path)
+            page_bytes = decoded_image_bytes(nsv_image_path) + decoded_image_bytes(sv_image_path)
+            page_reservation = await runtime.memory_budget.acquire(int(working_set_factor * page_bytes))
             
             result_payload = {
                 "page_number": page_num,
+                "signed_page_number": sv_page_num,
                 "content_match": None, # Will be set later
                 "summary": "",
                 "original_diff_url": None,
@@ -164,13 +770,48 @@ async def run_verification_workflow(
             }
                 
             if not sv_markdown or not sv_markdown.strip():
-                yield {"type": "status_update", "message": f"Signed page {page_num} is scanned. Using OCR..."}
+                yield {"type": "status_update", "message": f"Signed page {sv_page_num} is scanned. Using OCR..."}
                 await asyncio.sleep(0.01)
                 content_type="scanned"
+                # In 'regions' mode only the changed areas and the input fields are OCRed, so OCR
+                # time and payload follow the size of the change rather than the page.
+                ocr_regions = None
+                if ocr_settings.get('mode', 'full_page') == 'regions':
+                    nsv_img, sv_img = page_image("nsv"), page_image("sv")
+                    marker_regions = []
+                    if page_requirements and page_requirements.required_inputs and nsv_img is not None:
+                        marker_regions = locate_input_regions(page_requirements, page_words("nsv", page_num), nsv_img.shape, region_settings) or []
+                    ocr_regions = _changed_regions(
+                        nsv_img, sv_img, [entry["region"] for entry in marker_regions],
+                        padding=ocr_settings.get('region_padding_px', 16),
+                        max_area_ratio=ocr_settings.get('max_area_ratio', 0.5),
+                    )
                 try:
-                    # NOTE: This part is simplified for brevity as content is not used later
-                    sv_content=extract_text_from_image(sv_image_path, api_url=SECRETS['ocr_url'])
-                    nsv_content=extract_text_from_image(nsv_image_path, api_url=SECRETS['ocr_url'])
+                    ocr_started = time.perf_counter()
+                    # OCR requests (and the renders they need) block until answered: run them off the event loop.
+                    if ocr_regions is not None:
+                        sv_ocr, nsv_ocr = [
+                            await asyncio.to_thread(
+                                extract_text_from_regions,
+                                img, ocr_regions, api_url=secrets['ocr_url'], cassette=cassette,
+                                max_workers=ocr_settings.get('max_concurrent_requests', 4),
+                                crop_loader=detail_loader(document, page_of[document], "ocr")
+                            ) for document, img in (("sv", sv_img), ("nsv", nsv_img))
+                        ]
+                    else:
+                        # OCR needs more resolution than the compared renders.
+                        sv_ocr_path = await asyncio.to_thread(consumer_page, "sv", sv_page_num, "ocr", sv_image_path)
+                        nsv_ocr_path = await asyncio.to_thread(consumer_page, "nsv", page_num, "ocr", nsv_image_path)
+                        sv_ocr = await asyncio.to_thread(extract_text_from_image, sv_ocr_path, api_url=secrets['ocr_url'], cassette=cassette)
+                        nsv_ocr = await asyncio.to_thread(extract_text_from_image, nsv_ocr_path, api_url=secrets['ocr_url'], cassette=cassette)
+                    _save_debug_json({
+                        "mode": "full_page" if ocr_regions is None else "regions",
+                        "regions": ocr_regions,
+                        "elapsed_seconds": round(time.perf_counter() - ocr_started, 3),
+                        "nsv": nsv_ocr.model_dump(),
+                        "sv": sv_ocr.model_dump(),
+                    }, f"step_3_ocr_page_{page_num}.json", debug_output_path)
+                    sv_content, nsv_content = sv_ocr.plain_text, nsv_ocr.plain_text
                 except OcrAPIError:
                     logger.warning(f"OCR processing failed for page {page_num}. Content analysis may be limited.")
                     yield {"type": "error", "message": f"AI model failed during audit of page {page_num}. Please try again. (GPU Overload)."}
@@ -180,7 +821,13 @@ async def run_verification_workflow(
                 sv_content = sv_markdown
                 nsv_content = nsv_markdown
 
-            content_diff=get_structured_diff_json(nsv_content,sv_content)
+            nsv_layer = page_text_layer("nsv", page_num) if content_type == "Digital" and text_extractor == "text_layer" else None
+            sv_layer = page_text_layer("sv", sv_page_num) if nsv_layer is not None else None
+            if nsv_layer is not None and sv_layer is not None and nsv_layer.detailed_data:
+                # Word-level and located on the page; text that only reflowed is not a difference.
+                content_diff = json.dumps(text_layer_diff(nsv_layer.detailed_data, sv_layer.detailed_data), indent=4)
+            else:
+                content_diff=get_structured_diff_json(nsv_content,sv_content)
             _save_debug_json({"nsv_content": nsv_content, "sv_content": sv_content,"difference":content_diff}, f"step_3_audit_input_{page_num}.json", debug_output_path)
 
 
@@ -250,7 +897,7 @@ async def run_verification_workflow(
             else:
                 # BRANCH 1: Page was supposed to be static (no inputs), but changes were found.
                 if page_requirements and not page_requirements.required_inputs and content_type=="Digital":
-                    analysis_result = analyze_page_meta_from_image(nsv_img, sv_img)
+                    analysis_result = analyze_page_meta_from_image(page_image("nsv"), page_image("sv"))
                     result_payload["content_match"] = analysis_result["content_match"]
 
                     if not analysis_result["content_match"]:
@@ -259,15 +906,22 @@ async def run_verification_workflow(
                         summary_message = f"Unauthorized visual change detected in {len(bboxes)} area(s) on a page that should be static."
                         result_payload["summary"] = summary_message
                         
+                        # Only a spec is written here; /temp renders each visual when it is first opened.
                         diff_output_dir = handler.temp_dir / f"page_{page_num:02d}_diffs"
                         try:
-                            original_diff_path, signed_diff_path = generate_difference_images(
-                                original_img=nsv_img, signed_img=sv_img, bboxes=bboxes, output_dir=diff_output_dir
+                            visuals = write_diff_spec(
+                                diff_output_dir, nsv_image_path, sv_image_path, bboxes,
+                                settings=config['application'].get('diff_visuals'),
                             )
-                            result_payload["original_diff_url"] = f"/temp/{handler.request_id}/{original_diff_path.relative_to(handler.temp_dir)}"
-                            result_payload["signed_diff_url"] = f"/temp/{handler.request_id}/{signed_diff_path.relative_to(handler.temp_dir)}"
+                            diff_url = f"/temp/{handler.request_id}/{diff_output_dir.relative_to(handler.temp_dir)}"
+                            result_payload["original_diff_url"] = f"{diff_url}/{visuals['original']}"
+                            result_payload["signed_diff_url"] = f"{diff_url}/{visuals['signed']}"
+                            if "side_by_side" in visuals:
+                                result_payload["side_by_side_diff_url"] = f"{diff_url}/{visuals['side_by_side']}"
+                            if "crops" in visuals:
+                                result_payload["diff_crop_urls"] = [f"{diff_url}/{name}" for name in visuals["crops"]]
                         except Exception as e:
-                            logger.error(f"Failed to generate difference images for page {page_num}: {e}")
+                            logger.error(f"Failed to prepare difference images for page {page_num}: {e}")
                         
                         yield { "type": "process_step_result", "data": { "stage_id": "content_verification", "stage_title": "Stage 2: Content Verification", "result": result_payload } }
                         await asyncio.sleep(0.01)
@@ -280,22 +934,178 @@ async def run_verification_workflow(
 
                 # BRANCH 2: Page was dynamic (inputs required), and changes were found. Audit them.
                 else:
+                    # Only the local checks and audit crops of digital pages look at the renders.
+                    nsv_img, sv_img = (page_image("nsv"), page_image("sv")) if content_type == "Digital" else (None, None)
+                    pre_answered: List[AuditedInput] = []
+                    audit_requirements = page_requirements
+                    located_regions: List[Dict[str, Any]] = []
+                    # Changes confined to the input areas, each showing ink, need no LLM audit.
+                    if content_type == "Digital" and region_settings.get('enabled', True) and page_requirements:
+                        region_check = verify_page_by_input_regions(
+                            page_num, nsv_img, sv_img,
+                            nsv_words=page_words("nsv", page_num),
+                            sv_words=page_words("sv", sv_page_num),
+                            requirements=page_requirements,
+                            settings=region_settings,
+                        )
+                        _save_debug_json(region_check, f"step_3_input_regions_page_{page_num}.json", debug_output_path)
+                        located_regions = region_check["regions"]
+                        if region_check["verified"]:
+                            yield {"type": "status_update", "message": f"Page {page_num} verified locally: {region_check['reason']}."}
+                            await asyncio.sleep(0.01)
+                            yield {
+                                "type": "process_step_result",
+                                "data": {
+                                    "stage_id": "multimodal_audit",
+                                    "stage_title": "Stage 3: Multi-Modal Audit",
+                                    "result": region_check["audit_result"].model_dump(),
+                                    "method": "input_region_check"
+                                }
+                            }
+                            await asyncio.sleep(0.01)
+                            continue
+                        logger.info(f"Input-region check inconclusive for page {page_num} ({region_check['reason']}); running the multimodal audit.")
+
+                        # Signatures, initials and checkboxes that clearly received ink are decided locally;
+                        # the LLM audits the rest, including inputs that look empty.
+                        pre_answered, undecided, fill_scores = pre_answer_inputs(
+                            nsv_img, sv_img, page_requirements,
+                            regions=region_check["regions"] or None,
+                            settings=region_settings.get('fill_detection'),
+                        )
+                        _save_debug_json(fill_scores, f"step_3_fill_scores_page_{page_num}.json", debug_output_path)
+                        for answer in pre_answered:
+                            yield {
+                                "type": "partial_result",
+                                "data": {"stage_id": "multimodal_audit", "page_number": page_num, "field": "required_inputs", "item": answer.model_dump()}
+                            }
+                        if pre_answered:
+                            logger.info(f"Page {page_num}: {len(pre_answered)} input(s) decided locally, {len(undecided)} left for the LLM.")
+                            audit_requirements = page_requirements.model_copy(update={"required_inputs": undecided})
+
+                    # Digital pages are tried on the text model first.
+                    cascade = runtime.cascade
+                    if content_type == "Digital" and cascade is not None and cascade.covers("multimodal_audit") and audit_requirements:
+                        yield {"type": "status_update", "message": f"Auditing Page {page_num} from its text..."}
+                        await asyncio.sleep(0.01)
+                        with usage_scope("multimodal_audit", page_num):
+                            text_audit = await asyncio.to_thread(cascade.audit, content_diff, audit_requirements, page_num)
+                        if text_audit is not None:
+                            if pre_answered:
+                                text_audit = merge_pre_answered(text_audit, pre_answered)
+                            _save_debug_json(text_audit, f"step_3_audit_result_page_{page_num}.json", debug_output_path)
+                            yield {
+                                "type": "process_step_result",
+                                "data": {
+                                    "stage_id": "multimodal_audit",
+                                    "stage_title": "Stage 3: Multi-Modal Audit",
+                                    "result": text_audit.model_dump(),
+                                    "method": "text_cascade"
+                                }
+                            }
+                            await asyncio.sleep(0.01)
+                            if text_audit.page_status != "Verified":
+                                failure_message = f"Audit failed on page {page_num}. Status: '{text_audit.page_status}'"
+                                yield {"type": "verification_failed", "data": {"final_status": "Failure", "message": failure_message}}
+                                return
+                            continue
+
                     yield {"type": "status_update", "message": f"Starting multi-modal audit for Page {page_num}..."}
                     await asyncio.sleep(0.01)
                     
-                    prompt = get_multimodal_audit_prompt(
-                        content_difference=content_diff,
-                        required_inputs_analysis=page_requirements.model_dump(),
-                        page_number=page_num
-                    )
+                    # In 'regions' mode the model gets crops of the changed areas and of the input fields
+                    # still to audit, at native resolution, instead of two downscaled full pages.
+                    audit_crops = None
+                    if llm_settings.get('audit_mode', 'full_page') == 'regions' and content_type == "Digital":
+                        located = {entry["input"].marker_text: entry["region"] for entry in located_regions}
+                        if all(required.marker_text in located for required in audit_requirements.required_inputs):
+                            crop_settings = llm_settings.get('audit_regions') or {}
+                            # What the full-page audit would send: both pages, resized to max_img_height.
+                            page_height, page_width = nsv_img.shape[:2]
+                            max_height = llm_settings.get('max_img_height') or page_height
+                            full_page_pixels = 2 * page_width * page_height * min(1.0, max_height / float(page_height)) ** 2
+                            areas = [("a visual difference", bbox) for bbox in find_difference_bboxes_direct(nsv_img, sv_img)]
+                            areas += [(f"the input field of '{required.marker_text}'", located[required.marker_text]) for required in audit_requirements.required_inputs]
+                            audit_crops = build_audit_crops(
+                                nsv_img, sv_img, areas,
+                                padding=crop_settings.get('padding_px', 24),
+                                max_regions=crop_settings.get('max_regions', 8),
+                                max_area_ratio=crop_settings.get('max_area_ratio', 0.5),
+                                max_pixels=int(crop_settings.get('pixel_budget_ratio', 0.5) * full_page_pixels),
+                                crop_loaders={
+                                    document: loader for document in ("nsv", "sv")
+                                    if (loader := detail_loader(document, page_of[document], "crops") or color_crop_loader(document)) is not None
+                                },
+                            )
 
-                    try:
-                        audit_result = LLM_CLIENT.invoke_image_compare_structured(
-                            prompt=prompt,
-                            image_path_1=nsv_image_path,
-                            image_path_2=sv_image_path,
-                            response_model=PageAuditResult
+                    if audit_crops:
+                        from ..ai.llm.client import encode_region_crops
+
+                        layout_map = describe_audit_layout(audit_crops, nsv_img.shape, page_words("nsv", page_num))
+                        prompt = get_region_audit_prompt(
+                            content_difference=content_diff,
+                            required_inputs_analysis=audit_requirements.model_dump(),
+                            page_number=page_num,
+                            layout_map=layout_map
                         )
+                        _save_debug_json({
+                            "layout_map": layout_map,
+                            "regions": [{"id": crop["id"], "bbox": crop["bbox"], "labels": crop["labels"]} for crop in audit_crops],
+                            "scale": audit_crops[0]["scale"],
+                            "crop_pixels": 2 * sum(crop["nsv"].shape[0] * crop["nsv"].shape[1] for crop in audit_crops),
+                            "full_page_pixels": int(full_page_pixels),
+                        }, f"step_3_audit_regions_page_{page_num}.json", debug_output_path)
+                        invoke_audit, stream_audit = llm_client.invoke_region_compare_structured, llm_client.stream_region_compare_structured
+                        audit_images = {"regions": await asyncio.to_thread(encode_region_crops, audit_crops)}
+                    else:
+                        prompt = get_multimodal_audit_prompt(
+                            content_difference=content_diff,
+                            required_inputs_analysis=audit_requirements.model_dump(),
+                            page_number=page_num
+                        )
+                        invoke_audit, stream_audit = llm_client.invoke_image_compare_structured, llm_client.stream_image_compare_structured
+                        audit_images = {
+                            "image_path_1": consumer_page("nsv", page_num, "llm", nsv_image_path),
+                            "image_path_2": consumer_page("sv", sv_page_num, "llm", sv_image_path),
+                        }
+
+                    # The request no longer needs the decoded page (crops are encoded, full pages are
+                    # read from their files), so its memory is given back before the model is awaited.
+                    nsv_img = sv_img = audit_crops = None
+                    decoded.clear()
+                    page_reservation.release()
+
+                    try:
+                        if llm_settings.get('streaming_audit', False):
+                            # Emit each audited input as soon as the model finishes writing it.
+                            audit_result = None
+                            audit_stream = lambda: stream_audit(
+                                prompt=prompt,
+                                response_model=PageAuditResult,
+                                **audit_images,
+                                **_generation_budget("multimodal_audit")
+                            )
+                            # The worker thread inherits the usage scope when it starts.
+                            with usage_scope("multimodal_audit", page_num):
+                                async for kind, field_name, data in _iterate_in_thread(audit_stream):
+                                    if kind == "item":
+                                        yield {
+                                            "type": "partial_result",
+                                            "data": {"stage_id": "multimodal_audit", "page_number": page_num, "field": field_name, "item": data}
+                                        }
+                                    else:
+                                        audit_result = data
+                        else:
+                            with usage_scope("multimodal_audit", page_num):
+                                audit_result = await asyncio.to_thread(
+                                    invoke_audit,
+                                    prompt=prompt,
+                                    response_model=PageAuditResult,
+                                    **audit_images,
+                                    **_generation_budget("multimodal_audit")
+                                )
+                        if pre_answered:
+                            audit_result = merge_pre_answered(audit_result, pre_answered)
                         _save_debug_json(audit_result, f"step_3_audit_result_page_{page_num}.json", debug_output_path)
 
                     except Exception as e:
@@ -318,6 +1128,17 @@ async def run_verification_workflow(
                         yield {"type": "verification_failed", "data": {"final_status": "Failure", "message": failure_message}}
                         return
         
+        if profiles is not None:
+            logger.info(f"Profile renders: NSV {renderers['nsv'].renders}, SV {renderers['sv'].renders}")
+        if alignment.removed or alignment.inserted:
+            # Every matching page passed, but the documents still differ by whole pages.
+            unmatched = []
+            if alignment.removed:
+                unmatched.append(f"page(s) {', '.join(map(str, alignment.removed))} of the original document are missing")
+            if alignment.inserted:
+                unmatched.append(f"page(s) {', '.join(map(str, alignment.inserted))} of the signed document are not in the original")
+            yield {"type": "verification_failed", "data": {"final_status": "Failure", "message": f"Verification failed: {' and '.join(unmatched)}."}}
+            return
         yield { "type": "workflow_complete", "data": { "final_status": "Success", "message": "All planned stages have finished." } }
         await asyncio.sleep(0.01)
             
@@ -327,4 +1148,7 @@ async def run_verification_workflow(
         yield {"type": "error", "message": str(e)}
     except Exception as e:
         logger.exception("An unexpected error occurred during the verification workflow.")
-        yield {"type": "error", "message": f"An unexpected server error occurred. Please check system logs."}
\ No newline at end of file
+        yield {"type": "error", "message": f"An unexpected server error occurred. Please check system logs."}
+    finally:
+        if page_reservation is not None:
+            page_reservation.release()
\ No newline at end of file
@@ -183,6 +183,9 @@ document.addEventListener('DOMContentLoaded', () => {
             case 'process_step_result':
                 renderProcessStep(event.data);
                 break;
+            case 'partial_result':
+                renderPartialResult(event.data);
+                break;
             case 'workflow_complete':
                 renderWorkflowComplete(event.data);
                 verifyButton.disabled = false;
@@ -330,6 +333,30 @@ function renderProcessStep(data) {
             `;
             break;
         
+        case 'page_alignment':
+            // Sent only when the pages do not correspond one to one.
+            const pairsHtml = result.pairs.map(pair => `<li>Original page ${pair.nsv_page} ↔ signed page ${pair.sv_page}</li>`).join('');
+            const removedHtml = result.removed_pages.length > 0
+                ? `<p><strong>Missing from the signed document:</strong> page(s) ${result.removed_pages.join(', ')}</p>`
+                : '';
+            const insertedHtml = result.inserted_pages.length > 0
+                ? `<p><strong>Not in the original document:</strong> signed page(s) ${result.inserted_pages.join(', ')}</p>`
+                : '';
+
+            cardContentHtml = `
+                <div class="card-header">
+                    <h4>Page Mapping</h4>
+                    <span class="status-badge status-discrepancy-found">Pages Differ</span>
+                </div>
+                <div class="card-content">
+                    ${removedHtml}
+                    ${insertedHtml}
+                    <h5>Matched Pages</h5>
+                    <ul>${pairsHtml}</ul>
+                </div>
+            `;
+            break;
+
         default:
             cardContentHtml = `<div class="card-content"><p>Unknown result type for stage: ${stage_id}</p></div>`;
     }
@@ -338,6 +365,17 @@ function renderProcessStep(data) {
     stageContainer.appendChild(resultCard);
 }
     
+    // Progress from a streamed audit; the full result card follows once the page audit completes.
+    function renderPartialResult(data) {
+        const { page_number, field, item } = data;
+        if (field === 'required_inputs' && item) {
+            const outcome = item.is_fulfilled ? 'fulfilled' : 'missing';
+            addLogMessage(`Page ${page_number}: ${item.input_type} ("${item.marker_text}") audited as ${outcome}.`);
+        } else if (field === 'content_differences' && item) {
+            addLogMessage(`Page ${page_number}: content change flagged: "${item.nsv_text}" -> "${item.sv_text}".`);
+        }
+    }
+
     function renderWorkflowComplete(data) {
         summarySection.classList.remove('hidden');
         finalStatusMessage.textContent = `${data.final_status}: ${data.message}`;
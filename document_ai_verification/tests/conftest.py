@@ -0,0 +1,7 @@
+# document_ai_verification/tests/conftest.py
+
+import sys
+from pathlib import Path
+
+# The package is imported as `document_ai_verification`, from the repository root.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
@@ -0,0 +1,80 @@
+# document_ai_verification/tests/test_artifacts.py
+
+import gzip
+import os
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from document_ai_verification.api.artifacts import HotArtifactCache, etag_matches, serve_artifact
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    (tmp_path / "report.json").write_text('{"pages": [' + ", ".join(["1"] * 500) + "]}", encoding="utf-8")
+    (tmp_path / "page.png").write_bytes(b"\x89PNG" + bytes(range(256)) * 4)
+    app = FastAPI()
+
+    @app.get("/temp/{name}")
+    def temp(name: str, request: Request):
+        return serve_artifact(request, tmp_path / name, settings={})
+
+    return tmp_path, TestClient(app)
+
+
+@pytest.mark.parametrize("header, matches", [
+    ('"abc"', True), ('W/"abc"', True), ('"x", "abc"', True), ("*", True), ('"abd"', False), ("", False), (None, False),
+])
+def test_etag_matching_is_weak(header, matches):
+    assert etag_matches(header, '"abc"') is matches
+
+
+def test_unchanged_artifacts_are_answered_with_304(artifacts):
+    directory, client = artifacts
+    first = client.get("/temp/page.png")
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "private, no-cache"
+    revalidated = client.get("/temp/page.png", headers={"If-None-Match": first.headers["etag"]})
+    assert (revalidated.status_code, revalidated.content) == (304, b"")
+
+    (directory / "page.png").write_bytes(b"\x89PNG changed")
+    os.utime(directory / "page.png", ns=(1, 1))
+    changed = client.get("/temp/page.png", headers={"If-None-Match": first.headers["etag"]})
+    assert (changed.status_code, changed.content) == (200, b"\x89PNG changed")
+
+
+def test_text_artifacts_are_gzipped_for_clients_that_accept_it(artifacts):
+    directory, client = artifacts
+    original = (directory / "report.json").read_bytes()
+    zipped = client.get("/temp/report.json", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["vary"] == "Accept-Encoding"
+    assert zipped.content == original  # Decoded by the client.
+    assert gzip.decompress((directory / "report.json.gz").read_bytes()) == original
+
+    plain = client.get("/temp/report.json", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["etag"] != zipped.headers["etag"]
+
+
+def test_images_support_ranges(artifacts):
+    _, client = artifacts
+    partial = client.get("/temp/page.png", headers={"Range": "bytes=0-3"})
+    assert (partial.status_code, partial.content) == (206, b"\x89PNG")
+
+
+def test_hot_cache_is_bounded_and_invalidated_by_file_changes(tmp_path):
+    paths = [tmp_path / f"{i}.png" for i in range(3)]
+    for path in paths:
+        path.write_bytes(b"x" * 40)
+    cache = HotArtifactCache(max_bytes=100, max_item_bytes=50)
+    for path in paths:
+        cache.put(path, path.stat(), path.read_bytes())
+    assert cache.get(paths[0], paths[0].stat()) is None  # Evicted: three entries do not fit.
+    assert cache.get(paths[2], paths[2].stat()) == b"x" * 40
+
+    paths[2].write_bytes(b"y" * 41)
+    assert cache.get(paths[2], paths[2].stat()) is None
+    cache.put(paths[1], paths[1].stat(), b"z" * 60)  # Over the per-item limit: not cached.
+    assert cache.get(paths[1], paths[1].stat()) == b"x" * 40
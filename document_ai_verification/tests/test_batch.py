@@ -0,0 +1,83 @@
+# document_ai_verification/tests/test_batch.py
+
+from document_ai_verification.core import batch
+from document_ai_verification.core.schemas import BatchPair, BatchPairResult, VerificationReport
+
+
+def _report() -> VerificationReport:
+    return VerificationReport(overall_status="Success", nsv_filename="nsv.pdf", sv_filename="sv.pdf", page_count=1, page_results=[])
+
+
+def _write_results(path, *records, partial_line=""):
+    lines = [record.model_dump_json() for record in records]
+    path.write_text("\n".join(lines) + "\n" + partial_line, encoding="utf-8")
+
+
+def test_checkpoint_skips_reported_pairs_and_retries_errors(tmp_path):
+    output = tmp_path / "results.jsonl"
+    _write_results(
+        output,
+        BatchPairResult(pair_id="done", report=_report()),
+        BatchPairResult(pair_id="failed", error="boom"),
+        partial_line='{"pair_id": "cut", "rep',
+    )
+    assert batch.load_completed_pair_ids(output) == {"done"}
+    assert batch.load_completed_pair_ids(tmp_path / "missing.jsonl") == set()
+
+
+def test_progress_counts_the_latest_record_of_each_pair(tmp_path):
+    output = tmp_path / "results.jsonl"
+    _write_results(
+        output,
+        BatchPairResult(pair_id="a", error="boom"),
+        BatchPairResult(pair_id="b", error="boom"),
+        BatchPairResult(pair_id="a", report=_report()),
+    )
+    assert batch.count_results(output) == {"completed": 1, "errored": 1}
+
+
+def test_resume_starts_after_a_partial_line(tmp_path):
+    output = tmp_path / "results.jsonl"
+    _write_results(output, BatchPairResult(pair_id="a", report=_report()), partial_line='{"pair_id": "b"')
+    batch._ensure_trailing_newline(output)
+    assert output.read_text(encoding="utf-8").endswith('{"pair_id": "b"\n')
+
+
+def test_completed_batch_is_not_run_again(tmp_path):
+    output = tmp_path / "results.jsonl"
+    pairs = [BatchPair(pair_id=pair_id, nsv_path="nsv.pdf", sv_path="sv.pdf") for pair_id in ("a", "b")]
+    _write_results(output, *(BatchPairResult(pair_id=pair.pair_id, report=_report()) for pair in pairs))
+    summary = batch.run_batch(pairs, output, max_workers=1, temp_base=str(tmp_path))
+    assert (summary.total, summary.skipped, summary.results) == (2, 2, [])
+    assert summary.batch_id == batch.default_batch_id(pairs)
+
+
+def _step(stage_id, result):
+    return {"type": "process_step_result", "data": {"stage_id": stage_id, "result": result}}
+
+
+def test_report_folds_every_stage():
+    events = [
+        _step("page_alignment", {"removed_pages": [], "inserted_pages": [4]}),
+        *(_step("requirement_analysis", {"page_number": n}) for n in (1, 2, 3)),
+        _step("content_verification", {"page_number": 1, "verification_status": "Verified"}),
+        _step("content_verification", {"page_number": 2, "verification_status": "Mismatch", "summary": "Clause 4 changed."}),
+        _step("multimodal_audit", {"page_number": 3, "page_status": "Input Missing"}),
+        {"type": "workflow_complete", "data": {"llm_usage": {"calls": 2}}},
+    ]
+    report = batch.build_report_from_events(events, "nsv.pdf", "sv.pdf")
+    assert report.overall_status == "Success"
+    assert report.page_count == 3
+    assert report.inserted_pages == [4]
+    assert [(page.page_number, page.page_status) for page in report.page_results] == [
+        (1, "Verified"), (2, "Content Mismatch"), (3, "Input Missing"),
+    ]
+    assert report.page_results[1].content_differences[0].description == "Clause 4 changed."
+    assert report.llm_usage == {"calls": 2}
+
+
+def test_report_of_a_failed_run():
+    events = [_step("requirement_analysis", {"page_number": 1}), {"type": "verification_failed", "data": {}}]
+    report = batch.build_report_from_events(events, "nsv.pdf", "sv.pdf")
+    assert report.overall_status == "Failure"
+    assert report.page_results == []
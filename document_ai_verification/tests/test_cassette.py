@@ -0,0 +1,71 @@
+# document_ai_verification/tests/test_cassette.py
+
+import pytest
+
+from document_ai_verification.ai.cassette import CassetteMissError, CassetteStore, fingerprint_request
+
+PAYLOAD = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0}
+
+
+def _store(tmp_path, mode):
+    return CassetteStore(path=str(tmp_path), mode=mode, replay_latency="zero")
+
+
+def _fail():
+    raise AssertionError("The live backend must not be called on replay.")
+
+
+def test_fingerprint_ignores_key_order():
+    reordered = {"temperature": 0, "messages": PAYLOAD["messages"], "model": "m"}
+    assert fingerprint_request("llm", PAYLOAD) == fingerprint_request("llm", reordered)
+    assert fingerprint_request("llm", PAYLOAD) != fingerprint_request("ocr", PAYLOAD)
+
+
+def test_call_replays_recording(tmp_path):
+    recorded = _store(tmp_path, "record").call("llm", PAYLOAD, lambda: {"answer": 42}, serialize=dict, deserialize=dict)
+    assert recorded == {"answer": 42}
+
+    replayed = _store(tmp_path, "replay").call("llm", PAYLOAD, _fail, serialize=dict, deserialize=dict)
+    assert replayed == {"answer": 42}
+
+
+def test_replay_miss_raises(tmp_path):
+    with pytest.raises(CassetteMissError):
+        _store(tmp_path, "replay").call("llm", PAYLOAD, _fail, serialize=dict, deserialize=dict)
+
+
+def test_stream_replays_recording(tmp_path):
+    chunks = ["{", '"a": 1', "}"]
+    recorded = list(_store(tmp_path, "record").stream("llm", PAYLOAD, lambda: iter(chunks), serialize=str, deserialize=str))
+    assert recorded == chunks
+
+    replayed = list(_store(tmp_path, "replay").stream("llm", PAYLOAD, _fail, serialize=str, deserialize=str))
+    assert replayed == chunks
+
+
+def test_stream_closed_early_is_not_recorded(tmp_path):
+    closed = []
+
+    def live_stream():
+        try:
+            yield from ["{", '"a": 1', "}"]
+        finally:
+            closed.append(True)
+
+    stream = _store(tmp_path, "record").stream("llm", PAYLOAD, live_stream, serialize=str, deserialize=str)
+    assert next(stream) == "{"
+    stream.close()
+
+    assert closed == [True]
+    with pytest.raises(CassetteMissError):
+        list(_store(tmp_path, "replay").stream("llm", PAYLOAD, _fail, serialize=str, deserialize=str))
+
+
+def test_failed_stream_is_not_recorded(tmp_path):
+    def live_stream():
+        yield "{"
+        raise ConnectionError("dropped")
+
+    with pytest.raises(ConnectionError):
+        list(_store(tmp_path, "record").stream("llm", PAYLOAD, live_stream, serialize=str, deserialize=str))
+    assert _store(tmp_path, "replay").load("llm", fingerprint_request("llm", PAYLOAD)) is None
@@ -0,0 +1,125 @@
+# document_ai_verification/tests/test_endpoint_pool.py
+
+import httpx
+import pytest
+from openai import APIConnectionError
+
+from document_ai_verification.ai.llm.endpoint_pool import CLOSED, HALF_OPEN, OPEN, EndpointPool, parse_endpoint_urls
+
+SETTINGS = {"health_check_interval_seconds": 0, "backoff_base_seconds": 0, "failure_threshold": 2, "circuit_open_seconds": 30}
+
+
+def _pool(*urls, **settings):
+    return EndpointPool(list(urls), api_key="x", settings={**SETTINGS, **settings})
+
+
+def _url(client) -> str:
+    return str(client.base_url).rstrip("/")
+
+
+def _connection_error():
+    return APIConnectionError(request=httpx.Request("POST", "http://llm/v1/chat/completions"))
+
+
+def _prefer_first(pool):
+    """Routing picks the least loaded endpoint: a phantom request on the others makes it deterministic."""
+    for endpoint in pool.endpoints[1:]:
+        endpoint.outstanding = 1
+
+
+def _request(down, served):
+    """A request that fails on the endpoints in `down` and records where it was served."""
+    def make_request(client):
+        if _url(client) in down:
+            raise _connection_error()
+        served.append(_url(client))
+        return "ok"
+    return make_request
+
+
+def test_endpoint_urls_are_parsed():
+    assert parse_endpoint_urls(" http://a/v1/, http://b/v1 ") == ["http://a/v1", "http://b/v1"]
+    assert parse_endpoint_urls(["http://a/v1"]) == ["http://a/v1"]
+    with pytest.raises(ValueError):
+        parse_endpoint_urls(" , ")
+
+
+def test_failed_requests_are_retried_on_another_endpoint():
+    pool = _pool("http://a", "http://b")
+    _prefer_first(pool)
+    served = []
+    for _ in range(4):
+        assert pool.call(_request({"http://a"}, served)) == "ok"
+    assert served == ["http://b"] * 4
+    a, b = pool.endpoints
+    # Ejected after two consecutive failures; afterwards no request is sent to it.
+    assert (a.state, a.errors, a.requests) == (OPEN, 2, 2)
+    assert (b.state, b.errors) == (CLOSED, 0)
+
+
+def test_an_open_circuit_lets_one_trial_through_after_its_cool_down():
+    pool = _pool("http://a", "http://b")
+    _prefer_first(pool)
+    a, _ = pool.endpoints
+    for _ in range(2):
+        pool.call(_request({"http://a"}, []))
+    assert a.state == OPEN
+
+    a.opened_at -= 30
+    trial_seen = []
+
+    def trial(client):
+        if _url(client) == "http://a":
+            # While the trial is in flight, other requests avoid the endpoint.
+            trial_seen.append((a.state, pool._select(set()).url))
+        return "ok"
+
+    pool.call(trial)
+    assert trial_seen == [(HALF_OPEN, "http://b")]
+    assert (a.state, a.consecutive_failures) == (CLOSED, 0)
+
+
+def test_a_failed_trial_reopens_the_circuit():
+    pool = _pool("http://a", failure_threshold=1, max_attempts=1)
+    a = pool.endpoints[0]
+    with pytest.raises(APIConnectionError):
+        pool.call(_request({"http://a"}, []))
+    a.opened_at -= 30
+    with pytest.raises(APIConnectionError):
+        pool.call(_request({"http://a"}, []))
+    assert a.state == OPEN
+    assert a.opened_at > 0
+
+
+def test_request_errors_are_neither_retried_nor_counted():
+    pool = _pool("http://a", "http://b")
+    attempts = []
+
+    def bad_request(client):
+        attempts.append(_url(client))
+        raise ValueError("invalid request")
+
+    with pytest.raises(ValueError):
+        pool.call(bad_request)
+    assert len(attempts) == 1
+    assert all(e.errors == 0 and e.state == CLOSED for e in pool.endpoints)
+
+
+def test_streams_are_retried_only_before_their_first_chunk():
+    pool = _pool("http://a", "http://b")
+
+    def failing_before_output(client):
+        if _url(client) == "http://a":
+            raise _connection_error()
+        return iter(["chunk"])
+
+    _prefer_first(pool)
+    assert list(pool.stream(failing_before_output)) == ["chunk"]
+
+    def failing_after_output(client):
+        yield "partial"
+        raise _connection_error()
+
+    with pytest.raises(APIConnectionError):
+        list(pool.stream(failing_after_output))
+    assert sum(e.requests for e in pool.endpoints) == 3
@@ -0,0 +1,102 @@
+# document_ai_verification/tests/test_image_utils.py
+
+import json
+
+import cv2
+import numpy as np
+
+from document_ai_verification.utils.image_utils import (
+    DIFF_SPEC_FILENAME, build_audit_crops, merge_labeled_boxes, render_diff_visual, write_diff_spec,
+)
+
+
+def _page(height=1000, width=800, value=255):
+    return np.full((height, width), value, dtype=np.uint8)
+
+
+def test_touching_areas_merge_and_keep_their_labels():
+    areas = [("signature", (100, 500, 300, 540)), ("difference", (310, 505, 360, 530)), ("date", (100, 100, 200, 120))]
+    merged = merge_labeled_boxes(areas, padding=10, image_shape=(1000, 800))
+    assert merged == [((90, 90, 210, 130), ["date"]), ((90, 490, 370, 550), ["signature", "difference"])]
+
+
+def test_padding_is_clipped_to_the_page():
+    assert merge_labeled_boxes([("edge", (0, 0, 20, 20))], padding=50, image_shape=(60, 40)) == [((0, 0, 40, 60), ["edge"])]
+
+
+def test_crops_are_cut_from_both_versions():
+    nsv, sv = _page(), _page(value=0)
+    crops = build_audit_crops(nsv, sv, [("signature", (100, 500, 300, 540)), ("date", (100, 100, 200, 120))], padding=0)
+    assert [(c["id"], c["bbox"], c["labels"], c["scale"]) for c in crops] == [
+        ("R1", (100, 100, 200, 120), ["date"], 1.0), ("R2", (100, 500, 300, 540), ["signature"], 1.0),
+    ]
+    assert crops[1]["nsv"].shape == crops[1]["sv"].shape == (40, 200)
+    assert crops[1]["sv"].max() == 0
+
+
+def test_full_pages_are_used_when_crops_do_not_pay_off():
+    nsv, sv = _page(), _page()
+    many = [(f"area {i}", (10, 100 * i, 20, 100 * i + 10)) for i in range(9)]
+    assert build_audit_crops(nsv, sv, many, padding=0, max_regions=8) is None
+    assert build_audit_crops(nsv, sv, [("most", (0, 0, 800, 600))], padding=0) is None
+    assert build_audit_crops(nsv, _page(height=999), [("a", (0, 0, 10, 10))]) is None
+    assert build_audit_crops(nsv, sv, []) is None
+
+
+def test_crops_are_downscaled_to_the_pixel_budget():
+    crops = build_audit_crops(_page(), _page(), [("a", (0, 0, 200, 100))], padding=0, max_pixels=10_000)
+    assert crops[0]["nsv"].shape == (50, 100)
+    assert crops[0]["scale"] == 0.5
+
+
+def test_crops_come_from_the_loaders_when_given():
+    # A tile loader at twice the resolution of the compared renders.
+    loader = lambda bbox: np.zeros((2 * (bbox[3] - bbox[1]), 2 * (bbox[2] - bbox[0])), dtype=np.uint8)
+    crops = build_audit_crops(_page(), _page(), [("a", (0, 0, 200, 100))], padding=0, crop_loaders={"nsv": loader, "sv": loader})
+    assert crops[0]["sv"].shape == (200, 400)
+    assert crops[0]["scale"] == 2.0
+
+
+def _diff_dir(tmp_path, settings=None):
+    original, signed = tmp_path / "nsv.png", tmp_path / "sv.png"
+    cv2.imwrite(str(original), np.full((2000, 1000, 3), 255, dtype=np.uint8))
+    cv2.imwrite(str(signed), np.full((2000, 1000, 3), 255, dtype=np.uint8))
+    diff_dir = tmp_path / "page_1_diff"
+    names = write_diff_spec(diff_dir, original, signed, [(100, 100, 200, 150), (500, 900, 600, 950)], settings)
+    return diff_dir, names
+
+
+def test_spec_is_written_without_rendering_anything(tmp_path):
+    diff_dir, names = _diff_dir(tmp_path)
+    assert names == {
+        "original": "diff_original.webp", "signed": "diff_signed.webp", "side_by_side": "side_by_side.webp",
+        "crops": ["crop_1.webp", "crop_2.webp"],
+    }
+    assert [path.name for path in diff_dir.iterdir()] == [DIFF_SPEC_FILENAME]
+    assert json.loads((diff_dir / DIFF_SPEC_FILENAME).read_text())["bboxes"] == [[100, 100, 200, 150], [500, 900, 600, 950]]
+
+
+def test_spec_follows_the_settings(tmp_path):
+    _, names = _diff_dir(tmp_path, {"format": "jpeg", "side_by_side": False, "max_crop_thumbnails": 1})
+    assert names == {"original": "diff_original.jpg", "signed": "diff_signed.jpg", "crops": ["crop_1.jpg"]}
+
+
+def test_visuals_are_rendered_on_first_request(tmp_path):
+    diff_dir, names = _diff_dir(tmp_path, {"max_page_height": 1000})
+    page = render_diff_visual(diff_dir, names["original"])
+    assert page == diff_dir / names["original"]
+    assert cv2.imread(str(page)).shape == (1000, 500, 3)
+    side_by_side = cv2.imread(str(render_diff_visual(diff_dir, names["side_by_side"])))
+    assert side_by_side.shape == (1000, 1008, 3)
+    # Crops are at native resolution: the box plus 40 px of padding on each side, for both pages.
+    crop = cv2.imread(str(render_diff_visual(diff_dir, names["crops"][1])))
+    assert crop.shape == (130, 368, 3)
+    assert not list(diff_dir.glob(".*.tmp"))
+
+
+def test_unknown_visuals_are_not_rendered(tmp_path):
+    diff_dir, _ = _diff_dir(tmp_path)
+    assert render_diff_visual(diff_dir, "crop_3.webp") is None
+    assert render_diff_visual(diff_dir, "diff_original.png") is None
+    assert render_diff_visual(diff_dir, "../nsv.png") is None
+    assert render_diff_visual(tmp_path, "diff_original.webp") is None
@@ -0,0 +1,106 @@
+# document_ai_verification/tests/test_input_regions.py
+
+import cv2
+import numpy as np
+
+from document_ai_verification.ai.llm.schemas import (
+    AuditedContentDifference, AuditedInput, PageAuditResult, PageHolisticAnalysis, RequiredInput,
+)
+from document_ai_verification.core.input_regions import merge_pre_answered, pre_answer_inputs
+from document_ai_verification.utils.image_utils import score_input_fill
+
+
+def _input(marker_text, is_fulfilled):
+    return AuditedInput(input_type="signature", marker_text=marker_text, is_fulfilled=is_fulfilled, audit_notes="")
+
+
+SIGNED = _input("Signature", True)
+
+
+def test_merge_keeps_a_failing_model_verdict():
+    # A 'Content Mismatch' without listed differences must not become 'Verified'.
+    audit = PageAuditResult(page_number=1, page_status="Content Mismatch", required_inputs=[_input("Date", True)])
+    merged = merge_pre_answered(audit, [SIGNED])
+    assert merged.page_status == "Content Mismatch"
+    assert [a.marker_text for a in merged.required_inputs] == ["Signature", "Date"]
+
+
+def test_merge_replaces_the_model_entry_for_a_decided_marker():
+    audit = PageAuditResult(page_number=1, page_status="Verified", required_inputs=[_input("Signature", True), _input("Date", True)])
+    merged = merge_pre_answered(audit, [SIGNED])
+    assert merged.page_status == "Verified"
+    assert [a.marker_text for a in merged.required_inputs] == ["Signature", "Date"]
+
+
+def test_merge_only_downgrades():
+    audit = PageAuditResult(page_number=1, page_status="Verified", required_inputs=[_input("Date", False)])
+    assert merge_pre_answered(audit, [SIGNED]).page_status == "Input Missing"
+
+    difference = AuditedContentDifference(nsv_text="30 days", sv_text="90 days", description="Notice period changed.")
+    audit = PageAuditResult(page_number=1, page_status="Input Missing", content_differences=[difference])
+    assert merge_pre_answered(audit, [SIGNED]).page_status == "Input Missing and Content Mismatch"
+
+
+CHECKBOX_MARKER = (130, 100, 200, 120)
+SIGNATURE_MARKER = (300, 200, 380, 220)
+SIGNATURE_REGION = (250, 150, 700, 250)
+
+
+def _blank_form() -> np.ndarray:
+    page = np.full((400, 800), 255, dtype=np.uint8)
+    cv2.rectangle(page, (100, 100), (120, 120), 0, 2)  # The checkbox left of its label.
+    return page
+
+
+def _signed_form(tick: bool = True, signature: bool = True, speck: bool = False) -> np.ndarray:
+    page = _blank_form()
+    if tick:
+        cv2.line(page, (104, 104), (116, 116), 0, 3)
+        cv2.line(page, (116, 104), (104, 116), 0, 3)
+    if speck:
+        page[110, 110] = 0
+    if signature:
+        cv2.polylines(page, [np.array([[400, 230], [450, 190], [500, 235], [560, 195], [620, 230]])], False, 0, 3)
+    return page
+
+
+def _regions():
+    return [
+        {"input": RequiredInput(input_type="checkbox", marker_text="I agree", description=""),
+         "marker_bbox": CHECKBOX_MARKER, "region": (80, 50, 700, 150)},
+        {"input": RequiredInput(input_type="signature", marker_text="Signature:", description=""),
+         "marker_bbox": SIGNATURE_MARKER, "region": SIGNATURE_REGION},
+    ]
+
+
+def test_fill_score_of_a_checkbox_counts_only_its_interior():
+    nsv = _blank_form()
+    ticked = score_input_fill(nsv, _signed_form(), (80, 50, 700, 150), CHECKBOX_MARKER, "checkbox")
+    assert ticked["method"] == "checkbox_interior"
+    assert ticked["score"] == 1.0
+    assert score_input_fill(nsv, _signed_form(tick=False, speck=True), (80, 50, 700, 150), CHECKBOX_MARKER, "checkbox")["score"] == 0.0
+
+
+def test_fill_score_of_a_signature_uses_its_input_area():
+    nsv = _blank_form()
+    signed = score_input_fill(nsv, _signed_form(), SIGNATURE_REGION, SIGNATURE_MARKER, "signature")
+    assert (signed["method"], signed["score"]) == ("input_area", 1.0)
+    assert score_input_fill(nsv, nsv, SIGNATURE_REGION, SIGNATURE_MARKER, "signature")["score"] == 0.0
+
+
+def test_pre_answer_decides_only_clearly_filled_inputs():
+    requirements = PageHolisticAnalysis(required_inputs=[r["input"] for r in _regions()], summary="")
+    answered, undecided, scores = pre_answer_inputs(_blank_form(), _signed_form(signature=False), requirements, _regions())
+    assert [(a.marker_text, a.is_fulfilled) for a in answered] == [("I agree", True)]
+    # An input that looks empty is still left to the model.
+    assert [r.marker_text for r in undecided] == ["Signature:"]
+    assert [s["marker_text"] for s in scores] == ["I agree", "Signature:"]
+
+
+def test_pre_answer_leaves_everything_to_the_model_without_regions():
+    requirements = PageHolisticAnalysis(required_inputs=[r["input"] for r in _regions()], summary="")
+    assert pre_answer_inputs(_blank_form(), _signed_form(), requirements, None) == ([], requirements.required_inputs, [])
+    disabled = pre_answer_inputs(_blank_form(), _signed_form(), requirements, _regions(), {"enabled": False})
+    assert disabled[0] == []
+    only_signatures = pre_answer_inputs(_blank_form(), _signed_form(), requirements, _regions(), {"input_types": ["signature"]})
+    assert [a.marker_text for a in only_signatures[0]] == ["Signature:"]
@@ -0,0 +1,77 @@
+# document_ai_verification/tests/test_json_repair.py
+
+import pytest
+from openai.types.chat import ChatCompletion
+
+from document_ai_verification.ai.llm.json_repair import TruncatedOutputError, repair_json_output
+from document_ai_verification.ai.llm.client import LLMService, StructuredOutputError
+from document_ai_verification.ai.llm.schemas import PageAuditResult
+
+AUDITED = '{"input_type": "signature", "marker_text": "Sign here", "is_fulfilled": true, "audit_notes": "Signed."}'
+
+
+def test_valid_json_is_unchanged():
+    raw = f'{{"page_number": 1, "page_status": "Verified", "required_inputs": [{AUDITED}]}}'
+    data = repair_json_output(raw, PageAuditResult)
+    assert PageAuditResult.model_validate(data).required_inputs[0].marker_text == "Sign here"
+
+
+def test_code_fences_prose_and_trailing_commas():
+    raw = f'Here is the result:\n```json\n{{"page_number": 1, "page_status": "Verified", "required_inputs": [{AUDITED},],}}\n```'
+    data = repair_json_output(raw, PageAuditResult)
+    assert len(data["required_inputs"]) == 1
+
+
+def test_enum_casing_is_normalized():
+    data = repair_json_output('{"page_number": 2, "page_status": " verified "}', PageAuditResult)
+    assert data["page_status"] == "Verified"
+
+
+def test_truncated_output_is_not_repaired():
+    # Closing the object early would silently drop the 'Date' entry.
+    raw = f'{{"page_number": 1, "page_status": "Verified", "required_inputs": [{AUDITED}, {{"input_type": "date", "marker_text": "Da'
+    with pytest.raises(TruncatedOutputError):
+        repair_json_output(raw, PageAuditResult)
+
+
+def test_commas_inside_strings_are_kept():
+    notes = 'Signed (see list: a, b,], c,})'
+    raw = f'{{"page_number": 1, "page_status": "Verified", "required_inputs": [{AUDITED.replace("Signed.", notes)},],}}'
+    data = repair_json_output(raw, PageAuditResult)
+    assert data["required_inputs"][0]["audit_notes"] == notes
+
+
+def test_no_json_object_raises():
+    with pytest.raises(ValueError):
+        repair_json_output("The page looks fine.", PageAuditResult)
+
+
+def _completion(content, finish_reason="stop"):
+    return ChatCompletion.model_validate({
+        "id": "c", "object": "chat.completion", "created": 0, "model": "m",
+        "choices": [{"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": content}}],
+    })
+
+
+def test_truncated_response_goes_to_the_targeted_retry(monkeypatch):
+    service = LLMService(api_key="x", model="m", base_url="http://127.0.0.1:9/v1", max_context_tokens=4096)
+    complete = f'{{"page_number": 1, "page_status": "Verified", "required_inputs": [{AUDITED}]}}'
+    responses = [_completion(complete[:60], "length"), _completion(complete)]
+    sent = []
+
+    def create(messages, response_model, **kwargs):
+        sent.append(messages)
+        return responses.pop(0)
+
+    monkeypatch.setattr(service, "_create_structured_completion", create)
+    result = service.invoke_structured("Audit the page.", PageAuditResult)
+    assert [audited.marker_text for audited in result.required_inputs] == ["Sign here"]
+    assert len(sent) == 2 and "token limit" in sent[1][-1]["content"]
+
+
+def test_truncated_retry_fails(monkeypatch):
+    service = LLMService(api_key="x", model="m", base_url="http://127.0.0.1:9/v1", max_context_tokens=4096)
+    complete = f'{{"page_number": 1, "page_status": "Verified", "required_inputs": [{AUDITED}]}}'
+    monkeypatch.setattr(service, "_create_structured_completion", lambda messages, response_model, **kwargs: _completion(complete, "length"))
+    with pytest.raises(StructuredOutputError):
+        service.invoke_structured("Audit the page.", PageAuditResult)
@@ -0,0 +1,86 @@
+# document_ai_verification/tests/test_layout_utils.py
+
+from document_ai_verification.ai.ocr.schemas import OCRDetail
+from document_ai_verification.utils.layout_utils import (
+    WordBox, build_input_region, locate_marker, text_changes_outside_regions, text_layer_diff,
+)
+
+
+def _line(text, y=100, x=50, word_width=60, height=20):
+    """The words of one text line, laid out left to right."""
+    return [WordBox(word, (x + i * (word_width + 10), y, x + i * (word_width + 10) + word_width, y + height)) for i, word in enumerate(text.split())]
+
+
+def test_locate_marker_prefers_the_form_field_over_running_text():
+    words = _line("the Effective Date: applies", y=100) + _line("Effective Date: ________", y=300)
+    bbox, indices = locate_marker("Effective Date:", words)
+    assert indices == [4, 5]
+    assert bbox == (50, 300, 180, 320)
+
+
+def test_locate_marker_tolerates_noise_and_skips_used_words():
+    words = _line("Signature: ______", y=100) + _line("Signatur3: ______", y=300)
+    _, first = locate_marker("Signature:", words)
+    _, second = locate_marker("Signature:", words, skip_indices=first)
+    assert (first, second) == ([0], [2])
+    assert locate_marker("Witness", words) is None
+    assert locate_marker("---", words) is None
+
+
+def test_input_region_stops_at_the_next_label():
+    words = _line("Name: ______ Date:", y=100)
+    marker_bbox, marker_indices = locate_marker("Name:", words)
+    region = build_input_region(marker_bbox, marker_indices, words, (1000, 800))
+    # Extends past the leader, up to the next label, with margins in marker heights.
+    assert region == (0, 50, 189, 150)
+
+
+def test_input_region_is_capped_and_clipped_to_the_page():
+    words = [WordBox("Signature:", (700, 10, 780, 30))]
+    region = build_input_region(words[0].bbox, [0], words, (40, 800), max_right_page_ratio=0.45)
+    assert region == (650, 0, 800, 40)
+
+
+def test_text_changes_allow_insertions_inside_regions_only():
+    nsv = _line("Name: ______ Date:")
+    inside = nsv[:2] + [WordBox("Jane", (130, 100, 170, 120))] + nsv[2:]
+    outside = nsv + [WordBox("Void", (600, 500, 650, 520))]
+    regions = [(0, 50, 189, 150)]
+    assert text_changes_outside_regions(nsv, inside, regions) == []
+    assert text_changes_outside_regions(nsv, outside, regions) == ["insert: '' -> 'Void'"]
+
+
+def test_text_changes_report_edits_of_original_text_inside_regions():
+    nsv = _line("Name: ______ Date:")
+    edited = [nsv[0], nsv[1], WordBox("Time:", nsv[2].bbox)]
+    assert text_changes_outside_regions(nsv, edited, [(0, 0, 800, 1000)]) == ["replace: 'Date:' -> 'Time:'"]
+    assert text_changes_outside_regions(nsv, nsv[:2], [(0, 0, 800, 1000)]) == ["delete: 'Date:' -> ''"]
+
+
+def _details(*lines):
+    """Text-layer words, one list of words per line, 50 px per word and 30 px per line."""
+    return [
+        OCRDetail(poly=[50 * w, 30 * l, 50 * w + 40, 30 * l, 50 * w + 40, 30 * l + 20, 50 * w, 30 * l + 20], text=word, line_num=l + 1, word_num=w + 1)
+        for l, line in enumerate(lines) for w, word in enumerate(line.split())
+    ]
+
+
+def test_text_layer_diff_ignores_reflow_and_punctuation_only_words():
+    nsv = _details("Name: ____ the tenant", "agrees to pay")
+    sv = _details("Name: the", "tenant agrees to pay")
+    assert text_layer_diff(nsv, sv) == []
+
+
+def test_text_layer_diff_locates_each_change():
+    nsv = _details("Rent is 100 per month", "Notice period 30 days")
+    sv = _details("Rent is 900 per month", "Notice period 30 days unless waived")
+    replaced, added = text_layer_diff(nsv, sv)
+    assert replaced == {
+        "type": "Replace",
+        "original_lines": {"start": 1, "end": 1, "content": "100", "bbox": [100, 0, 140, 20]},
+        "new_lines": {"start": 1, "end": 1, "content": "900", "bbox": [100, 0, 140, 20]},
+    }
+    assert added["type"] == "Addition"
+    assert added["original_lines"] == {"start": None, "end": None, "content": "", "bbox": None}
+    assert added["new_lines"] == {"start": 2, "end": 2, "content": "unless waived", "bbox": [200, 30, 290, 50]}
+    assert text_layer_diff(sv, nsv)[1]["type"] == "Deletion"
@@ -0,0 +1,73 @@
+# document_ai_verification/tests/test_memory_utils.py
+
+import asyncio
+
+import numpy as np
+from PIL import Image
+
+from document_ai_verification.utils.memory_utils import MemoryBudget, decoded_image_bytes
+
+
+def test_reservations_within_the_budget_are_granted_at_once():
+    async def scenario():
+        budget = MemoryBudget(100)
+        first, second = await budget.acquire(60), await budget.acquire(40)
+        assert budget.used_bytes == 100
+        first.release()
+        first.release()  # Releasing twice is harmless.
+        assert budget.used_bytes == 40
+        second.release()
+        return budget
+
+    budget = asyncio.run(scenario())
+    assert (budget.used_bytes, budget.peak_used_bytes, budget.waits) == (0, 100, 0)
+
+
+def test_a_reservation_waits_until_the_bytes_are_released():
+    async def scenario():
+        budget = MemoryBudget(100, poll_seconds=0.01)
+        held = await budget.acquire(80)
+        waiter = asyncio.create_task(budget.acquire(40))
+        await asyncio.sleep(0.05)
+        assert not waiter.done()
+        held.release()
+        granted = await asyncio.wait_for(waiter, timeout=1)
+        assert budget.used_bytes == 40
+        granted.release()
+        return budget
+
+    budget = asyncio.run(scenario())
+    assert budget.waits == 1
+    assert budget.stats()["total_wait_seconds"] > 0
+
+
+def test_an_oversized_reservation_runs_alone():
+    async def scenario():
+        budget = MemoryBudget(100, poll_seconds=0.01)
+        small = await budget.acquire(10)
+        oversized = asyncio.create_task(budget.acquire(500))
+        await asyncio.sleep(0.05)
+        assert not oversized.done()
+        small.release()
+        (await asyncio.wait_for(oversized, timeout=1)).release()
+        return budget
+
+    assert asyncio.run(scenario()).peak_used_bytes == 500
+
+
+def test_a_zero_budget_disables_the_limit():
+    async def scenario():
+        budget = MemoryBudget(0)
+        reservation = await budget.acquire(10**12)
+        return budget, reservation
+
+    budget, reservation = asyncio.run(scenario())
+    assert (budget.used_bytes, reservation.nbytes) == (0, 0)
+
+
+def test_decoded_size_is_read_from_the_header(tmp_path):
+    path = tmp_path / "page.png"
+    Image.fromarray(np.zeros((30, 20), dtype=np.uint8)).save(path)
+    assert decoded_image_bytes(path) == 600
+    assert decoded_image_bytes(path, channels=3) == 1800
+    assert decoded_image_bytes(tmp_path / "missing.png") == 0
@@ -0,0 +1,86 @@
+# document_ai_verification/tests/test_model_cascade.py
+
+from document_ai_verification.ai.llm.schemas import (
+    AuditedInput, PageHolisticAnalysis, RequiredInput, TextPageAuditResult, TextPageHolisticAnalysis,
+)
+from document_ai_verification.core.model_cascade import ModelCascade
+
+
+class TextModel:
+    """Answers every prompt with the next prepared answer (or raises it)."""
+    model = "small"
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    def invoke_structured(self, prompt, response_model):
+        self.prompts.append(prompt)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def _requirements(*inputs):
+    return PageHolisticAnalysis(required_inputs=[RequiredInput(input_type=t, marker_text=m, description="") for t, m in inputs], summary="")
+
+
+def _audit(status="Verified", confidence=0.95, markers=("Name:",)):
+    audited = [AuditedInput(input_type="full_name", marker_text=m, is_fulfilled=True, audit_notes="") for m in markers]
+    return TextPageAuditResult(page_number=0, page_status=status, required_inputs=audited, confidence=confidence)
+
+
+NAME_ONLY = _requirements(("full_name", "Name:"))
+
+
+def test_a_confident_analysis_is_used():
+    cascade = ModelCascade(TextModel(TextPageHolisticAnalysis(required_inputs=[], summary="No inputs.", confidence=0.9)))
+    assert cascade.analyze_requirements("Terms and conditions") == PageHolisticAnalysis(required_inputs=[], summary="No inputs.")
+    assert cascade.stats()["stages"] == {"requirement_analysis": {"accepted": 1, "escalated": 0, "failed": 0}}
+
+
+def test_unsure_or_failing_text_models_escalate():
+    unsure = TextPageHolisticAnalysis(required_inputs=[], summary="", confidence=0.5)
+    cascade = ModelCascade(TextModel(unsure, RuntimeError("backend down")), {"min_confidence": 0.85})
+    assert cascade.analyze_requirements("Terms") is None
+    assert cascade.analyze_requirements("Terms") is None
+    assert cascade.stats()["stages"]["requirement_analysis"] == {"accepted": 0, "escalated": 1, "failed": 1}
+
+
+def test_scanned_pages_never_reach_the_text_model():
+    model = TextModel()
+    assert ModelCascade(model).analyze_requirements("  \n") is None
+    assert model.prompts == []
+
+
+def test_a_confident_passing_audit_is_used_for_its_page():
+    cascade = ModelCascade(TextModel(_audit()))
+    result = cascade.audit("+ Name: Jane Doe", NAME_ONLY, page_number=4)
+    assert (result.page_number, result.page_status) == (4, "Verified")
+    assert cascade.stats()["stages"]["multimodal_audit"]["accepted"] == 1
+
+
+def test_visual_inputs_go_to_the_vision_model():
+    model = TextModel()
+    cascade = ModelCascade(model)
+    assert cascade.audit("+ Jane", _requirements(("full_name", "Name:"), ("Signature", "Sign:")), page_number=1) is None
+    assert model.prompts == []
+    custom = ModelCascade(TextModel(_audit(markers=("Name:", "Sign:"))), {"visual_input_types": ["stamp"]})
+    assert custom.audit("+ Jane", _requirements(("full_name", "Name:"), ("signature", "Sign:")), page_number=1) is not None
+
+
+def test_incomplete_or_failing_audits_escalate():
+    cascade = ModelCascade(TextModel(_audit(markers=()), _audit(status="Content Mismatch")))
+    assert cascade.audit("+ Jane", NAME_ONLY, page_number=1) is None
+    assert cascade.audit("- 30 days + 90 days", NAME_ONLY, page_number=1) is None
+    assert cascade.stats()["stages"]["multimodal_audit"] == {"accepted": 0, "escalated": 2, "failed": 0}
+
+    trusting = ModelCascade(TextModel(_audit(status="Content Mismatch")), {"accept_failures": True})
+    assert trusting.audit("- 30 days + 90 days", NAME_ONLY, page_number=1).page_status == "Content Mismatch"
+
+
+def test_only_the_configured_stages_are_covered():
+    cascade = ModelCascade(TextModel(), {"stages": ["requirement_analysis"]})
+    assert cascade.covers("requirement_analysis")
+    assert not cascade.covers("multimodal_audit")
@@ -0,0 +1,52 @@
+# document_ai_verification/tests/test_ocr_client.py
+
+import cv2
+import numpy as np
+
+from document_ai_verification.ai.ocr import client
+from document_ai_verification.ai.ocr.schemas import OCRDetail, OCRResponse
+
+
+def _response(*words, status="success"):
+    """One OCR line per word, each word at the top-left of its crop."""
+    details = [OCRDetail(poly=[0, 0, 20, 0, 20, 10, 0, 10], text=word, line_num=line, word_num=1) for line, word in enumerate(words)]
+    return OCRResponse(status=status, plain_text="\n".join(words), detailed_data=details)
+
+
+def test_merge_shifts_polygons_and_keeps_line_numbers_unique():
+    merged = client._merge_region_responses([(100, 200, 1.0), (10, 20, 2.0)], [_response("Jane", "Doe"), _response("2024")])
+    assert merged.status == "success"
+    assert merged.plain_text == "Jane\nDoe\n2024"
+    assert [(d.text, d.line_num) for d in merged.detailed_data] == [("Jane", 0), ("Doe", 1), ("2024", 2)]
+    assert merged.detailed_data[0].poly == [100, 200, 120, 200, 120, 210, 100, 210]
+    # The second crop was OCRed at twice the page resolution.
+    assert merged.detailed_data[2].poly == [10, 20, 20, 20, 20, 25, 10, 25]
+
+
+def test_merge_reports_a_failed_region():
+    merged = client._merge_region_responses([(0, 0, 1.0), (0, 0, 1.0)], [_response("ok"), _response(status="error")])
+    assert merged.status == "error"
+    assert merged.plain_text == "ok"
+
+
+def test_only_the_regions_are_sent(monkeypatch):
+    sent = []
+
+    def post(png_bytes, filename, api_url):
+        crop = cv2.imdecode(np.frombuffer(png_bytes, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+        sent.append((filename, crop.shape[:2]))
+        return _response(filename)
+
+    monkeypatch.setattr(client, "_post_image_bytes_for_ocr", post)
+    page = np.full((1000, 800, 3), 255, dtype=np.uint8)
+    # The second region is clipped to the page; the third lies outside it.
+    merged = client.extract_text_from_regions(page, [(10, 20, 110, 70), (700, 900, 900, 1100), (900, 0, 950, 10)], "http://ocr")
+    assert sorted(sent) == [("region_10_20.png", (50, 100)), ("region_700_900.png", (100, 100))]
+    assert merged.plain_text == "region_10_20.png\nregion_700_900.png"
+    assert merged.detailed_data[1].poly[:2] == [700, 900]
+
+
+def test_no_regions_means_no_requests(monkeypatch):
+    monkeypatch.setattr(client, "_post_image_bytes_for_ocr", lambda *args: 1 / 0)
+    merged = client.extract_text_from_regions(np.zeros((10, 10, 3), dtype=np.uint8), [], "http://ocr")
+    assert (merged.status, merged.plain_text, merged.detailed_data) == ("success", "", [])
@@ -0,0 +1,54 @@
+# document_ai_verification/tests/test_page_alignment.py
+
+from document_ai_verification.core.page_alignment import PageFingerprint, align_pages
+from document_ai_verification.utils.text_utils import text_fingerprint
+
+PAGE_TEXTS = [
+    "Employment agreement between the employer and the employee named below",
+    "Article one describes the duties and the working hours of the position",
+    "Article two sets out the salary benefits and the review schedule",
+    "Signatures of both parties and the date on which this agreement is signed",
+]
+
+
+def _pages(texts):
+    return [
+        PageFingerprint(page_num=number, text_sha256=text_fingerprint(text), tokens=tuple(text.casefold().split()), image_dhash=None)
+        for number, text in enumerate(texts, 1)
+    ]
+
+
+def test_identical_documents_pair_page_by_page():
+    alignment = align_pages(_pages(PAGE_TEXTS), _pages(PAGE_TEXTS))
+    assert alignment.is_identity
+    assert [(nsv, sv) for nsv, sv, _ in alignment.pairs] == [(1, 1), (2, 2), (3, 3), (4, 4)]
+
+
+def test_filled_values_still_match():
+    filled = list(PAGE_TEXTS)
+    filled[0] += " John Smith"
+    alignment = align_pages(_pages(PAGE_TEXTS), _pages(filled))
+    assert alignment.is_identity
+
+
+def test_removed_page():
+    alignment = align_pages(_pages(PAGE_TEXTS), _pages(PAGE_TEXTS[:1] + PAGE_TEXTS[2:]))
+    assert [(nsv, sv) for nsv, sv, _ in alignment.pairs] == [(1, 1), (3, 2), (4, 3)]
+    assert alignment.removed == [2]
+    assert alignment.inserted == []
+
+
+def test_inserted_page():
+    extra = "An annex with unrelated terms that were never part of the original contract"
+    alignment = align_pages(_pages(PAGE_TEXTS), _pages(PAGE_TEXTS[:2] + [extra] + PAGE_TEXTS[2:]))
+    assert [(nsv, sv) for nsv, sv, _ in alignment.pairs] == [(1, 1), (2, 2), (3, 4), (4, 5)]
+    assert alignment.inserted == [3]
+    assert alignment.removed == []
+
+
+def test_scanned_pages_align_on_image_hash():
+    nsv = [PageFingerprint(1, text_fingerprint(""), (), "f" * 64), PageFingerprint(2, text_fingerprint(""), (), "0" * 64)]
+    sv = [PageFingerprint(1, text_fingerprint(""), (), "0" * 64)]
+    alignment = align_pages(nsv, sv)
+    assert [(a, b) for a, b, _ in alignment.pairs] == [(2, 1)]
+    assert alignment.removed == [1]
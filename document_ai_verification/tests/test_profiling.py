@@ -0,0 +1,77 @@
+# document_ai_verification/tests/test_profiling.py
+
+import asyncio
+import json
+import threading
+import time
+
+from document_ai_verification.utils.profiling import (
+    FOLDED_FILENAME, SPEEDSCOPE_FILENAME, SamplingProfiler, profile_events,
+)
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def _recorded_profiler():
+    profiler = SamplingProfiler(root_thread_id=1)
+    profiler.frames = {("main", "app.py", 1): 0, ("parse", "app.py", 10): 1, ("render", "img.py", 5): 2}
+    profiler.samples = {2: [((0, 2), 0.01)], 1: [((0, 1), 0.005), ((0, 1), 0.005), ((0, 2), 0.01)]}
+    profiler.thread_names = {1: "MainThread", 2: "asyncio_0"}
+    profiler.started_at, profiler.stopped_at = 10.0, 10.5
+    return profiler
+
+
+def test_speedscope_output():
+    document = _recorded_profiler().to_speedscope("request abc")
+    assert document["name"] == "request abc"
+    assert document["shared"]["frames"][1] == {"name": "parse", "file": "app.py", "line": 10}
+    request_profile, worker_profile = document["profiles"]
+    # The request's own event-loop profile comes first.
+    assert request_profile == {
+        "type": "sampled", "name": "event loop (this request)", "unit": "seconds", "startValue": 0, "endValue": 0.5,
+        "samples": [[0, 1], [0, 1], [0, 2]], "weights": [0.005, 0.005, 0.01],
+    }
+    assert (worker_profile["name"], worker_profile["samples"]) == ("asyncio_0", [[0, 2]])
+
+
+def test_folded_output():
+    assert _recorded_profiler().to_folded() == (
+        "asyncio_0;main;render 1\n"
+        "event loop (this request);main;parse 2\n"
+        "event loop (this request);main;render 1\n"
+    )
+
+
+def test_samples_name_the_running_functions(tmp_path):
+    profiler = SamplingProfiler(interval_seconds=0.002)
+    worker = threading.Thread(target=_busy, args=(0.2,), name="busy-worker")
+    profiler.start()
+    worker.start()
+    worker.join()
+    profiler.stop()
+
+    speedscope_path = profiler.write(tmp_path, "test")
+    assert speedscope_path == tmp_path / SPEEDSCOPE_FILENAME
+    document = json.loads(speedscope_path.read_text())
+    assert "busy-worker" in [profile["name"] for profile in document["profiles"]]
+    assert any(line.startswith("busy-worker;") and ";_busy " in line for line in (tmp_path / FOLDED_FILENAME).read_text().splitlines())
+
+
+def test_request_profile_is_rooted_at_its_workflow(tmp_path):
+    async def workflow():
+        for step in range(3):
+            _busy(0.05)
+            yield {"step": step}
+
+    async def consume():
+        return [event async for event in profile_events(workflow(), tmp_path, "request", interval_seconds=0.002)]
+
+    assert asyncio.run(consume()) == [{"step": 0}, {"step": 1}, {"step": 2}]
+    folded = [line for line in (tmp_path / FOLDED_FILENAME).read_text().splitlines() if line.startswith("event loop")]
+    assert folded
+    # Frames are named by their qualified name, here '<test>.<locals>.workflow'.
+    assert all(line.split(";")[1].endswith(".workflow") for line in folded)
@@ -0,0 +1,75 @@
+# document_ai_verification/tests/test_render_utils.py
+
+import cv2
+import numpy as np
+import pytest
+
+from document_ai_verification.utils import render_utils
+from document_ai_verification.utils.render_utils import PageRenderer, RenderProfile, load_render_profiles
+
+
+def _config(profiles=None, max_img_height=None):
+    return {
+        "application": {"rendering": {"mode": "progressive", "profiles": profiles or {}}},
+        "ai_services": {"llm": {"max_img_height": max_img_height}},
+    }
+
+
+def test_defaults_fill_in_missing_profiles():
+    profiles = load_render_profiles(_config({"ocr": {"dpi": 200}}, max_img_height=1024))
+    assert profiles["diff"] == RenderProfile(dpi=300)
+    assert profiles["ocr"] == RenderProfile(dpi=200, gray=True)
+    assert profiles["llm"] == RenderProfile(max_height=1024, image_format="jpeg")
+
+
+def test_llm_height_falls_back_to_the_model_default():
+    assert load_render_profiles(_config())["llm"].max_height == 896
+    assert load_render_profiles(_config({"llm": {"dpi": 150}}))["llm"] == RenderProfile(dpi=150, image_format="jpeg")
+
+
+def test_profiles_with_the_same_output_share_renders():
+    profiles = load_render_profiles(_config())
+    assert profiles["diff"].key == profiles["crops"].key == "300dpi_rgb"
+    assert profiles["ocr"].key == "300dpi_gray"
+    assert profiles["llm"].key == "h896_rgb_q90"
+    assert (profiles["diff"].suffix, profiles["llm"].suffix) == (".png", ".jpg")
+
+
+def test_unsupported_formats_are_rejected():
+    with pytest.raises(ValueError):
+        load_render_profiles(_config({"diff": {"format": "tiff"}}))
+
+
+def test_pages_and_tiles_are_rendered_once(tmp_path, monkeypatch):
+    calls = []
+
+    def render(pdf_path, page_num, output_path, profile, region=None):
+        calls.append((page_num, profile.key, region))
+        width, height = (region[2] - region[0], region[3] - region[1]) if region else (10, 10)
+        cv2.imwrite(str(output_path), np.zeros((height, width), dtype=np.uint8))
+        return output_path
+
+    monkeypatch.setattr(render_utils, "render_pdf_page", render)
+    renderer = PageRenderer(tmp_path / "doc.pdf", base_dpi=150, output_dir=tmp_path / "renders")
+    page = renderer.page(1, RenderProfile(dpi=150))
+    assert renderer.page(1, RenderProfile(dpi=150)) == page
+
+    # Tile boxes are given at the base DPI and rendered at the profile's DPI.
+    tile = renderer.tile(1, (10, 20, 40, 30), RenderProfile(dpi=300, gray=True))
+    renderer.tile(1, (10, 20, 40, 30), RenderProfile(dpi=300, gray=True))
+    assert tile.shape == (20, 60)
+    assert calls == [(1, "150dpi_rgb", None), (1, "300dpi_gray", (20, 40, 80, 60))]
+    assert renderer.renders == {"pages": 1, "tiles": 1}
+
+
+@pytest.mark.parametrize("mode, screening, expected", [
+    ("progressive", True, RenderProfile(dpi=100, gray=True)),
+    ("progressive", False, None),
+    ("full", True, None),
+])
+def test_screening_is_opt_in_and_progressive_only(mode, screening, expected):
+    from document_ai_verification.core.verification_service import _render_profiles, _screen_profile
+
+    config = _config()
+    config["application"]["rendering"].update(mode=mode, screening=screening)
+    assert _screen_profile(config, _render_profiles(config)) == expected
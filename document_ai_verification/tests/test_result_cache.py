@@ -0,0 +1,21 @@
+# document_ai_verification/tests/test_result_cache.py
+
+from document_ai_verification.core.result_cache import result_cache_key
+
+CONFIG = {"rendering": {"mode": "full", "dpi": 300}, "ai_services": {"llm": {"audit_mode": "full_page"}}}
+
+
+def test_key_is_stable():
+    reordered = {"ai_services": {"llm": {"audit_mode": "full_page"}}, "rendering": {"dpi": 300, "mode": "full"}}
+    key = result_cache_key("a" * 64, "b" * 64, CONFIG, "model", 300)
+    assert key == result_cache_key("a" * 64, "b" * 64, reordered, "model", 300)
+    assert key.startswith("verification_result:")
+
+
+def test_key_changes_with_every_input():
+    key = result_cache_key("a" * 64, "b" * 64, CONFIG, "model", 300)
+    changed_config = {**CONFIG, "rendering": {"mode": "progressive", "dpi": 300}}
+    assert key != result_cache_key("b" * 64, "a" * 64, CONFIG, "model", 300)
+    assert key != result_cache_key("a" * 64, "b" * 64, changed_config, "model", 300)
+    assert key != result_cache_key("a" * 64, "b" * 64, CONFIG, "other-model", 300)
+    assert key != result_cache_key("a" * 64, "b" * 64, CONFIG, "model", 200)
@@ -0,0 +1,92 @@
+# document_ai_verification/tests/test_shared_state.py
+
+import threading
+import time
+
+import pytest
+
+from document_ai_verification.utils.shared_state import SharedState, SharedStateError
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def shared_state(request, tmp_path, monkeypatch):
+    monkeypatch.delenv("SHARED_STATE_BACKEND", raising=False)
+    return SharedState({"backend": request.param, "sqlite_path": str(tmp_path / "shared_state.sqlite3")})
+
+
+def test_limit_is_enforced(shared_state):
+    semaphore = shared_state.semaphore("llm_requests", 2)
+    semaphore.poll_seconds = 0.01
+    with semaphore.acquire(), semaphore.acquire():
+        assert semaphore.in_use() == 2
+        with pytest.raises(SharedStateError):
+            with semaphore.acquire(timeout=0.05):
+                pass
+    assert semaphore.in_use() == 0
+
+
+def test_same_name_shares_slots(shared_state):
+    assert shared_state.semaphore("ocr", 1) is shared_state.semaphore("ocr", 1)
+
+
+def test_concurrent_holders_never_exceed_the_limit(shared_state):
+    semaphore = shared_state.semaphore("gpu", 2)
+    semaphore.poll_seconds = 0.005
+    peak, lock = [0], threading.Lock()
+
+    def work():
+        with semaphore.acquire():
+            with lock:
+                peak[0] = max(peak[0], semaphore.in_use())
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=work) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 1 <= peak[0] <= 2
+    assert semaphore.in_use() == 0
+
+
+def test_lease_is_renewed_while_held(tmp_path, monkeypatch):
+    monkeypatch.delenv("SHARED_STATE_BACKEND", raising=False)
+    shared_state = SharedState({"backend": "sqlite", "sqlite_path": str(tmp_path / "shared_state.sqlite3")})
+    semaphore = shared_state.semaphore("audit", 1)
+    semaphore.lease_seconds, semaphore.poll_seconds = 0.3, 0.01
+    with semaphore.acquire():
+        # Held for several lease lengths: the heartbeat keeps the slot taken.
+        time.sleep(1.0)
+        assert semaphore.in_use() == 1
+        with pytest.raises(SharedStateError):
+            with semaphore.acquire(timeout=0.05):
+                pass
+    assert semaphore.in_use() == 0
+
+
+def test_lock_is_exclusive_and_not_kept_after_release(shared_state):
+    with shared_state.lock("template:abc"):
+        assert shared_state.lock_held("template:abc")
+        with pytest.raises(SharedStateError):
+            with shared_state.lock("template:abc", timeout=0):
+                pass
+    assert not shared_state.lock_held("template:abc")
+    assert shared_state._locks == {}
+    assert shared_state._semaphores == {}
+
+
+def test_lock_waiters_share_one_handle(shared_state):
+    order = []
+
+    def wait_then_hold():
+        with shared_state.lock("batch:1", timeout=5):
+            order.append("waiter")
+
+    with shared_state.lock("batch:1"):
+        waiter = threading.Thread(target=wait_then_hold)
+        waiter.start()
+        time.sleep(0.1)
+        order.append("holder")
+    waiter.join()
+    assert order == ["holder", "waiter"]
+    assert shared_state._locks == {}
@@ -0,0 +1,53 @@
+# document_ai_verification/tests/test_streaming_json.py
+
+import json
+
+from document_ai_verification.ai.llm.streaming_json import IncrementalJSONObjectParser
+
+DOCUMENT = {
+    "page_number": 1,
+    "page_status": "Verified",
+    "required_inputs": [
+        {"marker_text": "Name {first}", "is_fulfilled": True, "audit_notes": 'A "quoted" } brace.'},
+        {"marker_text": "Date", "is_fulfilled": False, "audit_notes": "Missing."},
+    ],
+}
+
+
+def _feed_in_chunks(parser, text, size):
+    items = []
+    for start in range(0, len(text), size):
+        items.extend(parser.feed(text[start:start + size]))
+    return items
+
+
+def test_elements_are_reported_as_they_complete():
+    parser = IncrementalJSONObjectParser()
+    text = json.dumps(DOCUMENT)
+    first_end = text.index('"Date"')
+    assert parser.feed(text[:first_end]) == [("required_inputs", DOCUMENT["required_inputs"][0])]
+    assert parser.feed(text[first_end:]) == [("required_inputs", DOCUMENT["required_inputs"][1])]
+    assert parser.done
+    assert json.loads(parser.text) == DOCUMENT
+
+
+def test_chunk_boundaries_do_not_matter():
+    for size in (1, 3, 7):
+        parser = IncrementalJSONObjectParser()
+        items = _feed_in_chunks(parser, json.dumps(DOCUMENT), size)
+        assert [data for _, data in items] == DOCUMENT["required_inputs"]
+        assert parser.done
+
+
+def test_leading_prose_and_trailing_tokens_are_ignored():
+    parser = IncrementalJSONObjectParser()
+    parser.feed("```json\n" + json.dumps(DOCUMENT))
+    assert parser.done
+    assert parser.feed("\n``` trailing text {") == []
+    assert json.loads(parser.text) == DOCUMENT
+
+
+def test_incomplete_object_is_not_done():
+    parser = IncrementalJSONObjectParser()
+    parser.feed('{"page_number": 1, "required_inputs": [')
+    assert not parser.done
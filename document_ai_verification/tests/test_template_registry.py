@@ -0,0 +1,73 @@
+# document_ai_verification/tests/test_template_registry.py
+
+import pytest
+
+from document_ai_verification.ai.llm.schemas import PageHolisticAnalysis
+from document_ai_verification.core.schemas import TemplatePage, TemplateRecord
+from document_ai_verification.core.template_registry import TemplateRegistry
+
+PDF_BYTES = b"%PDF-1.4 template"
+
+
+def _record(registry: TemplateRegistry) -> TemplateRecord:
+    page = TemplatePage(
+        page_num=1, image_file="pages/page_001.png", markdown_text="Sign here:", text_sha256="t", image_dhash="d",
+        requirements=PageHolisticAnalysis(required_inputs=[], summary="One signature."),
+    )
+    return TemplateRecord(
+        template_id=registry.template_id_for(PDF_BYTES), nsv_filename="nsv.pdf", dpi=300, model="model",
+        created_at=0.0, pages=[page],
+    )
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TemplateRegistry(str(tmp_path / "templates"))
+
+
+@pytest.fixture
+def page_image(tmp_path):
+    path = tmp_path / "render.png"
+    path.write_bytes(b"png")
+    return path
+
+
+def test_ids_are_content_addressed(registry):
+    template_id = registry.template_id_for(PDF_BYTES)
+    assert template_id == registry.template_id_for(PDF_BYTES)
+    assert template_id != registry.template_id_for(PDF_BYTES + b" ")
+    assert registry.is_valid_id(template_id)
+
+
+@pytest.mark.parametrize("template_id", ["", "../etc", "A" * 64, "a" * 63, "a" * 64 + "/x"])
+def test_malformed_ids_are_rejected(registry, template_id):
+    assert not registry.is_valid_id(template_id)
+    assert registry.get(template_id) is None
+    with pytest.raises(ValueError):
+        registry.template_dir(template_id)
+
+
+def test_register_lookup_and_delete(registry, page_image):
+    record = _record(registry)
+    assert registry.get(record.template_id) is None
+
+    assert registry.save(record, {1: page_image}, PDF_BYTES) == record
+    assert registry.get(record.template_id) == record
+    template_dir = registry.template_dir(record.template_id)
+    assert (template_dir / "nsv.pdf").read_bytes() == PDF_BYTES
+    [bundle] = registry.page_bundles(record)
+    assert bundle == {"page_num": 1, "markdown_text": "Sign here:", "image_path": template_dir / "pages/page_001.png"}
+    assert bundle["image_path"].read_bytes() == b"png"
+    assert not any(path.name.startswith(".staging-") for path in registry.root.iterdir())
+
+    assert registry.delete(record.template_id)
+    assert registry.get(record.template_id) is None
+    assert not registry.delete(record.template_id)
+
+
+def test_second_registration_keeps_the_first_copy(registry, page_image):
+    first = _record(registry)
+    registry.save(first, {1: page_image}, PDF_BYTES)
+    second = first.model_copy(update={"created_at": 1.0})
+    assert registry.save(second, {1: page_image}, PDF_BYTES) == first
+    assert registry.get(first.template_id).created_at == 0.0
@@ -0,0 +1,32 @@
+# document_ai_verification/tests/test_text_layer.py
+
+from document_ai_verification.ai.ocr.text_layer import extract_text_layer
+from document_ai_verification.benchmarks.synthetic_corpus import SyntheticPage, TextLine, build_pdf_bytes
+
+
+def _pdf(tmp_path, *pages):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(build_pdf_bytes(list(pages)))
+    return path
+
+
+def test_words_are_read_in_lines_with_their_positions(tmp_path):
+    page = SyntheticPage(lines=[TextLine(72, 100, "Rent is 100 per month"), TextLine(72, 130, "Notice period 30 days")])
+    pdf_path = _pdf(tmp_path, page, SyntheticPage(lines=[TextLine(72, 100, "Page two")]))
+    layers = extract_text_layer(pdf_path, dpi=144)
+
+    assert sorted(layers) == [1, 2]
+    assert layers[1].plain_text == "Rent is 100 per month\nNotice period 30 days"
+    assert layers[2].plain_text == "Page two"
+    words = layers[1].detailed_data
+    assert [(d.text, d.line_num, d.word_num) for d in words[:2]] == [("Rent", 1, 1), ("is", 1, 2)]
+    # 72 pt from the left edge is 144 px at 144 DPI; the baseline at 100 pt is 200 px down.
+    x1, y1, _, _, _, _, _, y2 = words[0].poly
+    assert abs(x1 - 144) <= 2 and y1 < 200 <= y2 + 6
+
+
+def test_polygons_follow_the_render_dpi(tmp_path):
+    pdf_path = _pdf(tmp_path, SyntheticPage(lines=[TextLine(72, 100, "Signed")]))
+    low, high = extract_text_layer(pdf_path, dpi=72)[1], extract_text_layer(pdf_path, dpi=288)[1]
+    # Rounded to whole pixels at each DPI.
+    assert all(abs(4 * a - b) <= 4 for a, b in zip(low.detailed_data[0].poly, high.detailed_data[0].poly))
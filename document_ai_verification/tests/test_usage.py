@@ -0,0 +1,80 @@
+# document_ai_verification/tests/test_usage.py
+
+import asyncio
+
+from openai.types import CompletionUsage
+
+from document_ai_verification.ai.llm.usage import (
+    LLMCall, UsageLedger, record_call, track_usage, usage_scope,
+)
+
+
+def _call(model="vlm", stage="multimodal_audit", page=1, prompt=100, completion=10, image_tokens=0, images=0, estimated=False):
+    return LLMCall(model, stage, page, prompt, completion, image_tokens, images, estimated)
+
+
+def test_reported_usage_is_recorded_in_the_current_scope():
+    ledger = UsageLedger()
+    usage = CompletionUsage.model_validate({
+        "prompt_tokens": 1500, "completion_tokens": 40, "total_tokens": 1540,
+        "prompt_tokens_details": {"cached_tokens": 0, "image_tokens": 1200},
+    })
+    with track_usage(ledger), usage_scope("multimodal_audit", page=3):
+        call = record_call("vlm", usage, image_pixels=(896 * 672,))
+    assert call == _call(page=3, prompt=1500, completion=40, image_tokens=1200, images=1)
+    assert ledger.summary()["by_page"]["3"]["image_tokens"] == 1200
+
+
+def test_missing_usage_is_estimated():
+    ledger = UsageLedger()
+    with track_usage(ledger):
+        call = record_call("vlm", None, image_pixels=(28 * 28 * 10,), prompt_chars=400, streamed_chunks=25)
+    assert (call.prompt_tokens, call.completion_tokens, call.image_tokens, call.estimated) == (110, 25, 10, True)
+    assert call.stage is None
+    summary = ledger.summary()
+    assert (summary["estimated_calls"], summary["by_stage"]["other"]["calls"]) == (1, 1)
+
+
+def test_calls_outside_a_request_are_not_attributed_to_it():
+    ledger = UsageLedger()
+    with track_usage(ledger):
+        pass
+    record_call("vlm", None, prompt_chars=40)
+    assert ledger.summary()["calls"] == 0
+
+
+def test_worker_threads_are_attributed_to_the_request():
+    ledger = UsageLedger()
+
+    async def request():
+        with track_usage(ledger), usage_scope("requirement_analysis", page=2):
+            await asyncio.to_thread(record_call, "vlm", None, (), 40)
+
+    asyncio.run(request())
+    assert list(ledger.summary()["by_stage"]) == ["requirement_analysis"]
+    assert list(ledger.summary()["by_page"]) == ["2"]
+
+
+def test_summary_groups_and_prices():
+    ledger = UsageLedger()
+    ledger.add(_call(model="vlm", page=1, prompt=1000, completion=100))
+    ledger.add(_call(model="vlm", page=2, prompt=2000, completion=200))
+    ledger.add(_call(model="text", stage="cascade", page=2, prompt=500, completion=50))
+    prices = {"vlm": {"prompt_per_1k": 0.01, "completion_per_1k": 0.03}}
+    summary = ledger.summary(prices)
+
+    assert (summary["calls"], summary["total_tokens"]) == (3, 3850)
+    assert summary["cost"] == 0.039  # The unpriced model costs nothing.
+    assert summary["by_model"]["text"]["cost"] == 0.0
+    assert summary["by_stage"]["multimodal_audit"]["prompt_tokens"] == 3000
+    assert summary["by_page"]["2"]["calls"] == 2
+    assert "cost" not in ledger.summary()
+
+
+def test_process_totals_drop_the_page_breakdown():
+    ledger = UsageLedger(track_pages=False)
+    ledger.add(_call(page=1))
+    ledger.add(_call(page=2))
+    summary = ledger.summary()
+    assert "by_page" not in summary
+    assert summary["by_stage"]["multimodal_audit"]["calls"] == 2
@@ -34,17 +34,22 @@ def load_settings() -> dict:
         dict: A nested dictionary containing all application settings.
 
     Raises:
-        FileNotFoundError: If the .env or config.yml file is missing.
+        FileNotFoundError: If config.yml is missing, or if .env is missing and the
+                           secrets are not already set in the process environment.
     """
     # --- 1. Load Secrets from .env file ---
+    # Variables already present in the process environment take precedence over .env,
+    # so harnesses and deployments can inject them without writing a file.
     env_path = PROJECT_ROOT / ".env"
-    if not env_path.exists():
+    if env_path.exists():
+        load_dotenv(dotenv_path=env_path)
+    elif os.getenv("LLM_API_URL"):
+        logger.warning(f"Environment file (.env) not found at {env_path}. Using secrets from the process environment.")
+    else:
         msg = f"CRITICAL: Environment file (.env) not found at {env_path}. The application cannot start."
         logger.error(msg)
         raise FileNotFoundError(msg)
     
-    load_dotenv(dotenv_path=env_path)
-    
     secrets = {
         "llm_api_url": os.getenv("LLM_API_URL"),
         "llm_api_key": os.getenv("LLM_API_KEY", ""), # Default to empty string if not set
@@ -59,6 +64,11 @@ def load_settings() -> dict:
             logger.error(msg)
             raise ValueError(msg)
 
+    # Optional text-only model of the model cascade; it shares the main endpoint and key unless given its own.
+    secrets["cascade_llm_model_name"] = os.getenv("CASCADE_LLM_MODEL_NAME") or None
+    secrets["cascade_llm_api_url"] = os.getenv("CASCADE_LLM_API_URL") or secrets["llm_api_url"]
+    secrets["cascade_llm_api_key"] = os.getenv("CASCADE_LLM_API_KEY") or secrets["llm_api_key"]
+
     # --- 2. Load Parameters from config.yml file ---
     config_path = PROJECT_ROOT / "config.yml"
     if not config_path.exists():
@@ -4,18 +4,11 @@ import logging
 import shutil
 import io
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 from uuid import uuid4
 
-# --- Pre-requisite Check & Imports ---
-try:
-    from pdf2image import convert_from_path
-    from pypdf import PdfReader, PdfWriter
-    from markitdown import MarkItDown
+if TYPE_CHECKING:
     from fastapi import UploadFile
-except ImportError:
-    import sys
-    sys.exit("Required libraries not found. Run: pip install -r requirements.txt")
 
 # --- Setup ---
 logger = logging.getLogger(__name__)
@@ -24,6 +17,20 @@ logger = logging.getLogger(__name__)
 # Ubuntu/Debian: sudo apt-get install poppler-utils
 # Mac (Homebrew): brew install poppler
 
+def _import_pdf_libraries():
+    """
+    Imports the PDF toolchain on first use. pdf2image, pypdf and markitdown take a
+    large share of process startup, and most processes (e.g. an idle API worker)
+    do not need them until the first document arrives.
+    """
+    try:
+        from pdf2image import convert_from_path
+        from pypdf import PdfReader, PdfWriter
+        from markitdown import MarkItDown
+    except ImportError as e:
+        raise ImportError("Required libraries not found. Run: pip install -r requirements.txt") from e
+    return convert_from_path, PdfReader, PdfWriter, MarkItDown
+
 class TemporaryFileHandler:
     """
     Manages the lifecycle of temporary files for a single verification request.
@@ -66,7 +73,7 @@ class TemporaryFileHandler:
         return file_path
     
     # This method can now be deprecated or removed if you only use the byte-based approach
-    async def save_upload_file(self, upload_file: UploadFile) -> Path:
+    async def save_upload_file(self, upload_file: "UploadFile") -> Path:
         """Saves a FastAPI UploadFile to the temporary directory."""
         await upload_file.seek(0)
         file_path = self.temp_dir / upload_file.filename
@@ -78,15 +85,28 @@ class TemporaryFileHandler:
         finally:
             pass
 
-    def extract_content_per_page(self, pdf_path: Path, dpi: int = 300) -> List[Dict[str, Any]]:
+    def extract_content_per_page(
+        self,
+        pdf_path: Path,
+        dpi: int = 300,
+        grayscale: bool = False,
+        text_extractor: str = "markitdown",
+        text_layer_dpi: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         The master utility for multi-modal PDF processing. For each page, it extracts:
-        1. A high-quality PNG image.
+        1. A high-quality PNG image (grayscale if `grayscale`, e.g. for the 'diff' render profile).
         2. Structured Markdown text (if the page is digital).
+
+        With `text_extractor="text_layer"`, the text comes from the PDF's text layer in one
+        pass instead of MarkItDown: 'markdown_text' is its plain text (one line per text
+        line), and 'text_layer' holds the words with their positions (an `OCRResponse`), in
+        pixels at `text_layer_dpi` (default: `dpi`).
         """
         # ... (The rest of this function remains exactly the same) ...
         if not pdf_path.exists():
             raise FileNotFoundError(f"PDF file not found at {pdf_path}")
+        convert_from_path, _, _, _ = _import_pdf_libraries()
 
         # --- Step 1: Convert all pages to images in a single, efficient batch ---
         image_output_dir = self.temp_dir / f"{pdf_path.stem}_images"
@@ -95,7 +115,7 @@ class TemporaryFileHandler:
         try:
             convert_from_path(
                 pdf_path=pdf_path, dpi=dpi, output_folder=image_output_dir,
-                fmt="png", thread_count=4, output_file=f"{pdf_path.stem}_page_"
+                fmt="png", thread_count=4, output_file=f"{pdf_path.stem}_page_", grayscale=grayscale
             )
             image_paths = sorted(list(image_output_dir.glob("*.png")))
             logger.info(f"Successfully converted PDF to {len(image_paths)} images.")
@@ -103,7 +123,43 @@ class TemporaryFileHandler:
             logger.error(f"Critical error during image conversion. Check Poppler installation. Error: {e}")
             raise
 
-        # --- Step 2: Extract Markdown per page using an efficient in-memory process ---
+        # --- Step 2: Extract the text of each page ---
+        text_layers = None
+        if text_extractor == "text_layer":
+            from ..ai.ocr.text_layer import extract_text_layer
+            try:
+                text_layers = extract_text_layer(pdf_path, text_layer_dpi or dpi)
+                markdown_texts = [text_layers[n].plain_text if n in text_layers else "" for n in range(1, len(image_paths) + 1)]
+            except Exception as e:
+                # Blank text would make every page look scanned and send it to OCR.
+                logger.error(f"Error reading the text layer of '{pdf_path.name}'; falling back to MarkItDown: {e}")
+                text_layers = None
+                markdown_texts = self._extract_markdown_per_page(pdf_path, len(image_paths))
+        elif text_extractor != "markitdown":
+            raise ValueError(f"Unknown text extractor '{text_extractor}' (use 'markitdown' or 'text_layer').")
+        else:
+            markdown_texts = self._extract_markdown_per_page(pdf_path, len(image_paths))
+
+        # --- Step 3: Combine results into the final structured list ---
+        if len(image_paths) != len(markdown_texts):
+            raise ValueError("Mismatch between number of images and extracted markdown pages.")
+
+        page_bundles = []
+        for i in range(len(image_paths)):
+            bundle = {
+                "page_num": i + 1,
+                "markdown_text": markdown_texts[i],
+                "image_path": image_paths[i]
+            }
+            if text_layers is not None and i + 1 in text_layers:
+                bundle["text_layer"] = text_layers[i + 1]
+            page_bundles.append(bundle)
+
+        return page_bundles
+
+    def _extract_markdown_per_page(self, pdf_path: Path, page_count: int) -> List[str]:
+        """Extracts Markdown per page using an efficient in-memory process."""
+        _, PdfReader, PdfWriter, MarkItDown = _import_pdf_libraries()
         logger.info(f"Extracting Markdown from '{pdf_path.name}' page by page (in-memory)...")
         markdown_texts = []
         md_converter = MarkItDown()
@@ -123,21 +179,8 @@ class TemporaryFileHandler:
             logger.info(f"Successfully extracted Markdown from {len(markdown_texts)} pages.")
         except Exception as e:
             logger.error(f"Error during in-memory Markdown extraction: {e}")
-            markdown_texts = [""] * len(image_paths)
-
-        # --- Step 3: Combine results into the final structured list ---
-        if len(image_paths) != len(markdown_texts):
-            raise ValueError("Mismatch between number of images and extracted markdown pages.")
-
-        page_bundles = []
-        for i in range(len(image_paths)):
-            page_bundles.append({
-                "page_num": i + 1,
-                "markdown_text": markdown_texts[i],
-                "image_path": image_paths[i]
-            })
-            
-        return page_bundles
+            markdown_texts = [""] * page_count
+        return markdown_texts
 
 
 # ===================================================================
@@ -1,28 +1,43 @@
 # document_ai_verification/utils/image_utils.py
 
+import os
+import re
+import json
+import threading
 import cv2
 import numpy as np
-from typing import Dict, List, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
-def find_difference_bboxes_direct(img1: np.ndarray, img2: np.ndarray) -> List[Tuple[int, int, int, int]]:
+def load_page_image(image_path: Path, color: bool = False) -> Optional[np.ndarray]:
     """
-    Finds the bounding boxes of differences between two images.
+    Decodes a page render: grayscale (one byte per pixel) unless `color` is asked for.
+    Every comparison below works on grayscale, so color is only worth a third more
+    memory where the pixels themselves are shown to a model or a user.
     """
-    if img1 is None or img2 is None:
-        return []
-    
+    return cv2.imread(str(image_path), cv2.IMREAD_COLOR if color else cv2.IMREAD_GRAYSCALE)
+
+def _to_gray(img: np.ndarray) -> np.ndarray:
+    """The image itself if it is already grayscale, else its grayscale conversion."""
+    return img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+def _difference_mask(img1: np.ndarray, img2: np.ndarray) -> np.ndarray:
+    """Binary mask (0/255) of the pixels that differ noticeably between two same-size images."""
     # Convert to grayscale for more reliable difference detection
-    gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
-    gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
+    gray1 = _to_gray(img1)
+    gray2 = _to_gray(img2)
     
     diff = cv2.absdiff(gray1, gray2)
     _, thresh = cv2.threshold(diff, 30, 255, cv2.THRESH_BINARY)
+    return thresh
+
+def _mask_to_bboxes(mask: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """Groups nearby difference pixels and returns one padded box per group."""
     kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
-    dilated = cv2.dilate(thresh, kernel, iterations=2)
+    dilated = cv2.dilate(mask, kernel, iterations=2)
     contours, _ = cv2.findContours(dilated, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
     bounding_boxes = []
@@ -33,51 +48,338 @@ def find_difference_bboxes_direct(img1: np.ndarray, img2: np.ndarray) -> List[Tu
         bounding_boxes.append((x-padding, y-padding, x + w + padding, y + h + padding))
     return bounding_boxes
 
-def generate_difference_images(
-    original_img: np.ndarray,
-    signed_img: np.ndarray,
+def find_difference_bboxes_direct(img1: np.ndarray, img2: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """
+    Finds the bounding boxes of differences between two images.
+    """
+    if img1 is None or img2 is None:
+        return []
+    return _mask_to_bboxes(_difference_mask(img1, img2))
+
+def find_difference_bboxes_outside_regions(
+    img1: np.ndarray,
+    img2: np.ndarray,
+    allowed_regions: List[Tuple[int, int, int, int]],
+    protected_regions: List[Tuple[int, int, int, int]] = ()
+) -> List[Tuple[int, int, int, int]]:
+    """
+    Like `find_difference_bboxes_direct`, but ignores differences inside `allowed_regions`
+    (e.g. the input areas of a form). Differences inside `protected_regions` are always
+    reported, even where they overlap an allowed region (e.g. static text next to a blank).
+    """
+    if img1 is None or img2 is None:
+        return []
+    mask = _difference_mask(img1, img2)
+    protected = [(x1, y1, x2, y2, mask[max(0, y1):max(0, y2), max(0, x1):max(0, x2)].copy()) for x1, y1, x2, y2 in protected_regions]
+    for x1, y1, x2, y2 in allowed_regions:
+        mask[max(0, y1):max(0, y2), max(0, x1):max(0, x2)] = 0
+    for x1, y1, x2, y2, original in protected:
+        mask[max(0, y1):max(0, y2), max(0, x1):max(0, x2)] = original
+    return _mask_to_bboxes(mask)
+
+def count_new_ink_pixels(nsv_img: np.ndarray, sv_img: np.ndarray, region: Tuple[int, int, int, int], min_darkening: int = 60) -> int:
+    """
+    Counts the pixels inside `region` that are clearly darker on the signed page than on
+    the original, i.e. ink that was added (a signature, a tick, a typed value).
+    """
+    x1, y1, x2, y2 = (max(0, v) for v in region)
+    nsv_crop = _to_gray(nsv_img[y1:y2, x1:x2]).astype(np.int16)
+    sv_crop = _to_gray(sv_img[y1:y2, x1:x2]).astype(np.int16)
+    return int(np.count_nonzero((nsv_crop - sv_crop) >= min_darkening))
+
+def _ramp(value: float, empty_at: float, filled_at: float) -> float:
+    """Maps a measurement linearly onto [0, 1] between its 'clearly empty' and 'clearly filled' levels."""
+    return float(min(1.0, max(0.0, (value - empty_at) / (filled_at - empty_at))))
+
+def find_checkbox(img: np.ndarray, marker_bbox: Tuple[int, int, int, int], max_distance_heights: float = 3.0) -> Optional[Tuple[int, int, int, int]]:
+    """
+    Looks for the square box printed just left of a checkbox label.
+
+    Returns:
+        The box (x1, y1, x2, y2) in page pixels, or None if no square outline of roughly
+        text height sits within `max_distance_heights` marker heights left of the label.
+    """
+    mx1, my1, mx2, my2 = marker_bbox
+    marker_height = max(1, my2 - my1)
+    x1 = max(0, int(mx1 - max_distance_heights * marker_height))
+    y1 = max(0, int(my1 - marker_height))
+    y2 = min(img.shape[0], int(my2 + marker_height))
+    if mx1 - x1 < marker_height // 2:
+        return None
+    gray = _to_gray(img[y1:y2, x1:mx1])
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    best = None
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if not (0.5 * marker_height <= h <= 2.5 * marker_height and 0.75 <= w / h <= 1.33):
+            continue
+        # The box closest to the label is the one it belongs to.
+        if best is None or x + w > best[0] + best[2]:
+            best = (x, y, w, h)
+    if best is None:
+        return None
+    x, y, w, h = best
+    return (x1 + x, y1 + y, x1 + x + w, y1 + y + h)
+
+def score_input_fill(
+    nsv_img: np.ndarray,
+    sv_img: np.ndarray,
+    region: Tuple[int, int, int, int],
+    marker_bbox: Tuple[int, int, int, int],
+    input_type: str,
+    min_darkening: int = 60
+) -> Dict:
+    """
+    Scores how likely a required input was filled, from the ink added near its marker.
+
+    Checkboxes are judged on the inside of their printed box (a tick or cross covers a
+    good part of it, a stray speck does not). Other inputs, such as signatures and
+    initials, are judged on the ink added to their input area, measured in squared
+    marker heights so the score does not depend on the render DPI.
+
+    Args:
+        nsv_img, sv_img: The page renders (grayscale or BGR, same DPI and size).
+        region: The input area around the marker (see `layout_utils.build_input_region`).
+        marker_bbox: The marker's own box.
+        input_type: The RequiredInput type, e.g. 'signature' or 'checkbox'.
+
+    Returns:
+        Dict: 'score' (0.0 = clearly empty, 1.0 = clearly filled), 'ink_pixels',
+        'method' ('checkbox_interior' or 'input_area') and the measured 'box'.
+    """
+    marker_height = max(1, marker_bbox[3] - marker_bbox[1])
+    if input_type.strip().lower() == "checkbox":
+        box = find_checkbox(nsv_img, marker_bbox)
+        if box is not None:
+            # Skip the printed outline so only marks inside the box count.
+            inset = max(1, (box[2] - box[0]) // 6)
+            interior = (box[0] + inset, box[1] + inset, box[2] - inset, box[3] - inset)
+            area = max(1, (interior[2] - interior[0]) * (interior[3] - interior[1]))
+            ink_pixels = count_new_ink_pixels(nsv_img, sv_img, interior, min_darkening)
+            return {"score": _ramp(ink_pixels / area, 0.02, 0.10), "ink_pixels": ink_pixels, "method": "checkbox_interior", "box": box}
+
+    ink_pixels = count_new_ink_pixels(nsv_img, sv_img, region, min_darkening)
+    return {"score": _ramp(ink_pixels / float(marker_height ** 2), 0.25, 2.0), "ink_pixels": ink_pixels, "method": "input_area", "box": region}
+
+def merge_labeled_boxes(
+    areas: List[Tuple[str, Tuple[int, int, int, int]]],
+    padding: int,
+    image_shape: Tuple[int, ...]
+) -> List[Tuple[Tuple[int, int, int, int], List[str]]]:
+    """
+    Pads (label, box) areas, clips them to the image and merges the ones that then
+    overlap, keeping the labels of every merged area.
+
+    Returns:
+        List[Tuple[bbox, List[str]]]: The merged boxes in reading order (top to bottom, then left to right).
+    """
+    height, width = image_shape[:2]
+    boxes = [
+        [max(0, x1 - padding), max(0, y1 - padding), min(width, x2 + padding), min(height, y2 + padding), [label]]
+        for label, (x1, y1, x2, y2) in areas
+    ]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                    boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]), a[4] + [l for l in b[4] if l not in a[4]]]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    boxes.sort(key=lambda b: (b[1], b[0]))
+    return [((x1, y1, x2, y2), labels) for x1, y1, x2, y2, labels in boxes]
+
+def build_audit_crops(
+    nsv_img: np.ndarray,
+    sv_img: np.ndarray,
+    areas: List[Tuple[str, Tuple[int, int, int, int]]],
+    padding: int = 24,
+    max_regions: int = 8,
+    max_area_ratio: float = 0.5,
+    max_pixels: Optional[int] = None,
+    crop_loaders: Optional[Dict[str, Callable[[Tuple[int, int, int, int]], np.ndarray]]] = None
+) -> Optional[List[Dict]]:
+    """
+    Cuts matching NSV/SV crops around the areas an audit has to look at, at native resolution.
+
+    Areas are padded, and areas that then touch are merged into one crop, so a
+    signature and the diff box on top of it travel together. If the crops of both
+    versions together exceed `max_pixels`, all of them are downscaled by the same
+    factor to fit; they are never upscaled.
+
+    Args:
+        nsv_img, sv_img: The page renders (grayscale or BGR, same DPI and size).
+        areas: (label, box) pairs, e.g. ('visual difference', bbox) or ("marker 'Date:'", region).
+        padding: Context kept around every area, in pixels.
+        max_regions: More crops than this are not worth it; the caller should send full pages.
+        max_area_ratio: Likewise when the crops cover more than this fraction of the page.
+        max_pixels: Pixel budget of all NSV and SV crops together, or None for no limit.
+        crop_loaders: Optional 'nsv'/'sv' callables returning a box at a higher resolution
+            (e.g. a high-DPI tile); by default crops are cut from the given renders.
+
+    Returns:
+        Optional[List[Dict]]: Crops in reading order, each with 'id' ('R1', 'R2'...),
+        'bbox' (in page pixels), 'labels', 'scale' (crop pixels per page pixel), 'nsv'
+        and 'sv' (image arrays); None if cropping does not pay off.
+    """
+    if nsv_img is None or sv_img is None or nsv_img.shape != sv_img.shape or not areas:
+        return None
+    height, width = nsv_img.shape[:2]
+    boxes = merge_labeled_boxes(areas, padding, nsv_img.shape)
+    covered = sum((x2 - x1) * (y2 - y1) for (x1, y1, x2, y2), _ in boxes)
+    if len(boxes) > max_regions or covered > max_area_ratio * width * height:
+        logger.info(f"{len(boxes)} audit region(s) covering {covered / float(width * height):.0%} of the page; full pages are cheaper.")
+        return None
+    loaders = crop_loaders or {}
+    crops = []
+    for i, (bbox, labels) in enumerate(boxes, start=1):
+        x1, y1, x2, y2 = bbox
+        crops.append({
+            "id": f"R{i}", "bbox": bbox, "labels": labels,
+            "nsv": loaders["nsv"](bbox) if "nsv" in loaders else nsv_img[y1:y2, x1:x2],
+            "sv": loaders["sv"](bbox) if "sv" in loaders else sv_img[y1:y2, x1:x2],
+        })
+
+    loaded = sum(crop[key].shape[0] * crop[key].shape[1] for crop in crops for key in ("nsv", "sv"))
+    scale = 1.0
+    if max_pixels and loaded > max_pixels:
+        scale = (max_pixels / float(loaded)) ** 0.5
+    for crop in crops:
+        crop["scale"] = round(scale * crop["nsv"].shape[1] / float(max(1, crop["bbox"][2] - crop["bbox"][0])), 3)
+        if scale < 1.0:
+            for key in ("nsv", "sv"):
+                height, width = crop[key].shape[:2]
+                crop[key] = cv2.resize(crop[key], (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+    return crops
+
+# Diff visuals are described by a small JSON spec when a discrepancy is found and only
+# rendered when their /temp URL is first requested.
+DIFF_SPEC_FILENAME = "diff_spec.json"
+_DIFF_VISUAL_RE = re.compile(r"^(diff_original|diff_signed|side_by_side|crop_(\d+))\.(webp|jpg)$")
+
+def write_diff_spec(
+    output_dir: Path,
+    original_image_path: Path,
+    signed_image_path: Path,
     bboxes: List[Tuple[int, int, int, int]],
-    output_dir: Path
-) -> Tuple[Path, Path]:
+    settings: Optional[Dict] = None
+) -> Dict[str, Any]:
     """
-    Generates two images with colored bounding boxes indicating differences.
-    - Original image gets GREEN boxes.
-    - Signed image gets RED boxes.
+    Records what the diff visuals of a page should show, without rendering anything.
 
     Args:
-        original_img: The original page image.
-        signed_img: The signed page image.
-        bboxes: A list of bounding box tuples (x1, y1, x2, y2).
-        output_dir: The directory to save the new images in.
+        output_dir: The page's diff directory (created if needed); the visuals appear there on request.
+        original_image_path, signed_image_path: The full page renders.
+        bboxes: The difference boxes, in page pixels.
+        settings: The 'application.diff_visuals' config section.
 
     Returns:
-        A tuple containing the paths to the (original_diff_image, signed_diff_image).
+        Dict: The file names the visuals will have: 'original', 'signed', and, when
+        enabled, 'side_by_side' and 'crops' (one per box).
     """
-    output_dir.mkdir(exist_ok=True) # Ensure the output directory exists
-    
-    # --- Define colors (BGR format) ---
-    green = (0, 255, 0)
-    red = (0, 0, 255)
-    thickness = 2
-
-    # --- Process Original Image (Green Boxes) ---
-    original_with_boxes = original_img.copy()
-    for (x1, y1, x2, y2) in bboxes:
-        cv2.rectangle(original_with_boxes, (x1, y1), (x2, y2), green, thickness)
-    original_output_path = output_dir / "diff_original.png"
-    cv2.imwrite(str(original_output_path), original_with_boxes)
-    logger.info(f"Saved original difference image to {original_output_path}")
-
-    # --- Process Signed Image (Red Boxes) ---
-    signed_with_boxes = signed_img.copy()
-    for (x1, y1, x2, y2) in bboxes:
-        cv2.rectangle(signed_with_boxes, (x1, y1), (x2, y2), red, thickness)
-    signed_output_path = output_dir / "diff_signed.png"
-    cv2.imwrite(str(signed_output_path), signed_with_boxes)
-    logger.info(f"Saved signed difference image to {signed_output_path}")
-    
-    return (original_output_path, signed_output_path)
+    settings = settings or {}
+    extension = "jpg" if settings.get('format', 'webp') == "jpeg" else "webp"
+    spec = {
+        "original_image": str(Path(original_image_path).resolve()),
+        "signed_image": str(Path(signed_image_path).resolve()),
+        "bboxes": [list(map(int, bbox)) for bbox in bboxes],
+        "quality": settings.get('quality', 80),
+        "max_page_height": settings.get('max_page_height', 1400),
+        "crop_padding_px": settings.get('crop_padding_px', 40),
+    }
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / DIFF_SPEC_FILENAME).write_text(json.dumps(spec), encoding="utf-8")
+
+    names: Dict[str, Any] = {"original": f"diff_original.{extension}", "signed": f"diff_signed.{extension}"}
+    if settings.get('side_by_side', True):
+        names["side_by_side"] = f"side_by_side.{extension}"
+    if settings.get('crop_thumbnails', True):
+        names["crops"] = [f"crop_{i}.{extension}" for i in range(1, min(len(bboxes), settings.get('max_crop_thumbnails', 12)) + 1)]
+    return names
+
+def _page_with_boxes(image_path: str, bboxes: List[List[int]], color: Tuple[int, int, int], max_height: int) -> np.ndarray:
+    img = cv2.imread(image_path)
+    if img is None:
+        raise ValueError(f"Could not read image from path: {image_path}")
+    scale = min(1.0, max_height / float(img.shape[0]))
+    if scale < 1.0:
+        img = cv2.resize(img, (int(img.shape[1] * scale), int(img.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+    for x1, y1, x2, y2 in bboxes:
+        cv2.rectangle(img, (int(x1 * scale), int(y1 * scale)), (int(x2 * scale), int(y2 * scale)), color, 2)
+    return img
+
+def _side_by_side(left: np.ndarray, right: np.ndarray, gutter: int = 8) -> np.ndarray:
+    height = max(left.shape[0], right.shape[0])
+    pad = lambda img: cv2.copyMakeBorder(img, 0, height - img.shape[0], 0, 0, cv2.BORDER_CONSTANT, value=(255, 255, 255))
+    separator = np.full((height, gutter, 3), 200, dtype=np.uint8)
+    return np.hstack([pad(left), separator, pad(right)])
+
+def render_diff_visual(diff_dir: Path, filename: str) -> Optional[Path]:
+    """
+    Renders one diff visual described by the `diff_spec.json` in `diff_dir`, writes it
+    next to the spec (so later requests are plain file reads) and returns its path.
+
+    Visuals: 'diff_original' (NSV, green boxes), 'diff_signed' (SV, red boxes), 'side_by_side'
+    (both pages), and 'crop_N' (the Nth box on both pages, at native resolution).
+    Pages are downscaled to the spec's max_page_height and encoded as WebP or JPEG.
+
+    Returns:
+        Optional[Path]: The rendered file, or None if `filename` is not a diff visual of this directory.
+    """
+    match = _DIFF_VISUAL_RE.match(filename)
+    spec_path = diff_dir / DIFF_SPEC_FILENAME
+    if not match or not spec_path.is_file():
+        return None
+    spec = json.loads(spec_path.read_text(encoding="utf-8"))
+    kind, crop_number, extension = match.group(1), match.group(2), match.group(3)
+    green, red = (0, 255, 0), (0, 0, 255)
+    bboxes = spec["bboxes"]
 
+    if kind == "diff_original":
+        img = _page_with_boxes(spec["original_image"], bboxes, green, spec["max_page_height"])
+    elif kind == "diff_signed":
+        img = _page_with_boxes(spec["signed_image"], bboxes, red, spec["max_page_height"])
+    elif kind == "side_by_side":
+        img = _side_by_side(
+            _page_with_boxes(spec["original_image"], bboxes, green, spec["max_page_height"]),
+            _page_with_boxes(spec["signed_image"], bboxes, red, spec["max_page_height"]),
+        )
+    else:
+        index = int(crop_number) - 1
+        if not 0 <= index < len(bboxes):
+            return None
+        original, signed = cv2.imread(spec["original_image"]), cv2.imread(spec["signed_image"])
+        if original is None or signed is None:
+            raise ValueError(f"Could not read the page images of {spec_path}")
+        pad = spec["crop_padding_px"]
+        x1, y1, x2, y2 = bboxes[index]
+        crops = []
+        for page, color in ((original, green), (signed, red)):
+            cx1, cy1 = max(0, x1 - pad), max(0, y1 - pad)
+            crop = page[cy1:min(page.shape[0], y2 + pad), cx1:min(page.shape[1], x2 + pad)].copy()
+            cv2.rectangle(crop, (x1 - cx1, y1 - cy1), (x2 - cx1, y2 - cy1), color, 2)
+            crops.append(crop)
+        img = _side_by_side(*crops)
+
+    if extension == "jpg":
+        ok, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, spec["quality"]])
+    else:
+        ok, buffer = cv2.imencode(".webp", img, [cv2.IMWRITE_WEBP_QUALITY, spec["quality"]])
+    if not ok:
+        raise ValueError(f"Could not encode diff visual {filename}")
+    output_path = diff_dir / filename
+    # Concurrent first requests may render the same visual; the rename keeps every reader on a complete file.
+    tmp_path = diff_dir / f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp_path.write_bytes(buffer.tobytes())
+    os.replace(tmp_path, output_path)
+    logger.info(f"Rendered diff visual {output_path} ({len(buffer)} bytes)")
+    return output_path
 
 def analyze_page_meta_from_image(nsv_img: np.ndarray, sv_img: np.ndarray) -> Dict:
     """
@@ -93,21 +395,39 @@ def analyze_page_meta_from_image(nsv_img: np.ndarray, sv_img: np.ndarray) -> Dic
     
     # Ensure images have the same dimensions for accurate comparison
     resized_sv_img = sv_img
-    if nsv_img.shape != sv_img.shape:
-        h, w, _ = nsv_img.shape
-        resized_sv_img = cv2.resize(sv_img, (w, h))
+    if nsv_img.ndim != sv_img.ndim:
+        nsv_img, resized_sv_img = _to_gray(nsv_img), _to_gray(sv_img)
+    if nsv_img.shape != resized_sv_img.shape:
+        h, w = nsv_img.shape[:2]
+        resized_sv_img = cv2.resize(resized_sv_img, (w, h))
         analysis["source_match"] = False
     else:
         analysis["source_match"] = True
     
+    # Works on grayscale and BGR renders alike: no channel of any pixel got darker.
     difference = cv2.subtract(nsv_img, resized_sv_img)
-    b, g, r = cv2.split(difference)
     
-    if cv2.countNonZero(b) == 0 and cv2.countNonZero(g) == 0 and cv2.countNonZero(r) == 0:
+    if not np.any(difference):
         analysis["content_match"] = True
         analysis["difference_bboxes"] = []
     else:
         analysis["content_match"] = False
         analysis["difference_bboxes"] = find_difference_bboxes_direct(nsv_img, resized_sv_img)
         
-    return analysis
\ No newline at end of file
+    return analysis
+
+def compute_dhash(image: np.ndarray, hash_size: int = 8) -> str:
+    """
+    Computes a difference hash (dHash) of a page image as a hex string.
+
+    The image is reduced to (hash_size + 1) x hash_size grayscale pixels and each bit
+    records whether a pixel is brighter than its right neighbour. Renders of the same
+    page at different DPIs, or with light scan noise, give hashes a few bits apart.
+    """
+    gray = _to_gray(image)
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bit)
+    return f"{value:0{hash_size * hash_size // 4}x}"
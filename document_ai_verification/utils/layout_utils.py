@@ -0,0 +1,357 @@
+# document_ai_verification/utils/layout_utils.py
+
+"""
+Word positions on rendered pages, and the allowed-change regions built from them.
+
+All boxes are (x1, y1, x2, y2) in pixels of the page image rendered at the same
+DPI, with the origin at the top-left, like the boxes in `image_utils`.
+"""
+
+import re
+import difflib
+import logging
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+BBox = Tuple[int, int, int, int]
+
+_TOKEN_STRIP_RE = re.compile(r"^[\W_]+|[\W_]+$")
+
+
+class WordBox(NamedTuple):
+    """A word and its bounding box in page-image pixels."""
+    text: str
+    bbox: BBox
+
+
+# ===================================================================
+# SECTION 1: Word Extraction
+# ===================================================================
+
+class TextLayerWord(NamedTuple):
+    """A word of a PDF text layer, with its position in reading order (1-indexed line and word)."""
+    line_num: int
+    word_num: int
+    text: str
+    bbox: BBox
+
+
+def iter_text_layer_pages(pdf_path: Path, dpi: int) -> Iterator[Tuple[int, List[TextLayerWord]]]:
+    """
+    Reads the text layer of a PDF in one pass and yields each page's words, in reading
+    order, with pixel boxes matching a render at `dpi`. Pages without a text layer yield
+    an empty list.
+
+    Args:
+        pdf_path (Path): The PDF document.
+        dpi (int): The DPI the page images were rendered at.
+
+    Yields:
+        Tuple[int, List[TextLayerWord]]: The 1-indexed page number and its words.
+    """
+    from pdfminer.high_level import extract_pages
+    from pdfminer.layout import LTChar, LTTextContainer, LTTextLine
+
+    scale = dpi / 72.0
+    for page_num, layout in enumerate(extract_pages(str(pdf_path)), start=1):
+        page_x0, _, _, page_y1 = layout.bbox
+        words: List[TextLayerWord] = []
+        line_num = line_start = 0
+
+        def flush(chars: List[LTChar]):
+            if not chars:
+                return
+            text = "".join(c.get_text() for c in chars)
+            x0 = min(c.x0 for c in chars)
+            x1 = max(c.x1 for c in chars)
+            top = max(c.y1 for c in chars)
+            bottom = min(c.y0 for c in chars)
+            word_num = len(words) - line_start + 1
+            # PDF space has its origin at the bottom-left; images at the top-left.
+            words.append(TextLayerWord(line_num, word_num, text, (
+                int((x0 - page_x0) * scale), int((page_y1 - top) * scale),
+                int(round((x1 - page_x0) * scale)), int(round((page_y1 - bottom) * scale)),
+            )))
+
+        for element in layout:
+            if not isinstance(element, LTTextContainer):
+                continue
+            for line in element:
+                if not isinstance(line, LTTextLine):
+                    continue
+                line_num += 1
+                line_start = len(words)
+                current: List[LTChar] = []
+                for item in line:
+                    if isinstance(item, LTChar) and not item.get_text().isspace():
+                        current.append(item)
+                    else:
+                        flush(current)
+                        current = []
+                flush(current)
+        yield page_num, words
+
+
+def extract_word_boxes(pdf_path: Path, dpi: int) -> Dict[int, List[WordBox]]:
+    """
+    Reads the text layer of a PDF and returns the words of each page with pixel boxes
+    matching a render at `dpi`. Pages without a text layer map to an empty list.
+
+    Returns:
+        Dict[int, List[WordBox]]: Words per 1-indexed page number, in reading order.
+    """
+    return {
+        page_num: [WordBox(word.text, word.bbox) for word in words]
+        for page_num, words in iter_text_layer_pages(pdf_path, dpi)
+    }
+
+
+def word_boxes_from_ocr(detailed_data: Iterable) -> List[WordBox]:
+    """Converts OCR `detailed_data` entries (polygons in image pixels) into WordBoxes."""
+    words = []
+    for detail in detailed_data:
+        xs, ys = detail.poly[0::2], detail.poly[1::2]
+        if xs and ys and detail.text.strip():
+            words.append(WordBox(detail.text, (min(xs), min(ys), max(xs), max(ys))))
+    return words
+
+
+# ===================================================================
+# SECTION 2: Marker Location and Regions
+# ===================================================================
+
+def _normalize_token(token: str) -> str:
+    return _TOKEN_STRIP_RE.sub("", token).casefold()
+
+
+def is_leader(word: WordBox) -> bool:
+    """True for words made only of punctuation, such as the '________' of a blank."""
+    return not _normalize_token(word.text)
+
+
+def union_bbox(boxes: Sequence[BBox]) -> BBox:
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def _blank_after(words: Sequence[WordBox], indices: Sequence[int]) -> Tuple[bool, float]:
+    """(followed by a leader, gap to the next word on the line) for a run of words."""
+    x1, y1, x2, y2 = union_bbox([words[i].bbox for i in indices])
+    excluded = set(indices)
+    has_leader, gap = False, float("inf")
+    for i, word in enumerate(words):
+        wx1, wy1, _, wy2 = word.bbox
+        if i in excluded or not (wy1 < y2 and wy2 > y1) or wx1 < x2:
+            continue
+        if is_leader(word):
+            has_leader = True
+        else:
+            gap = min(gap, wx1 - x2)
+    return has_leader, gap
+
+
+def locate_marker(
+    marker_text: str,
+    words: Sequence[WordBox],
+    min_similarity: float = 0.85,
+    skip_indices: Iterable[int] = ()
+) -> Optional[Tuple[BBox, List[int]]]:
+    """
+    Finds the words spelling `marker_text` (e.g. 'Signature:' or 'Date of birth').
+
+    Exact token matches win; otherwise the most similar run of the same length is
+    accepted if it reaches `min_similarity`, which tolerates OCR noise and punctuation.
+    When a label also occurs in running text ('... the Effective Date: ...'), the
+    occurrence that looks like a form field is chosen: one followed by a leader
+    ('____') or by the widest blank on its line, and on a tie the later one, as
+    signature blocks follow the body text.
+    Words in `skip_indices` are not considered, so a label that appears twice on a page
+    (one 'Signature:' per party) resolves to its next occurrence.
+
+    Returns:
+        Optional[Tuple[BBox, List[int]]]: The marker's box and the indices of its words,
+        or None if the marker is not on the page.
+    """
+    target = [t for t in (_normalize_token(tok) for tok in marker_text.split()) if t]
+    if not target:
+        return None
+    tokens = [_normalize_token(w.text) for w in words]
+    n = len(target)
+    target_text = " ".join(target)
+    skipped = set(skip_indices)
+    exact: List[int] = []
+    best_fuzzy: Optional[Tuple[float, int]] = None
+    for start in range(len(tokens) - n + 1):
+        if skipped.intersection(range(start, start + n)):
+            continue
+        window = tokens[start:start + n]
+        if window == target:
+            exact.append(start)
+            continue
+        if exact:
+            continue
+        similarity = difflib.SequenceMatcher(None, " ".join(window), target_text).ratio()
+        if similarity >= min_similarity and (best_fuzzy is None or similarity > best_fuzzy[0]):
+            best_fuzzy = (similarity, start)
+
+    if exact:
+        start = max(exact, key=lambda s: (*_blank_after(words, range(s, s + n)), s))
+    elif best_fuzzy is not None:
+        start = best_fuzzy[1]
+    else:
+        return None
+    indices = list(range(start, start + n))
+    return union_bbox([words[i].bbox for i in indices]), indices
+
+
+def build_input_region(
+    marker_bbox: BBox,
+    marker_indices: Sequence[int],
+    words: Sequence[WordBox],
+    image_shape: Tuple[int, ...],
+    left_marker_heights: float = 2.5,
+    above_marker_heights: float = 2.5,
+    below_marker_heights: float = 1.5,
+    max_right_page_ratio: float = 0.45,
+) -> BBox:
+    """
+    The area where the input belonging to a marker is expected to appear.
+
+    Forms put the blank to the right of the label ('Signature: ______'), checkboxes just
+    left of it, and handwriting rises above and dips below the line. The region therefore
+    spans a little to the left, and to the right until the next word on the same line
+    (capped at `max_right_page_ratio` of the page width), with vertical margins measured
+    in marker heights.
+    """
+    height, width = image_shape[:2]
+    x1, y1, x2, y2 = marker_bbox
+    marker_height = max(1, y2 - y1)
+    right_limit = min(width, x2 + int(max_right_page_ratio * width))
+    excluded = set(marker_indices)
+    for i, word in enumerate(words):
+        wx1, wy1, wx2, wy2 = word.bbox
+        same_line = wy1 < y2 and wy2 > y1
+        # Underscore or dot leaders are the blank itself, not the next label.
+        if i not in excluded and same_line and wx1 >= x2 and not is_leader(word):
+            right_limit = min(right_limit, wx1 - 1)
+    return (
+        max(0, int(x1 - left_marker_heights * marker_height)),
+        max(0, int(y1 - above_marker_heights * marker_height)),
+        max(x2, right_limit),
+        min(height, int(y2 + below_marker_heights * marker_height)),
+    )
+
+
+def bbox_center_in_regions(bbox: BBox, regions: Sequence[BBox]) -> bool:
+    cx, cy = (bbox[0] + bbox[2]) / 2.0, (bbox[1] + bbox[3]) / 2.0
+    return any(r[0] <= cx <= r[2] and r[1] <= cy <= r[3] for r in regions)
+
+
+def text_changes_outside_regions(nsv_words: Sequence[WordBox], sv_words: Sequence[WordBox], regions: Sequence[BBox]) -> List[str]:
+    """
+    Compares the two pages word by word. Words added on the signed page inside an
+    allowed region (a typed name, a date) are accepted; any other insertion, and every
+    deletion or replacement of original text, is reported.
+
+    Returns:
+        List[str]: Human-readable descriptions of the disallowed changes (empty if none).
+    """
+    nsv_tokens = [_normalize_token(w.text) for w in nsv_words]
+    sv_tokens = [_normalize_token(w.text) for w in sv_words]
+    changes = []
+    matcher = difflib.SequenceMatcher(None, nsv_tokens, sv_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        if tag == "insert" and all(bbox_center_in_regions(w.bbox, regions) for w in sv_words[j1:j2]):
+            continue
+        original = " ".join(w.text for w in nsv_words[i1:i2])
+        signed = " ".join(w.text for w in sv_words[j1:j2])
+        changes.append(f"{tag}: '{original}' -> '{signed}'")
+    return changes
+
+
+def text_layer_diff(nsv_details: Sequence[Any], sv_details: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    A word-level diff of two pages' text layers (or OCR results), located on the page.
+
+    Words are compared in reading order, ignoring line breaks, so text that only reflowed
+    (a longer typed name pushing words to the next line) is not a change. The entries
+    have the shape of `text_utils.get_structured_diff_json`, with the line numbers of the
+    changed words and, under 'bbox', their box in page pixels.
+
+    Args:
+        nsv_details, sv_details (Sequence): Entries with `text`, `poly` and `line_num`, such as
+            OCR `detailed_data` or the output of `ai.ocr.text_layer.extract_text_layer`.
+
+    Returns:
+        List[Dict[str, Any]]: One entry per changed run of words (empty if the text is the same).
+    """
+    def tokens(details: Sequence[Any]) -> Tuple[List[Any], List[str]]:
+        kept = [d for d in details if _normalize_token(d.text)]
+        return kept, [_normalize_token(d.text) for d in kept]
+
+    def side(details: Sequence[Any]) -> Dict[str, Any]:
+        if not details:
+            return {"start": None, "end": None, "content": "", "bbox": None}
+        polys = [d.poly for d in details]
+        return {
+            "start": details[0].line_num,
+            "end": details[-1].line_num,
+            "content": " ".join(d.text for d in details),
+            "bbox": list(union_bbox([(min(p[0::2]), min(p[1::2]), max(p[0::2]), max(p[1::2])) for p in polys])),
+        }
+
+    nsv_words, nsv_tokens = tokens(nsv_details)
+    sv_words, sv_tokens = tokens(sv_details)
+    changes = []
+    matcher = difflib.SequenceMatcher(None, nsv_tokens, sv_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        changes.append({
+            "type": {"insert": "Addition", "delete": "Deletion"}.get(tag, "Replace"),
+            "original_lines": side(nsv_words[i1:i2]),
+            "new_lines": side(sv_words[j1:j2]),
+        })
+    return changes
+
+
+def describe_audit_layout(crops: Sequence[Dict], image_shape: Tuple[int, ...], words: Sequence[WordBox] = (), max_text_chars: int = 160) -> str:
+    """
+    A compact text map of where audit crops sit on the page, so a model looking only
+    at the crops still knows their context.
+
+    Args:
+        crops (Sequence[Dict]): Crops from `image_utils.build_audit_crops`.
+        image_shape (Tuple[int, ...]): Shape of the full page render.
+        words (Sequence[WordBox]): Original-page words; the text inside each crop is quoted.
+        max_text_chars (int): Length cap of each quote.
+
+    Returns:
+        str: One line for the page and one per crop.
+    """
+    height, width = image_shape[:2]
+
+    def vertical(y: float) -> str:
+        return "top" if y < height / 3 else ("middle" if y < 2 * height / 3 else "bottom")
+
+    def horizontal(x: float) -> str:
+        return "left" if x < width / 3 else ("center" if x < 2 * width / 3 else "right")
+
+    lines = [f"Page size: {width}x{height} px. Crop boxes are (x1, y1, x2, y2) in page pixels."]
+    for crop in crops:
+        x1, y1, x2, y2 = crop["bbox"]
+        cx, cy = (x1 + x2) / 2.0, (y1 + y2) / 2.0
+        line = (
+            f"- {crop['id']}: box ({x1}, {y1}, {x2}, {y2}), {vertical(cy)}-{horizontal(cx)} of the page "
+            f"({100 * y1 // height}%-{100 * y2 // height}% down); shows {', '.join(crop['labels'])}."
+        )
+        inside = " ".join(w.text for w in words if bbox_center_in_regions(w.bbox, [crop["bbox"]]))
+        if inside:
+            if len(inside) > max_text_chars:
+                inside = inside[:max_text_chars].rstrip() + "..."
+            line += f' Original text in the box: "{inside}"'
+        lines.append(line)
+    return "\n".join(lines)
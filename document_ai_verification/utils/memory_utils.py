@@ -0,0 +1,142 @@
+# document_ai_verification/utils/memory_utils.py
+
+"""
+Memory accounting for page processing in one worker process.
+
+    - `MemoryBudget`: a byte budget shared by the requests of a worker. Each page
+      reserves what its decoded images will take before they are decoded, and waits
+      while other requests hold the rest of the budget, so a burst of large documents
+      queues up instead of running the worker out of memory.
+    - `RssTracker`: the peak resident set size observed while a request ran. The
+      process is shared by concurrent requests, so this is the worker's peak during the
+      request, not memory attributable to the request alone.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import resource
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+DEFAULT_POLL_SECONDS = 0.05
+
+
+def current_rss_bytes() -> int:
+    """This process's resident set size; the lifetime peak where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+
+def peak_rss_bytes() -> int:
+    """This process's peak resident set size since it started."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+def decoded_image_bytes(image_path: Path, channels: int = 1) -> int:
+    """What decoding an image with `channels` channels will take, from its header only."""
+    from PIL import Image
+
+    try:
+        with Image.open(image_path) as image:
+            width, height = image.size
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read the size of {image_path}: {e}")
+        return 0
+    return width * height * channels
+
+
+class MemoryReservation:
+    """Bytes held from a `MemoryBudget` until released. Releasing twice is harmless."""
+    def __init__(self, budget: "MemoryBudget", nbytes: int):
+        self.budget = budget
+        self.nbytes = nbytes
+
+    def release(self):
+        if self.nbytes:
+            self.budget._release(self.nbytes)
+            self.nbytes = 0
+
+
+class MemoryBudget:
+    """
+    A byte budget for decoded page images, shared by the requests of a worker.
+
+    A reservation larger than the whole budget is granted once nothing else is held,
+    so an oversized page is processed alone rather than never. Waiting polls, like the
+    shared-state semaphores, and does not block the event loop.
+    """
+    def __init__(self, total_bytes: int, poll_seconds: float = DEFAULT_POLL_SECONDS):
+        self.total_bytes = max(0, int(total_bytes))
+        self.poll_seconds = poll_seconds
+        self.used_bytes = 0
+        self.peak_used_bytes = 0
+        self.waits = 0
+        self.total_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, nbytes: int) -> bool:
+        with self._lock:
+            if self.used_bytes and self.used_bytes + nbytes > self.total_bytes:
+                return False
+            self.used_bytes += nbytes
+            self.peak_used_bytes = max(self.peak_used_bytes, self.used_bytes)
+            return True
+
+    def _release(self, nbytes: int):
+        with self._lock:
+            self.used_bytes = max(0, self.used_bytes - nbytes)
+
+    async def acquire(self, nbytes: int) -> MemoryReservation:
+        """Reserves `nbytes`, waiting until they fit. A budget of 0 disables the limit."""
+        if not self.total_bytes or nbytes <= 0:
+            return MemoryReservation(self, 0)
+        if not self._try_acquire(nbytes):
+            started = time.perf_counter()
+            logger.info(f"Waiting for {nbytes / 2**20:.0f} MB of the page memory budget ({self.used_bytes / 2**20:.0f}/{self.total_bytes / 2**20:.0f} MB in use).")
+            while not self._try_acquire(nbytes):
+                await asyncio.sleep(self.poll_seconds)
+            with self._lock:
+                self.waits += 1
+                self.total_wait_seconds += time.perf_counter() - started
+        return MemoryReservation(self, nbytes)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "budget_mb": round(self.total_bytes / 2**20, 1),
+                "in_use_mb": round(self.used_bytes / 2**20, 1),
+                "peak_in_use_mb": round(self.peak_used_bytes / 2**20, 1),
+                "waits": self.waits,
+                "total_wait_seconds": round(self.total_wait_seconds, 3),
+            }
+
+
+class RssTracker:
+    """The peak RSS seen by `sample` calls while a request runs."""
+    def __init__(self):
+        self.start_bytes = current_rss_bytes()
+        self.peak_bytes = self.start_bytes
+
+    def sample(self) -> int:
+        rss = current_rss_bytes()
+        if rss > self.peak_bytes:
+            self.peak_bytes = rss
+        return rss
+
+    def summary(self, request_id: Optional[str] = None) -> Dict[str, Any]:
+        return {
+            "request_id": request_id,
+            "start_rss_mb": round(self.start_bytes / 2**20, 1),
+            "peak_rss_mb": round(self.peak_bytes / 2**20, 1),
+        }
@@ -0,0 +1,190 @@
+# document_ai_verification/utils/profiling.py
+
+"""
+Opt-in sampling profiler for single verification requests.
+
+A background thread reads the Python stack of every thread every few milliseconds
+(`sys._current_frames`), so the profiled code runs unmodified and a request that is
+not profiled pays nothing: no thread is started and no hook is installed.
+
+The samples are written next to the request's artifacts, where /temp serves them:
+  - `profile.speedscope.json`: open it at https://www.speedscope.app (one profile
+    per thread, with a time-ordered and a flame-graph view).
+  - `profile.folded.txt`: collapsed stacks ("a;b;c <count>"), for flamegraph.pl and
+    similar tools.
+
+Samples of the event-loop thread are kept only while the request's own workflow is
+on the stack and are rooted at it, so concurrent requests do not show up there.
+Worker threads (`asyncio.to_thread`, streaming LLM calls) cannot be attributed to a
+request and are recorded as they are; profile under light load for a clean picture.
+"""
+
+import sys
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIRNAME = "profile"
+SPEEDSCOPE_FILENAME = "profile.speedscope.json"
+FOLDED_FILENAME = "profile.folded.txt"
+
+FrameKey = Tuple[str, str, int]  # (function, file, first line)
+
+# Leaf frames of threads that are waiting for work, not doing it.
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    return (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads of the process at a fixed interval.
+
+    Args:
+        interval_seconds (float): Time between samples.
+        root_frame: Optional frame (e.g. an async generator's `ag_frame`). Samples of the
+            thread that runs it are kept only while it is on the stack, and cut to start at it.
+        root_thread_id (Optional[int]): The thread that runs `root_frame`.
+        max_depth (int): Deeper stacks keep their innermost frames.
+    """
+    def __init__(self, interval_seconds: float = 0.005, root_frame: Any = None, root_thread_id: Optional[int] = None, max_depth: int = 200):
+        self.interval_seconds = interval_seconds
+        self.root_frame = root_frame
+        self.root_thread_id = root_thread_id
+        self.max_depth = max_depth
+        self.frames: Dict[FrameKey, int] = {}
+        self.samples: Dict[int, List[Tuple[Tuple[int, ...], float]]] = defaultdict(list)
+        self.thread_names: Dict[int, str] = {}
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.stopped_at = time.perf_counter()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval_seconds):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = self._stack(thread_id, frame)
+                if stack:
+                    self.thread_names.setdefault(thread_id, names.get(thread_id, str(thread_id)))
+                    self.samples[thread_id].append((stack, elapsed))
+
+    def _stack(self, thread_id: int, frame) -> Optional[Tuple[int, ...]]:
+        """Frame indices from the root to the leaf, or None for an idle or unrelated stack."""
+        leaf = frame.f_code
+        if (Path(leaf.co_filename).name, leaf.co_name) in _IDLE_LEAVES:
+            return None
+        keys: List[FrameKey] = []
+        found_root = self.root_frame is None or thread_id != self.root_thread_id
+        while frame is not None:
+            keys.append(_frame_key(frame))
+            if frame is self.root_frame:
+                found_root = True
+                break
+            frame = frame.f_back
+        if not found_root:
+            return None
+        keys = keys[:self.max_depth]
+        return tuple(self.frames.setdefault(key, len(self.frames)) for key in reversed(keys))
+
+    # --- Output ---
+    def _thread_label(self, thread_id: int) -> str:
+        if thread_id == self.root_thread_id:
+            return "event loop (this request)"
+        return self.thread_names.get(thread_id, str(thread_id))
+
+    def to_speedscope(self, name: str) -> Dict[str, Any]:
+        """The samples in speedscope's file format (https://www.speedscope.app/file-format-schema.json)."""
+        duration = max(0.0, self.stopped_at - self.started_at)
+        ordered = sorted(self.samples, key=lambda tid: (tid != self.root_thread_id, -len(self.samples[tid])))
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "document_ai_verification",
+            "activeProfileIndex": 0,
+            "shared": {"frames": [{"name": fn, "file": file, "line": line} for (fn, file, line) in self.frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": self._thread_label(thread_id),
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": round(duration, 6),
+                "samples": [list(stack) for stack, _ in self.samples[thread_id]],
+                "weights": [round(weight, 6) for _, weight in self.samples[thread_id]],
+            } for thread_id in ordered],
+        }
+
+    def to_folded(self) -> str:
+        """Collapsed stacks with sample counts, one line each, prefixed with the thread."""
+        names = [fn for (fn, _, _) in self.frames]
+        counts: Dict[str, int] = defaultdict(int)
+        for thread_id, samples in self.samples.items():
+            label = self._thread_label(thread_id).replace(";", ",")
+            for stack, _ in samples:
+                counts[";".join([label] + [names[i] for i in stack])] += 1
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
+    def write(self, output_dir: Path, name: str) -> Path:
+        """Writes both formats to `output_dir` and returns the speedscope file."""
+        output_dir.mkdir(parents=True, exist_ok=True)
+        speedscope_path = output_dir / SPEEDSCOPE_FILENAME
+        speedscope_path.write_text(json.dumps(self.to_speedscope(name)), encoding="utf-8")
+        (output_dir / FOLDED_FILENAME).write_text(self.to_folded(), encoding="utf-8")
+        return speedscope_path
+
+
+async def profile_events(
+    generator: AsyncGenerator[Dict[str, Any], None],
+    output_dir: Path,
+    name: str,
+    interval_seconds: float = 0.005
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Passes the events of `generator` through while it is profiled, and writes the
+    profile to `output_dir` when it finishes (or is abandoned by the client).
+    """
+    profiler = SamplingProfiler(interval_seconds, root_frame=generator.ag_frame, root_thread_id=threading.get_ident())
+    profiler.start()
+    try:
+        async for event in generator:
+            yield event
+    finally:
+        profiler.stop()
+        try:
+            path = profiler.write(output_dir, name)
+            sample_count = sum(len(samples) for samples in profiler.samples.values())
+            logger.info(f"Profile of {name}: {sample_count} samples over {profiler.stopped_at - profiler.started_at:.2f}s, written to {path}")
+        except OSError as e:
+            logger.error(f"Could not write the profile of {name}: {e}")
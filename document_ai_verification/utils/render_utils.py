@@ -0,0 +1,204 @@
+# document_ai_verification/utils/render_utils.py
+
+"""
+On-demand rasterization of single PDF pages and page regions with Poppler's `pdftoppm`.
+
+Each consumer of page images declares a render profile in config.yml
+(`application.rendering.profiles`): resolution, colorspace and format.
+  - 'diff':  the renders the workflow compares (fingerprints, pixel diffs, input
+             regions). A low screening DPI is enough, and grayscale.
+  - 'llm':   full pages for the vision model, rendered straight at `max_height`, in
+             color, so nothing has to be downscaled before it is sent.
+  - 'ocr':   text recognition; high DPI, grayscale.
+  - 'crops': the audit crops; high DPI, in color (ink colors matter to the model).
+  - 'screen': with `rendering.screening`, the first render of every page (fingerprints,
+             page alignment); pages whose pixels get compared are then rendered with 'diff'.
+A page is rendered once per distinct profile, and only when a consumer asks for it.
+High-DPI profiles are mostly used through tiles cut directly by pdftoppm
+(`-x/-y/-W/-H`), so a full high-DPI page exists only when it is really needed.
+"""
+
+import logging
+import shutil
+import subprocess
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BBox = Tuple[int, int, int, int]
+
+
+class RenderProfile(NamedTuple):
+    """How one consumer wants its page images. Exactly one of `dpi` and `max_height` is set."""
+    dpi: Optional[int] = None
+    max_height: Optional[int] = None
+    gray: bool = False
+    image_format: str = "png"  # 'png' or 'jpeg'
+    jpeg_quality: int = 90
+
+    @classmethod
+    def from_settings(cls, settings: Dict[str, Any]) -> "RenderProfile":
+        image_format = settings.get('format', 'png').lower()
+        if image_format not in ("png", "jpeg"):
+            raise ValueError(f"Unsupported render format '{image_format}' (use 'png' or 'jpeg').")
+        max_height = settings.get('max_height')
+        return cls(
+            dpi=None if max_height else int(settings.get('dpi', 300)),
+            max_height=int(max_height) if max_height else None,
+            gray=settings.get('color', 'rgb').lower() == 'gray',
+            image_format=image_format,
+            jpeg_quality=int(settings.get('jpeg_quality', 90)),
+        )
+
+    @property
+    def suffix(self) -> str:
+        return ".jpg" if self.image_format == "jpeg" else ".png"
+
+    @property
+    def key(self) -> str:
+        """Identifies the render; profiles with the same key share their files."""
+        size = f"{self.dpi}dpi" if self.dpi else f"h{self.max_height}"
+        quality = f"_q{self.jpeg_quality}" if self.image_format == "jpeg" else ""
+        return f"{size}_{'gray' if self.gray else 'rgb'}{quality}"
+
+
+# Defaults for profiles missing from config.yml; `max_height` of 'llm' follows the vision model's max_img_height.
+DEFAULT_RENDER_PROFILES = {
+    # As sensitive as 'full' rendering at the default DPI.
+    "diff": {"dpi": 300, "color": "rgb", "format": "png"},
+    "llm": {"color": "rgb", "format": "jpeg", "jpeg_quality": 90},
+    "ocr": {"dpi": 300, "color": "gray", "format": "png"},
+    "crops": {"dpi": 300, "color": "rgb", "format": "png"},
+    "screen": {"dpi": 100, "color": "gray", "format": "png"},
+}
+
+
+def load_render_profiles(config: Dict[str, Any]) -> Dict[str, RenderProfile]:
+    """The render profile of every consumer, from 'application.rendering.profiles' and the defaults."""
+    configured = (config['application'].get('rendering') or {}).get('profiles') or {}
+    max_img_height = (config.get('ai_services', {}).get('llm') or {}).get('max_img_height')
+    profiles = {}
+    for consumer, defaults in DEFAULT_RENDER_PROFILES.items():
+        settings = {**defaults, **(configured.get(consumer) or {})}
+        if consumer == "llm" and not settings.get('max_height') and not settings.get('dpi'):
+            settings['max_height'] = max_img_height or 896
+        profiles[consumer] = RenderProfile.from_settings(settings)
+    return profiles
+
+
+class RenderError(Exception):
+    """Raised when a page or region cannot be rasterized."""
+    pass
+
+
+def _pdftoppm() -> str:
+    executable = shutil.which("pdftoppm")
+    if executable is None:
+        raise RenderError("pdftoppm not found. Install Poppler (e.g. apt-get install poppler-utils).")
+    return executable
+
+
+def render_pdf_page(
+    pdf_path: Path,
+    page_num: int,
+    output_path: Path,
+    profile: RenderProfile,
+    region: Optional[BBox] = None,
+    timeout: float = 120.0
+) -> Path:
+    """
+    Renders one page of a PDF, or one region of it, as described by `profile`.
+
+    Args:
+        pdf_path (Path): The PDF document.
+        page_num (int): 1-indexed page number.
+        output_path (Path): Where the image is written; its suffix must be `profile.suffix`.
+        profile (RenderProfile): Resolution (DPI, or a target height), colorspace and format.
+        region (Optional[BBox]): (x1, y1, x2, y2) in pixels at the profile's DPI; the whole
+            page if None. Only DPI-based profiles can render regions.
+
+    Returns:
+        Path: `output_path`.
+
+    Raises:
+        RenderError: If pdftoppm is missing or fails.
+    """
+    # pdftoppm appends the extension itself.
+    output_prefix = output_path.with_suffix("")
+    command = [_pdftoppm(), "-f", str(page_num), "-l", str(page_num), "-singlefile"]
+    if profile.max_height:
+        if region is not None:
+            raise ValueError("Regions can only be rendered with a DPI-based profile.")
+        command += ["-scale-to-x", "-1", "-scale-to-y", str(profile.max_height)]
+    else:
+        command += ["-r", str(profile.dpi)]
+    if region is not None:
+        x1, y1, x2, y2 = region
+        command += ["-x", str(x1), "-y", str(y1), "-W", str(max(1, x2 - x1)), "-H", str(max(1, y2 - y1))]
+    if profile.image_format == "jpeg":
+        command += ["-jpeg", "-jpegopt", f"quality={profile.jpeg_quality}"]
+    else:
+        command.append("-png")
+    if profile.gray:
+        command.append("-gray")
+    command += [str(pdf_path), str(output_prefix)]
+    try:
+        subprocess.run(command, check=True, capture_output=True, timeout=timeout)
+    except subprocess.CalledProcessError as e:
+        raise RenderError(f"pdftoppm failed for page {page_num} of {pdf_path.name}: {e.stderr.decode(errors='replace')[:300]}") from e
+    except subprocess.TimeoutExpired as e:
+        raise RenderError(f"pdftoppm timed out after {timeout}s for page {page_num} of {pdf_path.name}") from e
+    if not output_path.is_file():
+        raise RenderError(f"pdftoppm produced no output for page {page_num} of {pdf_path.name}")
+    return output_path
+
+
+class PageRenderer:
+    """
+    Renders pages and tiles of one PDF on demand and keeps every render on disk, so a
+    page or region needed by several consumers is only rasterized once per profile.
+
+    Tile boxes are given in pixels of the page renders the workflow compares
+    (`base_dpi`) and scaled to the profile's DPI.
+    """
+    def __init__(self, pdf_path: Path, base_dpi: int, output_dir: Path):
+        self.pdf_path = Path(pdf_path)
+        self.base_dpi = base_dpi
+        self.output_dir = Path(output_dir)
+        self._lock = threading.Lock()
+        self.renders: Dict[str, int] = {"pages": 0, "tiles": 0}
+
+    def page(self, page_num: int, profile: RenderProfile) -> Path:
+        """The full page rendered with `profile`, on first use."""
+        output_path = self.output_dir / f"page_{page_num:03d}_{profile.key}{profile.suffix}"
+        with self._lock:
+            if not output_path.is_file():
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                render_pdf_page(self.pdf_path, page_num, output_path, profile)
+                self.renders["pages"] += 1
+        return output_path
+
+    def tile(self, page_num: int, bbox: BBox, profile: RenderProfile) -> Any:
+        """
+        The region `bbox` (in base-DPI pixels) of a page, rendered with a DPI-based `profile`.
+
+        Returns:
+            np.ndarray: The tile (grayscale for a gray profile, else BGR), about
+            profile.dpi/base_dpi times the size of `bbox`.
+        """
+        import cv2  # Deferred, like the rest of the image stack.
+
+        scale = profile.dpi / float(self.base_dpi)
+        region = tuple(int(round(v * scale)) for v in bbox)
+        output_path = self.output_dir / f"tile_{page_num:03d}_{profile.key}_{'_'.join(map(str, region))}{profile.suffix}"
+        with self._lock:
+            if not output_path.is_file():
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                render_pdf_page(self.pdf_path, page_num, output_path, profile, region=region)
+                self.renders["tiles"] += 1
+        image = cv2.imread(str(output_path), cv2.IMREAD_GRAYSCALE if profile.gray else cv2.IMREAD_COLOR)
+        if image is None:
+            raise RenderError(f"Could not read rendered tile {output_path}")
+        return image
@@ -0,0 +1,414 @@
+# document_ai_verification/utils/shared_state.py
+
+"""
+Cross-process shared state: a key/value cache with TTLs and a counting semaphore.
+
+When the API runs as N uvicorn/gunicorn workers (or the batch CLI runs a process
+pool), anything kept in a module-level dict or threading primitive is per-process.
+These backends let every process see the same cache entries and the same
+concurrency limit:
+
+    - 'memory': In-process only. Fine for a single worker and for tests.
+    - 'sqlite': A local SQLite file shared by all processes on one host (default).
+    - 'redis':  Any Redis-compatible server, for processes spread over several hosts.
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Leases are renewed every third of this while held, so only the lease of a holder that died
+# (e.g. its worker was killed) runs out, and its slot is reclaimed this long after at most.
+DEFAULT_LEASE_SECONDS = 60
+DEFAULT_POLL_SECONDS = 0.05
+
+
+class SharedStateError(Exception):
+    """Raised for shared-state configuration problems or acquisition timeouts."""
+    pass
+
+
+# ===================================================================
+# SECTION 1: Cache Backends
+# ===================================================================
+
+class SharedCache:
+    """Interface of a JSON-value cache shared across processes."""
+    def get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class MemorySharedCache(SharedCache):
+    """Process-local fallback with the same semantics as the shared backends."""
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._lock:
+            self._data[key] = (json.dumps(value), expires_at)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class _SQLiteBackend:
+    """Opens a fresh connection per operation, which is safe across threads and forks."""
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases (name TEXT NOT NULL, holder TEXT PRIMARY KEY, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS leases_by_name ON leases (name)")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30.0, isolation_level=None)
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """An IMMEDIATE transaction: takes the write lock up front, so check-then-insert is atomic."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        finally:
+            conn.close()
+
+
+class SQLiteSharedCache(SharedCache):
+    """Cache stored in a local SQLite file; shared by every process on the host."""
+    def __init__(self, backend: _SQLiteBackend, key_prefix: str = ""):
+        self._backend = backend
+        self._prefix = key_prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._backend._connect()
+        try:
+            row = conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (self._prefix + key,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        value, expires_at = row
+        if expires_at is not None and expires_at < time.time():
+            self.delete(key)
+            return None
+        return json.loads(value)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        with self._backend.transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (self._prefix + key, json.dumps(value), expires_at),
+            )
+            # Opportunistic cleanup keeps the file from growing without bound.
+            conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+
+    def delete(self, key: str):
+        with self._backend.transaction() as conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (self._prefix + key,))
+
+
+class RedisSharedCache(SharedCache):
+    """Cache stored in a Redis-compatible server."""
+    def __init__(self, client, key_prefix: str = ""):
+        self._client = client
+        self._prefix = key_prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self._client.get(self._prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        self._client.set(self._prefix + key, json.dumps(value), px=int(ttl_seconds * 1000) if ttl_seconds else None)
+
+    def delete(self, key: str):
+        self._client.delete(self._prefix + key)
+
+
+# ===================================================================
+# SECTION 2: Semaphore Backends
+# ===================================================================
+
+class SharedSemaphore:
+    """
+    A counting semaphore shared across processes, implemented with expiring leases.
+    A heartbeat thread renews the lease for as long as the slot is held, however long that is.
+
+    Usage:
+        with semaphore.acquire():
+            call_the_gpu()
+    """
+    # Whether leases expire and need renewing while held.
+    renews = True
+
+    def __init__(self, name: str, limit: int, lease_seconds: float = DEFAULT_LEASE_SECONDS, poll_seconds: float = DEFAULT_POLL_SECONDS):
+        if limit < 1:
+            raise ValueError("Semaphore limit must be at least 1.")
+        self.name = name
+        self.limit = limit
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+
+    def _try_acquire(self, holder: str) -> bool:
+        raise NotImplementedError
+
+    def _release(self, holder: str):
+        raise NotImplementedError
+
+    def _renew(self, holder: str) -> bool:
+        """Extends a held lease by `lease_seconds`; False if it is no longer held."""
+        raise NotImplementedError
+
+    def in_use(self) -> int:
+        """The number of slots currently held, across all processes."""
+        raise NotImplementedError
+
+    def _heartbeat(self, holder: str, stop: threading.Event):
+        while not stop.wait(self.lease_seconds / 3.0):
+            try:
+                if not self._renew(holder) and not stop.is_set():
+                    logger.warning(f"A lease on '{self.name}' expired while held; the limit of {self.limit} may be exceeded.")
+            except Exception as e:
+                logger.warning(f"Could not renew a lease on '{self.name}': {e}")
+
+    @contextmanager
+    def _held(self, holder: str) -> Iterator[None]:
+        """Keeps an acquired lease alive until the block exits, then releases it."""
+        stop = threading.Event()
+        if self.renews:
+            threading.Thread(target=self._heartbeat, args=(holder, stop), name=f"lease-{self.name}", daemon=True).start()
+        try:
+            yield
+        finally:
+            stop.set()
+            self._release(holder)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[None]:
+        """Blocks until a slot is free (or `timeout` seconds pass), and holds it for the `with` block."""
+        holder = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex}"
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while not self._try_acquire(holder):
+            if deadline is not None and time.monotonic() >= deadline:
+                raise SharedStateError(f"Timed out waiting for a '{self.name}' slot (limit {self.limit}).")
+            time.sleep(self.poll_seconds)
+        with self._held(holder):
+            yield
+
+
+class MemorySemaphore(SharedSemaphore):
+    """Process-local semaphore (threads only)."""
+    renews = False
+
+    def __init__(self, name: str, limit: int, **kwargs):
+        super().__init__(name, limit, **kwargs)
+        self._holders: set = set()
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, holder: str) -> bool:
+        with self._lock:
+            if len(self._holders) >= self.limit:
+                return False
+            self._holders.add(holder)
+            return True
+
+    def _release(self, holder: str):
+        with self._lock:
+            self._holders.discard(holder)
+
+    def _renew(self, holder: str) -> bool:
+        with self._lock:
+            return holder in self._holders
+
+    def in_use(self) -> int:
+        with self._lock:
+            return len(self._holders)
+
+
+class SQLiteSemaphore(SharedSemaphore):
+    """Semaphore whose leases live in the shared SQLite file."""
+    def __init__(self, backend: _SQLiteBackend, name: str, limit: int, **kwargs):
+        super().__init__(name, limit, **kwargs)
+        self._backend = backend
+
+    def _try_acquire(self, holder: str) -> bool:
+        now = time.time()
+        with self._backend.transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE name = ? AND expires_at < ?", (self.name, now))
+            (held,) = conn.execute("SELECT COUNT(*) FROM leases WHERE name = ?", (self.name,)).fetchone()
+            if held >= self.limit:
+                return False
+            conn.execute(
+                "INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                (self.name, holder, now + self.lease_seconds),
+            )
+            return True
+
+    def _release(self, holder: str):
+        with self._backend.transaction() as conn:
+            conn.execute("DELETE FROM leases WHERE holder = ?", (holder,))
+
+    def _renew(self, holder: str) -> bool:
+        with self._backend.transaction() as conn:
+            cursor = conn.execute("UPDATE leases SET expires_at = ? WHERE holder = ?", (time.time() + self.lease_seconds, holder))
+            return cursor.rowcount > 0
+
+    def in_use(self) -> int:
+        conn = self._backend._connect()
+        try:
+            (held,) = conn.execute("SELECT COUNT(*) FROM leases WHERE name = ? AND expires_at >= ?", (self.name, time.time())).fetchone()
+        finally:
+            conn.close()
+        return held
+
+
+# Atomically: drop expired leases, check the count, add ours. KEYS[1]=set, ARGV=now, expiry, limit, holder.
+_REDIS_ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[4])
+return 1
+"""
+
+
+class RedisSemaphore(SharedSemaphore):
+    """Semaphore whose leases are members of a Redis sorted set scored by expiry time."""
+    def __init__(self, client, name: str, limit: int, key_prefix: str = "", **kwargs):
+        super().__init__(name, limit, **kwargs)
+        self._client = client
+        self._key = f"{key_prefix}semaphore:{name}"
+        self._acquire_script = client.register_script(_REDIS_ACQUIRE_SCRIPT)
+
+    def _try_acquire(self, holder: str) -> bool:
+        now = time.time()
+        return bool(self._acquire_script(keys=[self._key], args=[now, now + self.lease_seconds, self.limit, holder]))
+
+    def _release(self, holder: str):
+        self._client.zrem(self._key, holder)
+
+    def _renew(self, holder: str) -> bool:
+        # XX: only update an existing member, so a released lease is never re-added.
+        self._client.zadd(self._key, {holder: time.time() + self.lease_seconds}, xx=True)
+        return self._client.zscore(self._key, holder) is not None
+
+    def in_use(self) -> int:
+        return self._client.zcount(self._key, time.time(), "+inf")
+
+
+# ===================================================================
+# SECTION 3: Factory
+# ===================================================================
+
+class SharedState:
+    """The configured cache plus a factory for named semaphores, built once per process."""
+    def __init__(self, shared_state_config: Optional[Dict[str, Any]] = None):
+        shared_state_config = shared_state_config or {}
+        self.backend = os.getenv("SHARED_STATE_BACKEND", shared_state_config.get("backend", "sqlite"))
+        key_prefix = shared_state_config.get("key_prefix", "docai:")
+        self._semaphores: Dict[str, SharedSemaphore] = {}
+        # Handles of per-key locks, with the number of callers holding or waiting for each.
+        self._locks: Dict[str, Tuple[SharedSemaphore, int]] = {}
+        self._lock = threading.Lock()
+
+        if self.backend == "memory":
+            self.cache: SharedCache = MemorySharedCache()
+            self._make_semaphore = lambda name, limit: MemorySemaphore(name, limit)
+        elif self.backend == "sqlite":
+            sqlite_backend = _SQLiteBackend(shared_state_config.get("sqlite_path", "shared_state.sqlite3"))
+            self.cache = SQLiteSharedCache(sqlite_backend, key_prefix)
+            self._make_semaphore = lambda name, limit: SQLiteSemaphore(sqlite_backend, name, limit)
+        elif self.backend == "redis":
+            try:
+                import redis
+            except ImportError:
+                raise SharedStateError("The 'redis' shared-state backend requires the redis package: pip install redis")
+            redis_url = os.getenv("REDIS_URL", shared_state_config.get("redis_url", "redis://localhost:6379/0"))
+            client = redis.Redis.from_url(redis_url)
+            self.cache = RedisSharedCache(client, key_prefix)
+            self._make_semaphore = lambda name, limit: RedisSemaphore(client, name, limit, key_prefix=key_prefix)
+        else:
+            raise SharedStateError(f"Unknown shared-state backend '{self.backend}'. Expected 'memory', 'sqlite' or 'redis'.")
+        logger.info(f"Shared state initialized with the '{self.backend}' backend in process {os.getpid()}.")
+
+    def semaphore(self, name: str, limit: int) -> SharedSemaphore:
+        """Returns the process-wide handle of a named semaphore; all processes using the
+        same backend and name share its `limit` slots."""
+        with self._lock:
+            if name not in self._semaphores:
+                self._semaphores[name] = self._make_semaphore(name, limit)
+            return self._semaphores[name]
+
+    @contextmanager
+    def lock(self, name: str, timeout: Optional[float] = None) -> Iterator[None]:
+        """Holds a named lock (a one-slot semaphore) for the `with` block, across all processes.
+
+        For locks named after open-ended keys (a template, a batch): unlike `semaphore`, the
+        handle is only kept while some caller holds or waits for it, so it is not kept forever.
+
+        Raises:
+            SharedStateError: If the lock is not free within `timeout` seconds.
+        """
+        with self._lock:
+            handle, users = self._locks.get(name) or (self._make_semaphore(name, 1), 0)
+            self._locks[name] = (handle, users + 1)
+        try:
+            with handle.acquire(timeout=timeout):
+                yield
+        finally:
+            with self._lock:
+                handle, users = self._locks[name]
+                if users > 1:
+                    self._locks[name] = (handle, users - 1)
+                else:
+                    del self._locks[name]
+
+    def lock_held(self, name: str) -> bool:
+        """Whether some process holds the named lock (see `lock`)."""
+        with self._lock:
+            entry = self._locks.get(name)
+        # A fresh handle reads the shared backends; a process-local lock nobody uses is free.
+        handle = entry[0] if entry else self._make_semaphore(name, 1)
+        return handle.in_use() > 0
@@ -1,4 +1,5 @@
 import difflib
+import hashlib
 import json
 
 def get_structured_diff_json(text1: str, text2: str) -> str:
@@ -57,3 +58,12 @@ def get_structured_diff_json(text1: str, text2: str) -> str:
 
     # Convert the list of dictionaries to a JSON string
     return json.dumps(diff_list, indent=4)
+
+
+def text_fingerprint(text: str) -> str:
+    """
+    Returns a SHA-256 hex digest of the text with whitespace normalized, so two
+    extractions of the same page compare equal despite layout-only differences.
+    """
+    normalized = " ".join((text or "").split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()